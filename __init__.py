@@ -2,6 +2,9 @@
 # Copyright © 2025 Caio Graco Purita. Todos os direitos reservados.
 # ARQUIVO: __init__.py
 # -------------------------------------------------------------------------
+import time  # Usado para medir quanto tempo a importação do add-on custa ao Anki
+_inicio_importacao = time.perf_counter()  # Marca o início da importação (antes de tudo)
+
 import os  # Importa módulo para interagir com o sistema operacional e variáveis de ambiente
 from aqt import mw  # Importa a janela principal do Anki (MainWindow)
 from aqt.qt import * # Importa componentes da interface gráfica Qt
@@ -9,9 +12,17 @@ from aqt import gui_hooks  # Importa o sistema de ganchos (hooks) do Anki para e
 
 # Importações dos módulos locais do nosso projeto
 from .tray import gerenciador_bandeja  # Importa o gerenciador da bandeja do sistema
-from .gui import mostrar_configuracoes, StartupManager  # Importa a tela de config e o gerenciador de boot
 from .lang import tr  # Importa a função de tradução
 from .notifications import notificador  # Importa o gerenciador de notificações
+from .configuracao import config_addon  # Importa o armazém de configurações
+from .consts import ORCAMENTO_IMPORTACAO_MS  # noqa: F401 (reexportado: o benchmark compara a importação com ele)
+from .diagnostico import registro_tempos, TRECHO_IMPORTACAO  # Medição de tempo dos trechos quentes
+
+# O módulo 'gui' (diálogo, atalho de inicialização, winreg, subprocess) só é importado
+# na inicialização adiada ou quando o usuário abre as opções.
+_addon_inicializado = False
+_servidor_instancia = None
+_nome_instancia = None
 
 def foi_iniciado_pelo_atalho_minimizado():
     """
@@ -29,11 +40,112 @@ def foi_iniciado_pelo_atalho_minimizado():
     # Caso contrário, foi uma abertura manual normal
     return False
 
+def inicializar_addon():
+    """
+    Faz todo o trabalho pesado do add-on: auto-cura do atalho, ícone da bandeja,
+    interceptação do 'X' e relógio de notificações.
+    No modo adiado roda após o perfil abrir ou no primeiro momento ocioso, o que vier antes.
+    Pode ser chamada várias vezes; só a primeira tem efeito.
+    """
+    global _addon_inicializado
+    if _addon_inicializado:
+        return
+    _addon_inicializado = True
+
+    if outra_instancia_na_bandeja():
+        # Outro Anki com este add-on já está na bandeja e acabou de ser chamado para a
+        # frente: este fecha pelo caminho normal do Anki, sem bandeja nem notificador
+        QTimer.singleShot(0, mw.close)
+        return
+
+    # Importado aqui para não pesar na abertura do Anki
+    from .gui import StartupManager
+
+    try:
+        # Verifica a integridade dos arquivos (se o run_minimized.vbs existe).
+        # Se o usuário tiver deletado o VBS ou for a primeira instalação, ele é recriado aqui.
+        StartupManager.verificar_integridade()
+    except:
+        # Se houver erro na verificação (ex: falta de permissão), ignoramos para não travar o Anki
+        pass
+
+    # Liga/desliga a medição de tempos conforme a configuração (e quando ela mudar)
+    registro_tempos.ativo = config_addon.obter("diagnostico_ativado")
+    config_addon.assinar(
+        ["diagnostico_ativado"],
+        lambda alteradas: setattr(registro_tempos, "ativo", alteradas["diagnostico_ativado"])
+    )
+
+    gerenciador_bandeja.inicializar()
+    notificador.inicializar()
+    escutar_outras_instancias()
+
+def outra_instancia_na_bandeja():
+    """
+    Pergunta ao dono da bandeja (mesma pasta de perfis) quem ele é, pedindo que apareça.
+    Se o dono for o notificador leve, ele mesmo sai e este Anki assume a bandeja.
+    """
+    global _nome_instancia
+    from .instancia import nome_servidor, enviar_comando, COMANDO_MOSTRAR, IDENTIDADE_ADDON
+    try:
+        _nome_instancia = nome_servidor(mw.pm.base)
+    except:
+        return False
+    return enviar_comando(_nome_instancia, COMANDO_MOSTRAR) == IDENTIDADE_ADDON
+
+def ao_receber_comando(comando):
+    """Comando vindo de outro processo (ver instancia.py)."""
+    from .instancia import COMANDO_MOSTRAR
+    if comando == COMANDO_MOSTRAR:
+        gerenciador_bandeja.mostrar_janela()
+
+def ao_receber_mensagem_anki(mensagem):
+    """
+    O próprio Anki barra a segunda abertura e manda 'raise' para esta instância,
+    mas não sabe tirar a janela da bandeja; fazemos isso por ele.
+    """
+    if mensagem == "raise" and not mw.isVisible():
+        gerenciador_bandeja.mostrar_janela()
+
+def escutar_outras_instancias():
+    global _servidor_instancia
+    from .instancia import ServidorInstancia, IDENTIDADE_ADDON
+    if _nome_instancia and _servidor_instancia is None:
+        _servidor_instancia = ServidorInstancia(IDENTIDADE_ADDON, ao_receber_comando, mw)
+        _servidor_instancia.escutar(_nome_instancia)
+    try:
+        mw.app.appMsg.connect(ao_receber_mensagem_anki)
+    except:
+        pass
+
 def ao_carregar_perfil():
     """
     Executado assim que o perfil do usuário é carregado no Anki.
     Este é o momento ideal para decidir se escondemos a janela e mostramos notificações.
     """
+    # Garante que a bandeja e o notificador existam antes de usá-los
+    inicializar_addon()
+
+    # Deixa registrado qual coleção o notificador leve deve vigiar no próximo boot
+    from .notificador_leve import gravar_estado, VARIAVEL_ACAO, ACAO_SINCRONIZAR
+    try:
+        gravar_estado(mw.col.path, mw.pm.name, getattr(mw, "lang", "en"))
+    except:
+        pass
+
+    # Aberto pelo menu "Sincronizar" do notificador leve: sincroniza assim que o perfil abrir.
+    # A variável é consumida para que uma troca de perfil não repita a ação.
+    if os.environ.pop(VARIAVEL_ACAO, None) == ACAO_SINCRONIZAR:
+        from .executor import executor
+        executor.sincronizar()
+
+    # Contagens da sessão anterior: selo, dica e resumo do dia sem esperar o banco
+    notificador.restaurar_instantaneo()
+
+    # A última saída pela bandeja não conseguiu sincronizar a tempo: refaz agora
+    from .encerramento import encerramento
+    encerramento.reconciliar()
+
     # Verifica se o Anki foi iniciado através do nosso atalho de inicialização automática
     iniciado_min = foi_iniciado_pelo_atalho_minimizado()
 
@@ -48,30 +160,50 @@ def ao_carregar_perfil():
         # que a notificação de "Boas-vindas / Resumo do dia" seja disparada.
         notificador.verificar_inicializacao(True)
 
+        # Com o sistema quieto, adianta o que a primeira restauração pagaria a frio
+        from .preaquecimento import preaquecedor
+        preaquecedor.agendar()
+
+def abrir_configuracoes():
+    """Abre o diálogo de opções, importando o módulo 'gui' somente agora."""
+    inicializar_addon()
+    from .gui import mostrar_configuracoes
+    mostrar_configuracoes()
+
 def configurar_menu():
     """Adiciona a opção de configuração no menu 'Ferramentas' do Anki."""
     # Cria uma nova ação (item de menu) com o texto traduzido
     acao = QAction(tr("nome_menu"), mw)
     # Conecta o clique dessa ação à função que abre a janela de configurações
-    acao.triggered.connect(mostrar_configuracoes)
+    acao.triggered.connect(abrir_configuracoes)
     # Adiciona a ação ao menu 'Tools' (Ferramentas) da janela principal
     mw.form.menuTools.addAction(acao)
-    
-# --- Execução Imediata (Auto-Cura) ---
-# O código abaixo roda no momento em que o Anki lê este arquivo (antes mesmo de abrir a janela).
-try:
-    # Verifica a integridade dos arquivos (se o run_minimized.vbs existe).
-    # Se o usuário tiver deletado o VBS ou for a primeira instalação, ele é recriado aqui.
-    StartupManager.verificar_integridade()
-except:
-    # Se houver erro na verificação (ex: falta de permissão), ignoramos para não travar o Anki
-    pass
+
+def ao_iniciar_janela_principal():
+    """
+    A janela principal terminou de ser montada (todos os add-ons já foram importados).
+    Só daqui em diante o add-on lê a configuração e cria objetos do Qt.
+    """
+    # Configura o menu de ferramentas para que o usuário possa acessar as opções
+    configurar_menu()
+    if config_addon.obter("inicializacao_adiada"):
+        # Modo adiado: o primeiro ciclo ocioso do Qt acontece depois que o Anki terminou de abrir
+        QTimer.singleShot(0, inicializar_addon)
+    else:
+        # Modo antigo: tudo roda assim que a janela principal existe
+        inicializar_addon()
 
 # --- Registro dos Ganchos ---
 
+# A importação só registra ganchos: nada de configuração, temporizadores ou widgets
+gui_hooks.main_window_did_init.append(ao_iniciar_janela_principal)
+
 # Adiciona nossa função 'ao_carregar_perfil' à lista de funções que o Anki executa
 # quando um perfil de usuário é carregado com sucesso.
 gui_hooks.profile_did_open.append(ao_carregar_perfil)
 
-# Configura o menu de ferramentas para que o usuário possa acessar as opções
-configurar_menu()
\ No newline at end of file
+# --- Orçamento de Importação ---
+# Quanto a importação custou fica no registro de tempos (diálogo de Diagnóstico);
+# o benchmark compara com ORCAMENTO_IMPORTACAO_MS.
+tempo_importacao_ms = (time.perf_counter() - _inicio_importacao) * 1000
+registro_tempos.registrar(TRECHO_IMPORTACAO, tempo_importacao_ms)
\ No newline at end of file
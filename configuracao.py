@@ -0,0 +1,134 @@
+# -------------------------------------------------------------------------
+# Copyright © 2025 Caio Graco Purita. Todos os direitos reservados.
+# ARQUIVO: configuracao.py
+# -------------------------------------------------------------------------
+from aqt import mw
+from .consts import *
+
+
+def _inteiro_entre(minimo, maximo):
+    return lambda valor: minimo <= valor <= maximo
+
+
+# Esquema do config.json: chave -> (tipo, valor padrão, validador opcional)
+ESQUEMA = {
+    "acao_ao_fechar": (str, ACAO_BANDEJA, lambda v: v in (ACAO_BANDEJA, ACAO_SAIR, ACAO_PADRAO)),
+    "acao_ao_minimizar": (str, ACAO_BANDEJA, lambda v: v in (ACAO_BANDEJA, ACAO_PADRAO)),
+    "sincronizar_na_bandeja": (bool, True, None),
+    "iniciar_minimizado": (bool, False, None),
+    "notificador_leve": (bool, True, None),
+    "iniciar_com_sistema": (bool, False, None),
+    "preaquecer_apos_boot": (bool, True, None),
+    "notificacoes_ativadas": (bool, True, None),
+    "intervalo_notificacao": (int, 30, _inteiro_entre(1, 1440)),
+    "intervalo_sinc_remota": (int, 60, _inteiro_entre(1, 10080)),
+    "prazo_sinc_saida": (int, 30, _inteiro_entre(5, 600)),
+    "inicializacao_adiada": (bool, True, None),
+    "diagnostico_ativado": (bool, False, None),
+    "modo_perfilador": (str, MODO_AMOSTRAGEM, lambda v: v in (MODO_AMOSTRAGEM, MODO_DETERMINISTICO)),
+    "hibernar_na_bandeja": (bool, False, None),
+    "minutos_para_hibernar": (int, 30, _inteiro_entre(1, 1440)),
+    "vigiar_outros_perfis": (bool, False, None),
+    # Lista de regras (ver regras.py); as inválidas são ignoradas ao compilar
+    "regras_notificacao": (list, [], None),
+}
+
+
+def validar(chave, valor):
+    """Retorna o valor se ele respeitar o esquema; caso contrário, o padrão da chave."""
+    if chave not in ESQUEMA:
+        return valor
+    tipo, padrao, validador = ESQUEMA[chave]
+    # bool é subclasse de int no Python; não aceitamos True/False como número
+    if not isinstance(valor, tipo) or (tipo is int and isinstance(valor, bool)):
+        return padrao
+    if validador and not validador(valor):
+        return padrao
+    return valor
+
+
+class ArmazemConfig:
+    """
+    Guarda o config.json em memória, já validado contra o ESQUEMA.
+    O arquivo é lido uma única vez; depois disso as consultas são só um acesso ao dicionário.
+    Quem se inscreve com 'assinar' é avisado apenas quando uma das suas chaves muda,
+    seja pelo nosso diálogo, seja pelo editor de configuração do gerenciador de add-ons.
+    """
+
+    def __init__(self):
+        self.nome_addon = mw.addonManager.addonFromModule(__name__)
+        self._valores = None  # Carregado na primeira consulta, não na importação
+        self.assinantes = []  # lista de (conjunto de chaves, callback)
+        self.gravacao_pendente = False  # Memória ajustada sem gravar (ver ajustar_em_memoria)
+        mw.addonManager.setConfigUpdatedAction(__name__, self._ao_editar_externamente)
+
+    @property
+    def valores(self):
+        if self._valores is None:
+            self._valores = self._normalizar(mw.addonManager.getConfig(__name__) or {})
+        return self._valores
+
+    @valores.setter
+    def valores(self, novos):
+        self._valores = novos
+
+    def _normalizar(self, bruto):
+        valores = dict(bruto)
+        for chave in ESQUEMA:
+            valores[chave] = validar(chave, bruto.get(chave, ESQUEMA[chave][1]))
+        return valores
+
+    def obter(self, chave, padrao=None):
+        return self.valores.get(chave, padrao)
+
+    def copia(self):
+        return dict(self.valores)
+
+    def assinar(self, chaves, callback):
+        """'callback(alteradas)' recebe um dicionário só com as chaves que mudaram."""
+        self.assinantes.append((set(chaves), callback))
+
+    def definir(self, novos, notificar=True):
+        """Valida, grava no config.json e avisa os assinantes afetados."""
+        combinados = dict(self.valores)
+        combinados.update(novos)
+        self._aplicar(self._normalizar(combinados), gravar=True, notificar=notificar)
+
+    def ajustar_em_memoria(self, novos):
+        """
+        Corrige valores só na memória, sem gravar nem avisar (ex: o estado real do atalho
+        ao abrir o diálogo). O config.json é acertado no próximo definir().
+        """
+        combinados = dict(self.valores)
+        combinados.update(novos)
+        normalizados = self._normalizar(combinados)
+        if normalizados != self.valores:
+            self.gravacao_pendente = True
+        self.valores = normalizados
+
+    def _ao_editar_externamente(self, novo):
+        # O gerenciador de add-ons já gravou o arquivo; só atualizamos a memória
+        self._aplicar(self._normalizar(novo or {}), gravar=False, notificar=True)
+
+    def _aplicar(self, novos, gravar, notificar):
+        alteradas = {
+            chave: valor for chave, valor in novos.items()
+            if self.valores.get(chave) != valor
+        }
+        self.valores = novos
+        if gravar and (alteradas or self.gravacao_pendente):
+            mw.addonManager.writeConfig(self.nome_addon, novos)
+        # Gravado agora, ou o arquivo acabou de ser editado por fora: a memória bate com ele
+        self.gravacao_pendente = False
+        if not notificar:
+            return
+        for chaves, callback in list(self.assinantes):
+            relevantes = {c: v for c, v in alteradas.items() if c in chaves}
+            if relevantes:
+                try:
+                    callback(relevantes)
+                except:
+                    pass
+
+
+config_addon = ArmazemConfig()
@@ -2,6 +2,7 @@
 # Copyright © 2025 Caio Graco Purita. Todos os direitos reservados.
 # ARQUIVO: consts.py
 # -------------------------------------------------------------------------
+import os
 
 # --- Definição das Ações Possíveis (Constantes) ---
 # Estas constantes são usadas para decidir o que o programa fará 
@@ -16,6 +17,11 @@ ACAO_SAIR = "quit"
 # Ação: Comportamento padrão (ficar na barra de tarefas ou fechar normal)
 ACAO_PADRAO = "standard"
 
+# --- Arquivos ---
+
+# Pasta que o Anki preserva nas atualizações do add-on (estado, instantâneos, capturas)
+PASTA_USUARIO = os.path.join(os.path.dirname(os.path.abspath(__file__)), "user_files")
+
 # --- Textos e Títulos da Aplicação ---
 
 # Nome oficial que aparecerá nos menus e janelas
@@ -25,4 +31,19 @@ NOME_APP = "Anki Tray Pro"
 DICA_BANDEJA = "O Anki está rodando em segundo plano"
 
 # Modelo de mensagem para quando houver cartões (o {} será substituído pelo número)
-MSG_NAO_LIDA = "Você tem {} cartões para revisar!"
\ No newline at end of file
+MSG_NAO_LIDA = "Você tem {} cartões para revisar!"
+
+# --- Captura de Desempenho (perfilador.py) ---
+
+# Modo: amostragem periódica das pilhas de todas as threads (custo baixo)
+MODO_AMOSTRAGEM = "amostragem"
+
+# Modo: cProfile determinístico nas threads do add-on (exato, porém mais pesado)
+MODO_DETERMINISTICO = "cprofile"
+
+# --- Desempenho ---
+
+# Orçamento (em milissegundos) para importar o add-on durante a abertura do Anki.
+# O tempo medido fica no registro de tempos (diálogo de Diagnóstico) e o benchmark
+# falha quando ele passa do orçamento.
+ORCAMENTO_IMPORTACAO_MS = 50
@@ -0,0 +1,477 @@
+# -------------------------------------------------------------------------
+# Copyright © 2025 Caio Graco Purita. Todos os direitos reservados.
+# ARQUIVO: contagem.py
+# -------------------------------------------------------------------------
+import bisect
+import datetime
+from array import array
+import threading
+import time
+from .diagnostico import registro_tempos, TRECHO_RECONTAGEM_COMPLETA, TRECHO_RECONTAGEM_INCREMENTAL
+
+# Filas do agendador do Anki que nos interessam
+FILA_APRENDIZADO = 1      # 'due' em segundos (epoch)
+FILA_REVISAO = 2          # 'due' em número de dias desde a criação da coleção
+FILA_APRENDIZADO_DIA = 3  # 'due' em número de dias (passos de aprendizado >= 1 dia)
+
+# Posição de cada fila dentro da lista de contagens por baralho
+INDICE_FILA = {FILA_APRENDIZADO: 0, FILA_REVISAO: 1, FILA_APRENDIZADO_DIA: 2}
+
+# Alcance da linha do tempo de vencimentos, a partir da última recontagem completa
+HORIZONTE_LINHA_TEMPO = 24 * 60 * 60
+
+# Acima disso a foto não guarda os ids vencidos (8 bytes cada) e a comparação volta a ser pelo total
+LIMITE_IDS_COMPARACAO = 1000000
+
+# Quanto o instantâneo espera pela contagem em andamento antes de desistir (fechamento do perfil)
+ESPERA_TRAVA_EXPORTAR_S = 0.5
+
+
+class ContagemDescartada(Exception):
+    """A contagem foi pedida antes de um invalidar(): o cache já é de outra coleção."""
+
+
+def calcular_dia_estudo(criacao, virada, agora):
+    """
+    Reproduz o cálculo de dias do agendador v2/v3 do Anki.
+    'criacao' é col.crt, 'virada' é a hora (local) em que o dia de estudo muda.
+    Retorna (numero_do_dia, timestamp_da_proxima_virada).
+    """
+    deslocamento = datetime.timedelta(hours=virada)
+    dia_criacao = (datetime.datetime.fromtimestamp(criacao) - deslocamento).date()
+    dia_atual = (datetime.datetime.fromtimestamp(agora) - deslocamento).date()
+    proxima_virada = datetime.datetime.combine(
+        dia_atual + datetime.timedelta(days=1), datetime.time(hour=virada)
+    )
+    return (dia_atual - dia_criacao).days, int(proxima_virada.timestamp())
+
+
+class FotoContagem:
+    """
+    Retrato imutável das contagens num instante.
+    'por_baralho' mapeia did -> [aprendizado, revisao, aprendizado_dia].
+    'linha_tempo' é a lista ordenada dos instantes (depois de 'instante') em que cada
+    cartão ainda não contado passa a contar: passos de aprendizado e a virada do dia.
+    As previsões da bandeja saem dela por bisect, sem nova consulta ao banco.
+    'proximo_vencimento' é o timestamp em que o próximo cartão de aprendizado
+    passa a contar como vencido (None se não houver nenhum até a virada do dia).
+    'vencidos_ids' é o array ordenado dos ids contados; é ele que diz quais cartões são de
+    fato novos entre duas fotos. Em coleções gigantes (ver LIMITE_IDS_COMPARACAO) a foto é
+    criada com 'sem_ids' e ele fica None. O baralho e a fila dos cartões novos saem do
+    cache (CacheContagem.descrever), não da foto: fotos guardadas como referência custam
+    só os 8 bytes por id.
+    """
+
+    def __init__(self, por_baralho, instante, carimbo, dia, corte_dia, linha_tempo=(),
+                 vencidos_ids=None, sem_ids=False):
+        self.por_baralho = por_baralho
+        self.instante = instante
+        self.carimbo = carimbo
+        self.dia = dia
+        self.corte_dia = corte_dia
+        self.linha_tempo = linha_tempo
+        if sem_ids:
+            self.vencidos_ids = None
+        else:
+            self.vencidos_ids = vencidos_ids if vencidos_ids is not None else array("q")
+        proximo = self.proximo_apos(instante)
+        self.proximo_vencimento = proximo if proximo is not None and proximo < corte_dia else None
+        self.aprendizado = sum(c[0] for c in por_baralho.values())
+        self.revisao = sum(c[1] for c in por_baralho.values())
+        self.aprendizado_dia = sum(c[2] for c in por_baralho.values())
+        self.total = self.aprendizado + self.revisao + self.aprendizado_dia
+
+    def do_baralho(self, did):
+        return self.por_baralho.get(did, [0, 0, 0])
+
+    def impressao(self):
+        """Identificação barata do que a tela inicial mostraria com esta foto."""
+        return (self.carimbo, self.dia, self.total, self.aprendizado)
+
+    def proximo_despertar(self):
+        """Primeiro instante futuro em que a contagem pode mudar sozinha."""
+        if self.proximo_vencimento is None:
+            return self.corte_dia
+        return min(self.proximo_vencimento, self.corte_dia)
+
+    def vencidos_em(self, momento):
+        """Total vencido em 'momento' (>= instante da foto), contando o que venceu desde a foto."""
+        return self.total + bisect.bisect_right(self.linha_tempo, momento)
+
+    def vencendo_entre(self, inicio, fim):
+        """Quantos cartões passam a contar no intervalo (inicio, fim]."""
+        return bisect.bisect_right(self.linha_tempo, fim) - bisect.bisect_right(self.linha_tempo, inicio)
+
+    def proximo_apos(self, momento):
+        """Primeiro instante da linha do tempo depois de 'momento' (None se não houver)."""
+        i = bisect.bisect_right(self.linha_tempo, momento)
+        return self.linha_tempo[i] if i < len(self.linha_tempo) else None
+
+    def previsao(self, agora=None):
+        """(vencidos agora, vencendo na próxima hora, próximo vencimento) para a bandeja."""
+        agora = int(time.time()) if agora is None else agora
+        agora = max(agora, self.instante)
+        return self.vencidos_em(agora), self.vencendo_entre(agora, agora + 3600), self.proximo_apos(agora)
+
+
+FOTO_VAZIA = FotoContagem({}, 0, None, None, 0)
+
+
+def diferenca_ordenada(anterior, atual):
+    """
+    Intercala dois arrays ordenados de ids numa passada só.
+    Retorna (novos, resolvidos): ids só em 'atual' e ids só em 'anterior'.
+    """
+    novos, resolvidos = array("q"), array("q")
+    if anterior == atual:
+        return novos, resolvidos
+    i = j = 0
+    n, m = len(anterior), len(atual)
+    while i < n and j < m:
+        a, b = anterior[i], atual[j]
+        if a == b:
+            i += 1
+            j += 1
+        elif a < b:
+            resolvidos.append(a)
+            i += 1
+        else:
+            novos.append(b)
+            j += 1
+    resolvidos.extend(anterior[i:])
+    novos.extend(atual[j:])
+    return novos, resolvidos
+
+
+def comparar_fotos(anterior, atual):
+    """
+    Quantos cartões venceram e quantos saíram da contagem entre duas fotos.
+    Revisões feitas em outro aparelho não escondem cartões que acabaram de vencer
+    (o total pode ficar igual); sem ids nas fotos, cai para a diferença dos totais.
+    """
+    if anterior.vencidos_ids is None or atual.vencidos_ids is None:
+        delta = atual.total - anterior.total
+        return max(delta, 0), max(-delta, 0)
+    novos, resolvidos = diferenca_ordenada(anterior.vencidos_ids, atual.vencidos_ids)
+    return len(novos), len(resolvidos)
+
+
+def formatar_previsao(foto, tr, agora=None):
+    """Texto "N agora, M na próxima hora, próximo às HH:MM" da bandeja (None sem foto)."""
+    if foto.carimbo is None:
+        return None
+    vencidos, proxima_hora, proximo = foto.previsao(agora)
+    if proximo is None:
+        return tr("dica_previsao_sem_proximo").format(vencidos)
+    return tr("dica_previsao").format(vencidos, proxima_hora, time.strftime("%H:%M", time.localtime(proximo)))
+
+
+class CacheContagem:
+    """
+    Cache incremental dos cartões que vencem hoje e da linha do tempo das próximas 24 horas.
+    A foto é indexada pelo carimbo da coleção (col.mod) e pela última sincronização (col.ls):
+    - Carimbo igual: nada mudou, a contagem sai da memória (acerto).
+    - Carimbo diferente: relemos apenas os cartões com usn = -1 (alterados localmente
+      desde a foto), usando o índice ix_cards_usn do próprio Anki.
+    - Virada de dia, nova sincronização, carimbo que andou para trás (backup restaurado)
+      ou carimbo diferente sem nenhum cartão alterado na varredura: recontagem completa.
+      Desfazer devolve ao cartão o mod e o usn antigos, então a varredura incremental não
+      o enxerga; quem vê o desfazer chama pedir_recontagem().
+    A linha do tempo ('linha_tempo', pares (instante, id) ordenados) guarda quando cada
+    cartão de aprendizado passa a contar e os cartões de amanhã na virada do dia; ela é
+    montada na recontagem completa e corrigida cartão a cartão nas incrementais.
+    """
+
+    def __init__(self):
+        self.carimbo = None           # col.mod no momento da foto
+        self.ultima_sinc = None       # col.ls no momento da foto
+        self.dia = None               # Número do dia de estudo no momento da foto
+        self.corte_dia = 0            # Timestamp do fim do dia de estudo
+        self.antecipacao = 0          # Limite de antecipação do aprendizado (collapseTime)
+        self.marca_mod = 0            # Maior cards.mod (usn = -1) já processado
+        self.pendentes = {}           # id do cartão -> (did, queue, due)
+        self.horizonte = 0            # Fim da linha do tempo (timestamp)
+        self.linha_tempo = []         # (instante em que passa a contar, id do cartão), ordenada
+        self.momentos = {}            # id do cartão -> instante na linha do tempo
+        self.ultima_foto = None       # Reaproveitada enquanto nada mudar nem vencer
+        self.recontagem_pedida = False  # Próxima atualização relê tudo (ver pedir_recontagem)
+        self.trava = threading.Lock()  # A foto é atualizada em segundo plano (executor)
+        self.geracao = 0              # Avança a cada invalidar() (ver obter_foto)
+
+        # Estatísticas para confirmar que o cache está funcionando
+        self.acertos = 0
+        self.falhas = 0
+        self.recontagens_completas = 0
+        self.recontagens_incrementais = 0
+        self.restauracoes = 0
+
+    def invalidar(self):
+        """
+        Descarta a foto atual. A próxima consulta fará uma recontagem completa.
+        Espera a contagem em andamento terminar; as pedidas antes daqui são descartadas.
+        """
+        with self.trava:
+            self.geracao += 1
+            self.carimbo = None
+            self.ultima_sinc = None
+            self.dia = None
+            self.pendentes = {}
+            self.linha_tempo = []
+            self.momentos = {}
+            self.ultima_foto = None
+
+    def pedir_recontagem(self):
+        """
+        A próxima atualização fará uma recontagem completa. Pode ser chamada de qualquer
+        thread sem esperar a trava: uma contagem em andamento não apaga o pedido.
+        """
+        self.recontagem_pedida = True
+
+    def _vence_hoje(self, fila, vencimento):
+        if fila == FILA_APRENDIZADO:
+            return vencimento < self.corte_dia
+        return vencimento <= self.dia
+
+    def _momento(self, fila, vencimento):
+        """Instante em que o cartão passa a contar, se cair dentro do horizonte (senão None)."""
+        if fila == FILA_APRENDIZADO:
+            # Entra na contagem assim que fica dentro do limite de antecipação
+            if vencimento < self.horizonte:
+                return vencimento - self.antecipacao
+        elif vencimento == self.dia + 1:
+            return self.corte_dia
+        return None
+
+    def _marcar_momento(self, cid, momento):
+        """Move o cartão para 'momento' na linha do tempo (None o retira)."""
+        anterior = self.momentos.pop(cid, None)
+        if anterior is not None:
+            i = bisect.bisect_left(self.linha_tempo, (anterior, cid))
+            if i < len(self.linha_tempo) and self.linha_tempo[i] == (anterior, cid):
+                del self.linha_tempo[i]
+        if momento is not None:
+            self.momentos[cid] = momento
+            bisect.insort(self.linha_tempo, (momento, cid))
+
+    @registro_tempos.medido(TRECHO_RECONTAGEM_COMPLETA)
+    def _recontar_tudo(self, col):
+        self.recontagens_completas += 1
+        self.horizonte = int(time.time()) + HORIZONTE_LINHA_TEMPO
+        linhas = col.db.all(
+            "SELECT id, did, queue, due FROM cards "
+            "WHERE (queue IN (?, ?) AND due <= ?) OR (queue = ? AND due < ?)",
+            FILA_REVISAO, FILA_APRENDIZADO_DIA, self.dia + 1,
+            FILA_APRENDIZADO, max(self.corte_dia, self.horizonte)
+        )
+        self.pendentes = {}
+        self.momentos = {}
+        for cid, did, fila, venc in linhas:
+            if self._vence_hoje(fila, venc):
+                self.pendentes[cid] = (did, fila, venc)
+            momento = self._momento(fila, venc)
+            if momento is not None:
+                self.momentos[cid] = momento
+        # Ordenar uma vez sai mais barato que inserir um a um
+        self.linha_tempo = sorted((momento, cid) for cid, momento in self.momentos.items())
+        self.marca_mod = col.db.scalar("SELECT max(mod) FROM cards WHERE usn = -1") or 0
+
+    @registro_tempos.medido(TRECHO_RECONTAGEM_INCREMENTAL)
+    def _recontar_modificados(self, col):
+        """
+        Retorna quantos cartões mudaram (0: a mudança da coleção não está nos cartões lidos).
+        Conta os alterados depois da marca e, na própria marca (mesmo segundo), os que saíram
+        diferentes do que o cache tinha.
+        """
+        self.recontagens_incrementais += 1
+        marca_anterior = self.marca_mod
+        alterados = 0
+        linhas = col.db.all(
+            "SELECT id, did, queue, due, mod FROM cards WHERE usn = -1 AND mod >= ?",
+            self.marca_mod
+        )
+        for cid, did, fila, venc, mod in linhas:
+            antes = (self.pendentes.get(cid), self.momentos.get(cid))
+            if fila in (FILA_APRENDIZADO, FILA_REVISAO, FILA_APRENDIZADO_DIA):
+                if self._vence_hoje(fila, venc):
+                    self.pendentes[cid] = (did, fila, venc)
+                else:
+                    self.pendentes.pop(cid, None)
+                self._marcar_momento(cid, self._momento(fila, venc))
+            else:
+                self.pendentes.pop(cid, None)
+                self._marcar_momento(cid, None)
+            if mod > marca_anterior or antes != (self.pendentes.get(cid), self.momentos.get(cid)):
+                alterados += 1
+            if mod > self.marca_mod:
+                self.marca_mod = mod
+
+        # Cartões apagados desde a última sincronização ficam registrados em 'graves' (type 0)
+        for (cid,) in col.db.all("SELECT oid FROM graves WHERE type = 0 AND usn = -1"):
+            if self.pendentes.pop(cid, None) is not None or cid in self.momentos:
+                alterados += 1
+            self._marcar_momento(cid, None)
+        return alterados
+
+    def _obter_dia(self, col):
+        """
+        O número do dia e o corte só mudam na virada; enquanto o corte não passou,
+        reaproveitamos o valor calculado sem consultar as configurações da coleção.
+        """
+        if self.dia is not None and time.time() < self.corte_dia:
+            return self.dia, self.corte_dia
+        virada = col.get_config("rollover", 4)
+        self.antecipacao = col.get_config("collapseTime", 1200)
+        return calcular_dia_estudo(col.crt, virada, time.time())
+
+    def atualizar(self, col):
+        """Garante que a foto corresponde ao estado atual da coleção. Retorna True se algo mudou."""
+        carimbo = col.mod
+        ultima_sinc = col.db.scalar("SELECT ls FROM col")
+        hoje, corte_dia = self._obter_dia(col)
+
+        recontagem_pedida, self.recontagem_pedida = self.recontagem_pedida, False
+        if (not recontagem_pedida and self.carimbo == carimbo and self.ultima_sinc == ultima_sinc
+                and self.dia == hoje):
+            self.acertos += 1
+            return False
+
+        self.falhas += 1
+        recontagem_completa = (
+            recontagem_pedida or self.carimbo is None or carimbo < self.carimbo
+            or self.dia != hoje or self.ultima_sinc != ultima_sinc
+        )
+        self.dia = hoje
+        self.corte_dia = corte_dia
+
+        if recontagem_completa or not self._recontar_modificados(col):
+            self._recontar_tudo(col)
+
+        self.carimbo = carimbo
+        self.ultima_sinc = ultima_sinc
+        return True
+
+    def obter_foto(self, col, geracao=None):
+        """
+        Agrupa, numa única passada pelos cartões pendentes, as contagens de cada
+        baralho por fila. Todos os consumidores (notificações, bandeja, menus) leem esta foto.
+        Com 'geracao' (a do pedido), levanta ContagemDescartada se o cache foi invalidado
+        depois dele: a coleção que o pedido via pode já ter fechado.
+        """
+        with self.trava:
+            if geracao is not None and geracao != self.geracao:
+                raise ContagemDescartada()
+            mudou = self.atualizar(col)
+            agora = int(time.time())
+            ultima = self.ultima_foto
+            if not mudou and ultima is not None and (not ultima.linha_tempo or agora < ultima.linha_tempo[0]):
+                # Coleção igual e nenhum instante da linha do tempo passou: contagens e ids
+                # são os mesmos, só o instante da foto anda
+                return FotoContagem(
+                    ultima.por_baralho, agora, self.carimbo, self.dia, self.corte_dia, ultima.linha_tempo,
+                    ultima.vencidos_ids, sem_ids=ultima.vencidos_ids is None
+                )
+            return self._montar_foto(agora)
+
+    def _montar_foto(self, agora):
+        """Foto dos cartões pendentes em 'agora' (chamada com a trava já tomada)."""
+        limite_aprendizado = agora + self.antecipacao
+        por_baralho = {}
+        ids = []
+        for cid, (did, fila, vencimento) in self.pendentes.items():
+            if fila == FILA_APRENDIZADO and vencimento > limite_aprendizado:
+                continue
+            ids.append(cid)
+            contagens = por_baralho.get(did)
+            if contagens is None:
+                contagens = por_baralho[did] = [0, 0, 0]
+            contagens[INDICE_FILA[fila]] += 1
+        # A foto leva só o futuro da linha do tempo (a lista do cache continua mudando)
+        inicio = bisect.bisect_right(self.linha_tempo, (agora, float("inf")))
+        linha_tempo = [momento for momento, _ in self.linha_tempo[inicio:]]
+        sem_ids = len(ids) > LIMITE_IDS_COMPARACAO
+        if not sem_ids:
+            ids.sort()
+        self.ultima_foto = FotoContagem(
+            por_baralho, agora, self.carimbo, self.dia, self.corte_dia, linha_tempo,
+            None if sem_ids else array("q", ids), sem_ids=sem_ids
+        )
+        return self.ultima_foto
+
+    def descrever(self, ids):
+        """[(did, queue)] dos cartões 'ids' que ainda estão pendentes (os que saíram são pulados)."""
+        with self.trava:
+            pendentes = self.pendentes
+            return [cartao[:2] for cartao in map(pendentes.get, ids) if cartao is not None]
+
+    def exportar(self, chave_gravada=None):
+        """
+        Estado do cache em arrays, para o instantâneo em disco (ver instantaneo.py).
+        None se ainda não houve contagem, se a contagem em andamento não terminou a tempo ou
+        se o estado é o mesmo de 'chave_gravada' ((carimbo, ultima_sinc, dia) do instantâneo
+        já gravado; a comparação é feita sob a trava).
+        """
+        if not self.trava.acquire(timeout=ESPERA_TRAVA_EXPORTAR_S):
+            return None
+        try:
+            if self.carimbo is None or (self.carimbo, self.ultima_sinc, self.dia) == chave_gravada:
+                return None
+            ids = sorted(self.pendentes)
+            cartoes = [self.pendentes[cid] for cid in ids]
+            return {
+                "carimbo": self.carimbo,
+                "ultima_sinc": self.ultima_sinc,
+                "dia": self.dia,
+                "corte_dia": self.corte_dia,
+                "antecipacao": self.antecipacao,
+                "marca_mod": self.marca_mod,
+                "horizonte": self.horizonte,
+                "instante": self.ultima_foto.instante if self.ultima_foto else int(time.time()),
+                "ids": array("q", ids),
+                "baralhos": array("q", (did for did, _, _ in cartoes)),
+                "filas": array("q", (fila for _, fila, _ in cartoes)),
+                "vencimentos": array("q", (venc for _, _, venc in cartoes)),
+                "momentos": array("q", (momento for momento, _ in self.linha_tempo)),
+                "ids_linha_tempo": array("q", (cid for _, cid in self.linha_tempo)),
+            }
+        finally:
+            self.trava.release()
+
+    def restaurar(self, estado):
+        """
+        Volta ao estado exportado por outra sessão e devolve a foto do instante em que ele
+        foi gravado (nenhuma consulta ao banco). A próxima atualizar() confere o carimbo:
+        igual, é um acerto; diferente, segue o caminho incremental ou completo de sempre.
+        """
+        with self.trava:
+            self.carimbo = estado["carimbo"]
+            self.ultima_sinc = estado["ultima_sinc"]
+            self.dia = estado["dia"]
+            self.corte_dia = estado["corte_dia"]
+            self.antecipacao = estado["antecipacao"]
+            self.marca_mod = estado["marca_mod"]
+            self.horizonte = estado["horizonte"]
+            self.pendentes = dict(zip(
+                estado["ids"], zip(estado["baralhos"], estado["filas"], estado["vencimentos"])
+            ))
+            self.linha_tempo = list(zip(estado["momentos"], estado["ids_linha_tempo"]))
+            self.momentos = dict(zip(estado["ids_linha_tempo"], estado["momentos"]))
+            self.ultima_foto = None
+            # O estado restaurado substitui o que havia; ele é conferido pelo carimbo
+            self.recontagem_pedida = False
+            self.restauracoes += 1
+            return self._montar_foto(estado["instante"])
+
+    def contar_vencidos(self, col):
+        """Retorna quantos cartões estão vencidos agora (aprendizado + revisão)."""
+        return self.obter_foto(col).total
+
+    def estatisticas(self):
+        return {
+            "acertos": self.acertos,
+            "falhas": self.falhas,
+            "recontagens_completas": self.recontagens_completas,
+            "recontagens_incrementais": self.recontagens_incrementais,
+            "restauracoes": self.restauracoes,
+            "cartoes_em_cache": len(self.pendentes),
+            "cartoes_na_linha_tempo": len(self.linha_tempo),
+        }
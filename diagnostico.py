@@ -0,0 +1,189 @@
+# -------------------------------------------------------------------------
+# Copyright © 2025 Caio Graco Purita. Todos os direitos reservados.
+# ARQUIVO: diagnostico.py
+# -------------------------------------------------------------------------
+import functools
+import json
+import os
+import sys
+import threading
+import time
+from collections import deque
+
+# Nomes dos trechos medidos (usados no diálogo e no JSON exportado)
+TRECHO_CONTAGEM = "contagem"
+TRECHO_RECONTAGEM_COMPLETA = "contagem.recontagem_completa"
+TRECHO_RECONTAGEM_INCREMENTAL = "contagem.recontagem_incremental"
+TRECHO_SINCRONIZACAO = "sincronizacao"
+TRECHO_TELA_INICIAL = "tela_inicial.redesenhar"
+TRECHO_ESCONDER = "bandeja.esconder"
+TRECHO_MOSTRAR = "bandeja.mostrar"
+TRECHO_RELOGIO = "relogio.tick"
+TRECHO_HIBERNAR = "hibernacao.hibernar"
+TRECHO_DESPERTAR = "hibernacao.despertar"
+TRECHO_PREAQUECER_TABELAS = "preaquecimento.tabelas"
+TRECHO_PREAQUECER_ARVORE = "preaquecimento.arvore"
+TRECHO_PREAQUECER_TELA = "preaquecimento.tela_inicial"
+TRECHO_ENCERRAMENTO = "encerramento"
+TRECHO_IMPORTACAO = "addon.importacao"
+
+
+def medir_rss_kib():
+    """Memória residente atual do processo, em KiB (None se a plataforma não informar)."""
+    try:
+        if sys.platform.startswith("linux"):
+            with open("/proc/self/statm", "r") as f:
+                return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") // 1024
+        if sys.platform.startswith("win"):
+            import ctypes
+            from ctypes import wintypes
+
+            class _ContadoresMemoria(ctypes.Structure):
+                _fields_ = [("cb", wintypes.DWORD), ("PageFaultCount", wintypes.DWORD)] + [
+                    (nome, ctypes.c_size_t) for nome in (
+                        "PeakWorkingSetSize", "WorkingSetSize", "QuotaPeakPagedPoolUsage",
+                        "QuotaPagedPoolUsage", "QuotaPeakNonPagedPoolUsage", "QuotaNonPagedPoolUsage",
+                        "PagefileUsage", "PeakPagefileUsage",
+                    )
+                ]
+
+            contadores = _ContadoresMemoria()
+            contadores.cb = ctypes.sizeof(contadores)
+            processo = ctypes.windll.kernel32.GetCurrentProcess()
+            if ctypes.windll.psapi.GetProcessMemoryInfo(processo, ctypes.byref(contadores), contadores.cb):
+                return contadores.WorkingSetSize // 1024
+    except:
+        pass
+    return None
+
+
+class _MedicaoNula:
+    """Contexto vazio devolvido quando o diagnóstico está desligado (custo praticamente zero)."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+
+_MEDICAO_NULA = _MedicaoNula()
+
+
+class _Medicao:
+    def __init__(self, registro, nome):
+        self.registro = registro
+        self.nome = nome
+
+    def __enter__(self):
+        self.inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, *args):
+        self.registro.registrar(self.nome, (time.perf_counter() - self.inicio) * 1000)
+        return False
+
+
+def _percentil(ordenadas, fracao):
+    if not ordenadas:
+        return 0.0
+    indice = min(len(ordenadas) - 1, int(round(fracao * (len(ordenadas) - 1))))
+    return ordenadas[indice]
+
+
+class RegistroTempos:
+    """
+    Guarda a duração dos trechos quentes do add-on em buffers circulares de tamanho fixo
+    (um por trecho). Desligado, 'medir' devolve um contexto vazio e 'medido' só faz
+    uma checagem de atributo antes de chamar a função original.
+    """
+
+    def __init__(self, capacidade=256):
+        self.ativo = False
+        self.capacidade = capacidade
+        self.amostras = {}   # nome -> deque com as últimas durações (ms)
+        self.contagens = {}  # nome -> total de medições desde a ativação
+        self.inicios = {}    # nome -> perf_counter de trechos assíncronos em aberto
+        self.trava = threading.Lock()
+
+    def registrar(self, nome, duracao_ms):
+        with self.trava:
+            fila = self.amostras.get(nome)
+            if fila is None:
+                fila = self.amostras[nome] = deque(maxlen=self.capacidade)
+            fila.append(duracao_ms)
+            self.contagens[nome] = self.contagens.get(nome, 0) + 1
+
+    def medir(self, nome):
+        """Uso: 'with registro_tempos.medir(TRECHO_X): ...'"""
+        if not self.ativo:
+            return _MEDICAO_NULA
+        return _Medicao(self, nome)
+
+    def medido(self, nome):
+        """Decorador equivalente a envolver a função inteira em 'medir(nome)'."""
+        def decorador(funcao):
+            @functools.wraps(funcao)
+            def envoltorio(*args, **kwargs):
+                if not self.ativo:
+                    return funcao(*args, **kwargs)
+                with _Medicao(self, nome):
+                    return funcao(*args, **kwargs)
+            return envoltorio
+        return decorador
+
+    def iniciar(self, nome):
+        """Abre um trecho que termina em outro ponto do código (ex: sincronização)."""
+        if self.ativo:
+            self.inicios[nome] = time.perf_counter()
+
+    def terminar(self, nome):
+        inicio = self.inicios.pop(nome, None)
+        if inicio is not None:
+            self.registrar(nome, (time.perf_counter() - inicio) * 1000)
+
+    def limpar(self):
+        with self.trava:
+            self.amostras = {}
+            self.contagens = {}
+            self.inicios = {}
+
+    def resumo(self, ultimas=20):
+        """Retorna, por trecho: contagem, p50, p95, máximo e as últimas N amostras (ms)."""
+        with self.trava:
+            copia = {nome: list(fila) for nome, fila in self.amostras.items()}
+            contagens = dict(self.contagens)
+        resultado = {}
+        for nome, valores in sorted(copia.items()):
+            ordenadas = sorted(valores)
+            resultado[nome] = {
+                "contagem": contagens.get(nome, 0),
+                "p50_ms": round(_percentil(ordenadas, 0.50), 3),
+                "p95_ms": round(_percentil(ordenadas, 0.95), 3),
+                "max_ms": round(ordenadas[-1], 3) if ordenadas else 0.0,
+                "ultimas_ms": [round(v, 3) for v in valores[-ultimas:]],
+            }
+        return resultado
+
+    def formatar_texto(self):
+        linhas = ["{:<34}{:>8}{:>10}{:>10}{:>10}".format("trecho", "n", "p50 ms", "p95 ms", "max ms")]
+        for nome, dados in self.resumo().items():
+            linhas.append("{:<34}{:>8}{:>10.1f}{:>10.1f}{:>10.1f}".format(
+                nome, dados["contagem"], dados["p50_ms"], dados["p95_ms"], dados["max_ms"]
+            ))
+        return "\n".join(linhas)
+
+    def exportar_json(self, caminho, extras=None):
+        """Grava o resumo num arquivo JSON (formato estável, pensado para painéis externos)."""
+        dados = {
+            "gerado_em": int(time.time()),
+            "capacidade_buffer": self.capacidade,
+            "trechos": self.resumo(ultimas=self.capacidade),
+        }
+        if extras:
+            dados.update(extras)
+        with open(caminho, "w", encoding="utf-8") as f:
+            json.dump(dados, f, ensure_ascii=False, indent=2)
+
+
+registro_tempos = RegistroTempos()
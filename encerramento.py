@@ -0,0 +1,207 @@
+# -------------------------------------------------------------------------
+# Copyright © 2025 Caio Graco Purita. Todos os direitos reservados.
+# ARQUIVO: encerramento.py
+# -------------------------------------------------------------------------
+import json
+import os
+import threading
+import time
+from aqt import mw, gui_hooks
+from aqt.qt import *
+from .lang import tr
+from .configuracao import config_addon
+from .executor import executor
+from .sincronizacao import agendador_sinc
+from .consts import PASTA_USUARIO
+from .diagnostico import registro_tempos, TRECHO_ENCERRAMENTO
+
+# Resultado da última saída pela bandeja, lido no próximo início para reconciliar
+ARQUIVO_ENCERRAMENTO = os.path.join(PASTA_USUARIO, "encerramento.json")
+# Folga do fechamento do Anki além do prazo da sincronização dele ao fechar ('prazo_sinc_saida'):
+# estourado o total, o processo é encerrado à força
+FOLGA_FECHAMENTO_S = 15
+# Espera máxima pelas tarefas do executor (uma contagem em andamento) ao fechar
+ESPERA_EXECUTOR_MS = 1000
+# Atraso da sincronização de reconciliação (deixa o perfil terminar de abrir)
+ATRASO_RECONCILIACAO_MS = 3000
+
+SINC_CONCLUIDA = "concluida"
+SINC_DESNECESSARIA = "desnecessaria"
+SINC_INCOMPLETA = "incompleta"
+
+
+def colecao_alterada():
+    """Verdadeiro se há alterações locais que ainda não subiram (col.mod > col.ls)."""
+    try:
+        modificado, ultima_sinc = mw.col.db.first("SELECT mod, ls FROM col")
+        return modificado > ultima_sinc
+    except:
+        return False
+
+
+def gravar_resultado(dados, caminho=ARQUIVO_ENCERRAMENTO):
+    try:
+        os.makedirs(os.path.dirname(caminho), exist_ok=True)
+        with open(caminho, "w", encoding="utf-8") as f:
+            json.dump(dados, f)
+    except:
+        pass
+
+
+def ler_resultado(caminho=ARQUIVO_ENCERRAMENTO):
+    try:
+        with open(caminho, encoding="utf-8") as f:
+            return json.load(f)
+    except:
+        return None
+
+
+class GerenciadorEncerramento:
+    """
+    Saída pelo menu "Sair Totalmente" com tempo limitado:
+      1. Coleção sem alterações locais: fecha na hora, sem ir à rede.
+      2. Com alterações: sincroniza em segundo plano, com prazo ('prazo_sinc_saida')
+         e contagem regressiva na dica do ícone. Clicar em sair de novo não espera mais.
+      3. Terminada (ou estourada) a sincronização, o resultado é gravado em
+         encerramento.json e o Anki é fechado. Quando o fechamento de fato começa
+         (profile_will_close, já depois das perguntas das janelas abertas), um cão de
+         guarda encerra o processo à força se ele travar por mais de 'prazo_sinc_saida'
+         mais FOLGA_FECHAMENTO_S.
+    No próximo início, uma sincronização incompleta é refeita (ver reconciliar); conta como
+    incompleta a sincronização do Anki (coleção ou mídia) interrompida pelo cão de guarda.
+    """
+
+    def __init__(self):
+        self.em_andamento = False
+        self.finalizado = False
+        self.prazo = 0
+        # Criados só quando a saída precisa esperar uma sincronização
+        self.temporizador_prazo = None
+        self.temporizador_progresso = None
+        self.cao_armado = False
+        # Sincronizações do próprio Anki em andamento (a de fechar o perfil, e a de mídia)
+        self.sinc_anki_ativa = False
+        self.sinc_midia_ativa = False
+        gui_hooks.sync_will_start.append(lambda: setattr(self, "sinc_anki_ativa", True))
+        gui_hooks.sync_did_finish.append(lambda: setattr(self, "sinc_anki_ativa", False))
+        gui_hooks.media_sync_did_start_or_stop.append(lambda rodando: setattr(self, "sinc_midia_ativa", rodando))
+        gui_hooks.profile_will_close.append(self._ao_fechar_perfil)
+
+    def iniciar(self):
+        if self.finalizado:
+            # O fechamento anterior foi cancelado (ex: uma janela com edição não salva)
+            from .tray import gerenciador_bandeja
+            gerenciador_bandeja.fechar_de_verdade()
+            return
+        if self.em_andamento:
+            # Segundo pedido: o usuário não quer esperar a sincronização terminar
+            self._finalizar(SINC_INCOMPLETA)
+            return
+        self.em_andamento = True
+        registro_tempos.iniciar(TRECHO_ENCERRAMENTO)
+        # Uma sincronização da bandeja ainda em debounce não vai mais acontecer
+        agendador_sinc.cancelar_pendente()
+
+        if not mw.col or not colecao_alterada():
+            self._finalizar(SINC_DESNECESSARIA)
+            return
+
+        from .tray import gerenciador_bandeja
+        prazo_s = config_addon.obter("prazo_sinc_saida")
+        self.prazo = time.time() + prazo_s
+        gerenciador_bandeja.mostrar_mensagem(tr("msg_sincronizando_saida"))
+        gerenciador_bandeja.acao_sair.setText(tr("menu_sair_agora"))
+        self.temporizador_prazo = QTimer(mw)
+        self.temporizador_prazo.setSingleShot(True)
+        self.temporizador_prazo.timeout.connect(lambda: self._finalizar(SINC_INCOMPLETA))
+        self.temporizador_progresso = QTimer(mw)
+        self.temporizador_progresso.setInterval(1000)
+        self.temporizador_progresso.timeout.connect(self._mostrar_progresso)
+        self.temporizador_prazo.start(prazo_s * 1000)
+        self.temporizador_progresso.start()
+        self._mostrar_progresso()
+        executor.sincronizar(self._ao_terminar_sincronizacao)
+
+    def _ao_terminar_sincronizacao(self, iniciou):
+        # O Anki só alcança 'ls' >= 'mod' quando as alterações locais subiram
+        concluida = iniciou and not colecao_alterada()
+        self._finalizar(SINC_CONCLUIDA if concluida else SINC_INCOMPLETA)
+
+    def _mostrar_progresso(self):
+        from .tray import gerenciador_bandeja
+        if gerenciador_bandeja.icone_bandeja:
+            restante = max(0, int(self.prazo - time.time()))
+            gerenciador_bandeja.icone_bandeja.setToolTip(tr("dica_saindo").format(restante))
+
+    def _finalizar(self, resultado):
+        if self.finalizado:
+            return
+        self.finalizado = True
+        if self.temporizador_prazo:
+            self.temporizador_prazo.stop()
+            self.temporizador_progresso.stop()
+        registro_tempos.terminar(TRECHO_ENCERRAMENTO)
+
+        try:
+            perfil = mw.pm.name
+        except:
+            perfil = None
+        gravar_resultado({"perfil": perfil, "sincronizacao": resultado, "instante": int(time.time())})
+
+        executor.encerrar(ESPERA_EXECUTOR_MS)
+        from .tray import gerenciador_bandeja
+        gerenciador_bandeja.fechar_de_verdade()
+
+    def _ao_fechar_perfil(self):
+        # Só a nossa saída arma o cão de guarda, e só quando o Anki já está descarregando
+        # o perfil: antes disso o usuário ainda pode cancelar o fechamento
+        if self.finalizado and not self.cao_armado:
+            self.cao_armado = True
+            self._armar_cao_de_guarda()
+
+    def _armar_cao_de_guarda(self):
+        """Uma thread (não um QTimer: o laço do Qt pode ser o que travou) encerra o processo."""
+        def encerrar_a_forca():
+            dados = ler_resultado() or {}
+            dados["fechamento_forcado"] = True
+            dados["sinc_anki_interrompida"] = self.sinc_anki_ativa
+            dados["sinc_midia_interrompida"] = self.sinc_midia_ativa
+            if self.sinc_anki_ativa or self.sinc_midia_ativa:
+                dados["sincronizacao"] = SINC_INCOMPLETA
+            gravar_resultado(dados)
+            os._exit(0)
+
+        limite_s = config_addon.obter("prazo_sinc_saida") + FOLGA_FECHAMENTO_S
+        cao = threading.Timer(limite_s, encerrar_a_forca)
+        cao.daemon = True
+        cao.start()
+
+    def reconciliar(self):
+        """
+        Chamado ao abrir o perfil: se a última saída deixou a sincronização pela metade
+        e ainda há alterações locais, sincroniza assim que o perfil terminar de abrir.
+        """
+        dados = ler_resultado()
+        if not dados or dados.get("sincronizacao") != SINC_INCOMPLETA:
+            return
+        try:
+            if dados.get("perfil") != mw.pm.name:
+                return
+        except:
+            return
+        # Consumido agora: uma nova falha será gravada pela próxima saída
+        dados["sincronizacao"] = SINC_DESNECESSARIA
+        dados["reconciliado_em"] = int(time.time())
+        gravar_resultado(dados)
+        # A mídia interrompida não aparece em col.mod: nesse caso sincroniza mesmo assim
+        midia = dados.get("sinc_midia_interrompida", False)
+        if midia or colecao_alterada():
+            from .tray import gerenciador_bandeja
+            gerenciador_bandeja.mostrar_mensagem(tr("msg_reconciliando"))
+            # O próprio Anki pode ter sincronizado ao abrir: só vai à rede se ainda precisar
+            QTimer.singleShot(
+                ATRASO_RECONCILIACAO_MS, lambda: (midia or colecao_alterada()) and executor.sincronizar()
+            )
+
+
+encerramento = GerenciadorEncerramento()
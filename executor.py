@@ -0,0 +1,167 @@
+# -------------------------------------------------------------------------
+# Copyright © 2025 Caio Graco Purita. Todos os direitos reservados.
+# ARQUIVO: executor.py
+# -------------------------------------------------------------------------
+from concurrent.futures import wait
+from aqt import mw, gui_hooks
+from .diagnostico import registro_tempos, TRECHO_SINCRONIZACAO
+from .perfilador import perfilador
+
+# Chaves das tarefas conhecidas (pedidos com a mesma chave são agrupados)
+TAREFA_CONTAGEM = "contagem"
+TAREFA_SINCRONIZACAO = "sincronizacao"
+TAREFA_INSTANTANEO = "instantaneo"
+
+# Espera máxima pela tarefa em andamento quando o perfil fecha
+ESPERA_ENCERRAMENTO_MS = 1000
+
+
+class ExecutorFundo:
+    """
+    Subsistema único de trabalho em segundo plano do add-on.
+    - Contagens e leituras rodam no pool do próprio Anki (mw.taskman.run_in_background),
+      sobre mw.col: o rslib segura o arquivo da coleção com trava exclusiva, então não há
+      como ler por outra conexão. O resultado volta na thread principal.
+    - Sincronizações usam o fluxo assíncrono do próprio Anki (mw.onSync) e são acompanhadas
+      pelos ganchos sync_will_start / sync_did_finish.
+    - Pedidos repetidos enquanto um igual está em andamento são agrupados: a tarefa roda
+      mais uma única vez no fim e todos os interessados recebem o resultado mais recente.
+    """
+
+    def __init__(self):
+        self.ouvintes_conclusao = []  # ouvinte(chave, resultado), na thread principal
+        self.em_andamento = {}   # chave -> lista de callbacks aguardando o resultado
+        self.repeticoes = {}     # chave -> função a rodar de novo ao terminar
+        self.futuros = {}        # chave -> Future da tarefa rodando no taskman
+        self.geracao = 0         # Avança a cada encerrar(): resultados de antes são descartados
+        self.sinc_iniciada = False
+        gui_hooks.sync_will_start.append(self._ao_iniciar_sincronizacao)
+        gui_hooks.sync_did_finish.append(self._ao_terminar_sincronizacao)
+        # O perfil vai fechar (troca de perfil ou saída do Anki): nada pode ficar lendo a coleção
+        gui_hooks.profile_will_close.append(lambda: self.encerrar(ESPERA_ENCERRAMENTO_MS))
+
+    def ocupado(self, chave):
+        return chave in self.em_andamento
+
+    def enviar(self, chave, funcao, ao_concluir=None):
+        """
+        Agenda 'funcao' em segundo plano. 'ao_concluir(resultado)' roda na thread principal.
+        Retorna False quando o pedido foi agrupado com outro já em andamento.
+        """
+        if chave in self.em_andamento:
+            if ao_concluir: self.em_andamento[chave].append(ao_concluir)
+            self.repeticoes[chave] = funcao
+            return False
+
+        self.em_andamento[chave] = [ao_concluir] if ao_concluir else []
+        self._iniciar(chave, funcao)
+        return True
+
+    def _iniciar(self, chave, funcao):
+        # Entra na captura de desempenho quando ela está ligada (modo cProfile)
+        geracao = self.geracao
+        # Uma tarefa rápida pode terminar antes de run_in_background retornar, e aí o taskman
+        # entrega o on_done ali mesmo: a marca ocupa o lugar do Future até ele existir
+        marca = object()
+        self.futuros[chave] = marca
+        futuro = mw.taskman.run_in_background(
+            lambda: perfilador.executar(funcao),
+            lambda futuro: self._ao_terminar_tarefa(chave, futuro, geracao, marca)
+        )
+        if self.futuros.get(chave) is marca:
+            self.futuros[chave] = futuro
+
+    def _ao_terminar_tarefa(self, chave, futuro, geracao, marca):
+        """Roda na thread principal (o taskman entrega o on_done nela)."""
+        atual = self.futuros.get(chave)
+        if atual is not futuro and atual is not marca:
+            return  # Tarefa já liberada pelo encerrar()
+        del self.futuros[chave]
+        try:
+            resultado, erro = futuro.result(), None
+        except Exception as e:
+            resultado, erro = None, e
+        if geracao != self.geracao:
+            # Começou antes de um encerrar(): leu a coleção de antes, o resultado não serve
+            resultado, erro = None, RuntimeError("tarefa de antes do encerramento")
+        funcao = self.repeticoes.pop(chave, None)
+        if funcao is not None:
+            # Chegaram pedidos durante a execução: o resultado atual já está velho
+            self._iniciar(chave, funcao)
+            return
+        self._entregar(chave, resultado, erro)
+
+    def _entregar(self, chave, resultado, erro=None):
+        callbacks = self.em_andamento.pop(chave, [])
+        if erro is not None:
+            return
+        for callback in callbacks:
+            try:
+                callback(resultado)
+            except:
+                pass
+        for ouvinte in list(self.ouvintes_conclusao):
+            try:
+                ouvinte(chave, resultado)
+            except:
+                pass
+
+    def encerrar(self, espera_ms):
+        """
+        Descarta as repetições pendentes e espera no máximo 'espera_ms' pelas tarefas que
+        estão rodando. Retorna False se alguma não terminou a tempo.
+        """
+        self.repeticoes.clear()
+        self.geracao += 1
+        terminou = not wait(list(self.futuros.values()), timeout=espera_ms / 1000).not_done
+        # Quem esperava por tarefas descartadas não será chamado; a sincronização é do Anki
+        for chave in list(self.em_andamento):
+            if chave == TAREFA_SINCRONIZACAO:
+                continue
+            futuro = self.futuros.get(chave)
+            if futuro is None or futuro.done():
+                self.em_andamento.pop(chave)
+                self.futuros.pop(chave, None)
+            else:
+                # Ainda rodando: a chave segue ocupada até ela terminar (nada roda em dobro),
+                # e o resultado dela é descartado pela geração
+                self.em_andamento[chave] = []
+        return terminou
+
+    # --- Sincronização ---
+
+    def sincronizar(self, ao_concluir=None):
+        """
+        Dispara a sincronização do Anki sem bloquear a interface.
+        'ao_concluir(iniciou)' recebe False se o Anki recusou iniciar (ex: sem login).
+        """
+        if TAREFA_SINCRONIZACAO in self.em_andamento:
+            if ao_concluir: self.em_andamento[TAREFA_SINCRONIZACAO].append(ao_concluir)
+            return False
+
+        self.em_andamento[TAREFA_SINCRONIZACAO] = [ao_concluir] if ao_concluir else []
+        self.sinc_iniciada = False
+        try:
+            mw.onSync()
+        except:
+            pass
+
+        # O gancho sync_will_start é chamado dentro de mw.onSync; se não veio, nada foi iniciado
+        if not self.sinc_iniciada:
+            self._entregar(TAREFA_SINCRONIZACAO, False)
+        return True
+
+    def _ao_iniciar_sincronizacao(self):
+        self.sinc_iniciada = True
+        registro_tempos.iniciar(TRECHO_SINCRONIZACAO)
+        if TAREFA_SINCRONIZACAO not in self.em_andamento:
+            # Sincronização iniciada pelo próprio Anki: agrupa pedidos nossos que cheguem agora
+            self.em_andamento[TAREFA_SINCRONIZACAO] = []
+
+    def _ao_terminar_sincronizacao(self):
+        self.sinc_iniciada = False
+        registro_tempos.terminar(TRECHO_SINCRONIZACAO)
+        self._entregar(TAREFA_SINCRONIZACAO, True)
+
+
+executor = ExecutorFundo()
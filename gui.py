@@ -2,181 +2,68 @@
 # Copyright © 2025 Caio Graco Purita. Todos os direitos reservados.
 # ARQUIVO: gui.py
 # -------------------------------------------------------------------------
-import sys
-import os
-import subprocess
-import winreg
 from aqt import mw
 from aqt.qt import *
-from aqt.utils import showWarning
+from aqt.utils import showWarning, showInfo
 from .lang import tr
 from .consts import *
-from .notifications import notificador
+from .configuracao import config_addon
+from .inicio_sistema import obter_backend
+from .diagnostico import registro_tempos
+from .hibernacao import hibernacao
+from .perfilador import perfilador
 
 class StartupManager:
     """
-    Gerencia a criação do atalho na pasta de inicialização do Windows.
-    Utiliza um Wrapper VBS para garantir a minimização correta no boot.
+    Gerencia o início automático do Anki junto com o sistema.
+    O trabalho real fica no backend da plataforma (ver inicio_sistema.py):
+    atalho + VBS no Windows, arquivo .desktop no Linux.
     """
-    
-    SHORTCUT_NAME = "AnkiTrayPro_AutoStart.lnk"
-    VBS_NAME = "run_minimized.vbs"
-
-    @staticmethod
-    def _obter_pasta_startup_real():
-        try:
-            chave_shell = r"Software\Microsoft\Windows\CurrentVersion\Explorer\User Shell Folders"
-            with winreg.OpenKey(winreg.HKEY_CURRENT_USER, chave_shell) as key:
-                caminho_bruto, tipo = winreg.QueryValueEx(key, "Startup")
-                return os.path.expandvars(caminho_bruto)
-        except:
-            return os.path.join(os.getenv('APPDATA'), r'Microsoft\Windows\Start Menu\Programs\Startup')
-
-    @staticmethod
-    def _obter_caminho_atalho():
-        return os.path.join(StartupManager._obter_pasta_startup_real(), StartupManager.SHORTCUT_NAME)
 
     @staticmethod
     def esta_no_inicio():
-        return os.path.exists(StartupManager._obter_caminho_atalho())
+        backend = obter_backend()
+        return bool(backend and backend.esta_ativo())
 
     @staticmethod
     def _obter_executavel_anki():
-        caminho_atual = os.path.abspath(sys.executable)
-        
-        # 1. Pastas Padrão
-        locais = []
-        if os.getenv('LOCALAPPDATA'):
-            locais.append(os.path.join(os.getenv('LOCALAPPDATA'), r"Programs\Anki\anki.exe"))
-        if os.getenv('ProgramFiles'):
-            locais.append(os.path.join(os.getenv('ProgramFiles'), r"Anki\anki.exe"))
-        if os.getenv('ProgramFiles(x86)'):
-            locais.append(os.path.join(os.getenv('ProgramFiles(x86)'), r"Anki\anki.exe"))
-
-        for path in locais:
-            if os.path.exists(path):
-                return path
-
-        # 2. Registro
-        try:
-            chave = r"Software\Microsoft\Windows\CurrentVersion\Uninstall\Anki"
-            for hkey in [winreg.HKEY_CURRENT_USER, winreg.HKEY_LOCAL_MACHINE]:
-                try:
-                    with winreg.OpenKey(hkey, chave) as key:
-                        pasta, _ = winreg.QueryValueEx(key, "InstallLocation")
-                        exe = os.path.join(pasta, "anki.exe")
-                        if os.path.exists(exe):
-                            return exe
-                except: pass
-        except: pass
-
-        return caminho_atual
-
-    @staticmethod
-    def _gerar_script_wrapper(caminho_anki):
-        """
-        Cria o script VBS intermediário que injeta a variável de ambiente.
-        """
-        try:
-            base_dir = os.path.dirname(__file__)
-            vbs_path = os.path.join(base_dir, StartupManager.VBS_NAME)
-            
-            conteudo_vbs = f"""
-            Set oShell = CreateObject("WScript.Shell")
-            oShell.Environment("PROCESS")("ANKI_TRAY_STARTUP") = "1"
-            oShell.Run "{caminho_anki}", 1, False
-            """
-            
-            with open(vbs_path, "w", encoding="utf-8") as f:
-                f.write(conteudo_vbs)
-            
-            return vbs_path
-        except Exception as e:
-            raise e
+        return obter_backend().obter_executavel()
 
     @staticmethod
     def verificar_integridade():
-        """
-        Método de Auto-Cura:
-        Verifica se o arquivo run_minimized.vbs existe.
-        Se não existir (foi apagado ou é instalação nova), recria ele imediatamente.
-        """
-        try:
-            base_dir = os.path.dirname(__file__)
-            vbs_path = os.path.join(base_dir, StartupManager.VBS_NAME)
-            
-            # Se o arquivo sumiu, recria
-            if not os.path.exists(vbs_path):
-                exe_anki = StartupManager._obter_executavel_anki()
-                StartupManager._gerar_script_wrapper(exe_anki)
-        except:
-            pass
+        backend = obter_backend()
+        if backend:
+            backend.verificar_integridade()
 
     @staticmethod
-    def criar_atalho(caminho_exe, caminho_link, iniciar_minimizado):
+    def definir_inicio(ativar, iniciar_minimizado, leve=False):
+        backend = obter_backend()
+        if not backend:
+            return
         try:
-            pasta_link = os.path.dirname(caminho_link)
-            if not os.path.exists(pasta_link):
-                os.makedirs(pasta_link)
-
-            if iniciar_minimizado:
-                alvo_final = StartupManager._gerar_script_wrapper(caminho_exe)
-                target = os.path.join(os.getenv('SystemRoot'), "System32", "wscript.exe")
-                args = f'""{alvo_final}""'
-                icon = caminho_exe 
-                desc = "Anki Tray Pro (Minimizado)"
-                window_style = 7 
-            else:
-                target = caminho_exe
-                args = "" if "python" not in os.path.basename(caminho_exe).lower() else "-m aqt"
-                icon = target
-                desc = "Iniciado automaticamente pelo Anki Tray Pro"
-                window_style = 1
-
-            script_gen = f"""
-            Set oWS = WScript.CreateObject("WScript.Shell")
-            Set oLink = oWS.CreateShortcut("{caminho_link}")
-            oLink.TargetPath = "{target}"
-            oLink.Arguments = "{args}"
-            oLink.IconLocation = "{icon},0"
-            oLink.WindowStyle = {window_style}
-            oLink.Description = "{desc}"
-            oLink.Save
-            """
-            
-            gen_path = os.path.join(os.getenv('TEMP'), "anki_shortcut_gen.vbs")
-            with open(gen_path, "w", encoding="utf-8") as file:
-                file.write(script_gen)
-            
-            cscript = os.path.join(os.getenv('SystemRoot'), "System32", "cscript.exe")
-            subprocess.run([cscript, '//Nologo', gen_path], check=True, creationflags=0x08000000)
-            
-            if os.path.exists(gen_path):
-                os.remove(gen_path)
-
+            # Não faz nada se o sistema já estiver no estado pedido
+            backend.aplicar(ativar, iniciar_minimizado, leve)
         except Exception as e:
-            raise e
+            showWarning(f"Erro ao configurar inicialização:\n{str(e)}")
 
     @staticmethod
-    def definir_inicio(ativar, iniciar_minimizado):
-        try:
-            caminho_atalho = StartupManager._obter_caminho_atalho()
-            
-            if ativar:
-                exe_alvo = StartupManager._obter_executavel_anki()
-                StartupManager.criar_atalho(exe_alvo, caminho_atalho, iniciar_minimizado)
-            else:
-                if os.path.exists(caminho_atalho):
-                    os.remove(caminho_atalho)
-                    
-        except Exception as e:
-            showWarning(f"Erro ao configurar inicialização:\n{str(e)}")
+    def ao_alterar_config(alteradas):
+        """Reaplica o atalho de inicialização quando as opções de boot mudam."""
+        StartupManager.definir_inicio(
+            config_addon.obter("iniciar_com_sistema"),
+            config_addon.obter("iniciar_minimizado"),
+            config_addon.obter("notificador_leve")
+        )
 
 class DialogoConfiguracoes(QDialog):
     def __init__(self):
         super().__init__(mw)
         self.setWindowTitle(tr("nome_menu"))
-        self.configuracao = mw.addonManager.getConfig(__name__)
+        # Alinha a memória com o estado real do atalho, para que a comparação
+        # feita ao salvar reflita o que o usuário realmente alterou. Nada é gravado
+        # aqui: o config.json só muda no OK (ao_clicar_ok)
+        config_addon.ajustar_em_memoria({"iniciar_com_sistema": StartupManager.esta_no_inicio()})
+        self.configuracao = config_addon.copia()
         self.configurar_interface()
 
     def configurar_interface(self):
@@ -190,6 +77,15 @@ class DialogoConfiguracoes(QDialog):
         indice_atual = self.combo_fechar.findData(self.configuracao.get("acao_ao_fechar"))
         self.combo_fechar.setCurrentIndex(indice_atual)
         formulario_comp.addRow(tr("lbl_fechar"), self.combo_fechar)
+        self.check_hibernar = QCheckBox(tr("chk_hibernar"))
+        self.check_hibernar.setChecked(self.configuracao.get("hibernar_na_bandeja"))
+        self.spin_hibernar = QSpinBox()
+        self.spin_hibernar.setRange(1, 1440)
+        self.spin_hibernar.setValue(self.configuracao.get("minutos_para_hibernar"))
+        self.spin_hibernar.setEnabled(self.check_hibernar.isChecked())
+        self.check_hibernar.toggled.connect(self.spin_hibernar.setEnabled)
+        formulario_comp.addRow(self.check_hibernar)
+        formulario_comp.addRow(tr("lbl_minutos_hibernar"), self.spin_hibernar)
         grupo_comportamento.setLayout(formulario_comp)
         layout_principal.addWidget(grupo_comportamento)
 
@@ -198,19 +94,33 @@ class DialogoConfiguracoes(QDialog):
         self.check_sincronizar = QCheckBox(tr("chk_sincronizar"))
         self.check_sincronizar.setChecked(self.configuracao.get("sincronizar_na_bandeja"))
         layout_sinc.addWidget(self.check_sincronizar)
+        formulario_prazo = QFormLayout()
+        self.spin_prazo_saida = QSpinBox()
+        self.spin_prazo_saida.setRange(5, 600)
+        self.spin_prazo_saida.setValue(self.configuracao.get("prazo_sinc_saida"))
+        formulario_prazo.addRow(tr("lbl_prazo_saida"), self.spin_prazo_saida)
+        layout_sinc.addLayout(formulario_prazo)
         grupo_sinc.setLayout(layout_sinc)
         layout_principal.addWidget(grupo_sinc)
 
         grupo_inicio = QGroupBox(tr("grupo_inicio"))
         layout_inicio = QVBoxLayout()
         self.check_iniciar_sistema = QCheckBox(tr("chk_iniciar_sistema"))
-        self.check_iniciar_sistema.setChecked(StartupManager.esta_no_inicio())
+        self.check_iniciar_sistema.setChecked(self.configuracao.get("iniciar_com_sistema"))
         self.check_iniciar_min = QCheckBox(tr("chk_inicio_min"))
         self.check_iniciar_min.setChecked(self.configuracao.get("iniciar_minimizado"))
         self.check_iniciar_min.setEnabled(self.check_iniciar_sistema.isChecked())
+        self.check_notificador_leve = QCheckBox(tr("chk_notificador_leve"))
+        self.check_notificador_leve.setChecked(self.configuracao.get("notificador_leve"))
+        self.check_notificador_leve.setEnabled(self.check_iniciar_min.isChecked())
         self.check_iniciar_sistema.toggled.connect(self.ao_alternar_inicio_sistema)
+        self.check_iniciar_min.toggled.connect(self.check_notificador_leve.setEnabled)
         layout_inicio.addWidget(self.check_iniciar_sistema)
         layout_inicio.addWidget(self.check_iniciar_min)
+        layout_inicio.addWidget(self.check_notificador_leve)
+        self.check_preaquecer = QCheckBox(tr("chk_preaquecer"))
+        self.check_preaquecer.setChecked(self.configuracao.get("preaquecer_apos_boot"))
+        layout_inicio.addWidget(self.check_preaquecer)
         grupo_inicio.setLayout(layout_inicio)
         layout_principal.addWidget(grupo_inicio)
 
@@ -221,11 +131,25 @@ class DialogoConfiguracoes(QDialog):
         self.spin_intervalo = QSpinBox()
         self.spin_intervalo.setRange(1, 1440)
         self.spin_intervalo.setValue(self.configuracao.get("intervalo_notificacao"))
+        self.check_outros_perfis = QCheckBox(tr("chk_outros_perfis"))
+        self.check_outros_perfis.setChecked(self.configuracao.get("vigiar_outros_perfis"))
         formulario_notificacao.addRow(self.check_ativar_notif)
         formulario_notificacao.addRow(tr("lbl_intervalo"), self.spin_intervalo)
+        formulario_notificacao.addRow(self.check_outros_perfis)
         grupo_notificacao.setLayout(formulario_notificacao)
         layout_principal.addWidget(grupo_notificacao)
 
+        grupo_diagnostico = QGroupBox(tr("grupo_diagnostico"))
+        layout_diagnostico = QHBoxLayout()
+        self.check_diagnostico = QCheckBox(tr("chk_diagnostico"))
+        self.check_diagnostico.setChecked(self.configuracao.get("diagnostico_ativado"))
+        botao_diagnostico = QPushButton(tr("btn_ver_diagnostico"))
+        botao_diagnostico.clicked.connect(mostrar_diagnostico)
+        layout_diagnostico.addWidget(self.check_diagnostico)
+        layout_diagnostico.addWidget(botao_diagnostico)
+        grupo_diagnostico.setLayout(layout_diagnostico)
+        layout_principal.addWidget(grupo_diagnostico)
+
         botoes = QDialogButtonBox.StandardButton.Ok | QDialogButtonBox.StandardButton.Cancel
         caixa_botoes = QDialogButtonBox(botoes)
         caixa_botoes.accepted.connect(self.ao_clicar_ok)
@@ -240,20 +164,129 @@ class DialogoConfiguracoes(QDialog):
 
     def ao_clicar_ok(self):
         self.configuracao["acao_ao_fechar"] = self.combo_fechar.currentData()
+        self.configuracao["hibernar_na_bandeja"] = self.check_hibernar.isChecked()
+        self.configuracao["minutos_para_hibernar"] = self.spin_hibernar.value()
         self.configuracao["sincronizar_na_bandeja"] = self.check_sincronizar.isChecked()
+        self.configuracao["prazo_sinc_saida"] = self.spin_prazo_saida.value()
+        self.configuracao["iniciar_com_sistema"] = self.check_iniciar_sistema.isChecked()
         self.configuracao["iniciar_minimizado"] = self.check_iniciar_min.isChecked()
+        self.configuracao["notificador_leve"] = self.check_notificador_leve.isChecked()
+        self.configuracao["preaquecer_apos_boot"] = self.check_preaquecer.isChecked()
         self.configuracao["notificacoes_ativadas"] = self.check_ativar_notif.isChecked()
         self.configuracao["intervalo_notificacao"] = self.spin_intervalo.value()
-        mw.addonManager.writeConfig(__name__, self.configuracao)
-        
-        StartupManager.definir_inicio(
-            self.check_iniciar_sistema.isChecked(),
-            self.check_iniciar_min.isChecked()
-        )
-        
-        notificador.iniciar_temporizador()
+        self.configuracao["vigiar_outros_perfis"] = self.check_outros_perfis.isChecked()
+        self.configuracao["diagnostico_ativado"] = self.check_diagnostico.isChecked()
+
+        # Grava e avisa apenas quem depende das chaves alteradas
+        # (relógio de notificações, atalho de inicialização)
+        config_addon.definir(self.configuracao)
         self.accept()
 
+class DialogoDiagnostico(QDialog):
+    """Mostra os tempos medidos pelo registro_tempos e permite exportá-los em JSON."""
+
+    def __init__(self, pai=None):
+        super().__init__(pai or mw)
+        self.setWindowTitle(tr("titulo_diagnostico"))
+        self.resize(640, 400)
+
+        layout = QVBoxLayout()
+        self.texto = QPlainTextEdit()
+        self.texto.setReadOnly(True)
+        self.texto.setFont(QFontDatabase.systemFont(QFontDatabase.SystemFont.FixedFont))
+        layout.addWidget(self.texto)
+
+        # Captura de desempenho (cProfile ou amostragem) para o usuário nos enviar
+        linha_captura = QHBoxLayout()
+        linha_captura.addWidget(QLabel(tr("lbl_modo_captura")))
+        self.combo_modo = QComboBox()
+        self.combo_modo.addItem(tr("opcao_amostragem"), MODO_AMOSTRAGEM)
+        self.combo_modo.addItem(tr("opcao_cprofile"), MODO_DETERMINISTICO)
+        self.combo_modo.setCurrentIndex(self.combo_modo.findData(config_addon.obter("modo_perfilador")))
+        self.combo_modo.currentIndexChanged.connect(
+            lambda indice: config_addon.definir({"modo_perfilador": self.combo_modo.itemData(indice)})
+        )
+        linha_captura.addWidget(self.combo_modo)
+        self.botao_captura = QPushButton()
+        self.botao_captura.clicked.connect(self.alternar_captura)
+        linha_captura.addWidget(self.botao_captura)
+        linha_captura.addStretch()
+        layout.addLayout(linha_captura)
+        perfilador.ouvintes_estado.append(self._ao_alterar_captura)
+        self._ao_alterar_captura(perfilador.ativo)
+
+        linha_botoes = QHBoxLayout()
+        for chave, acao in (
+            ("btn_atualizar", self.atualizar),
+            ("btn_limpar", self.limpar),
+            ("btn_exportar_json", self.exportar),
+        ):
+            botao = QPushButton(tr(chave))
+            botao.clicked.connect(acao)
+            linha_botoes.addWidget(botao)
+        linha_botoes.addStretch()
+        botao_fechar = QPushButton(tr("btn_fechar"))
+        botao_fechar.clicked.connect(self.accept)
+        linha_botoes.addWidget(botao_fechar)
+        layout.addLayout(linha_botoes)
+
+        self.setLayout(layout)
+        self.atualizar()
+
+    def _estatisticas_extras(self):
+        from .notifications import notificador
+        return {
+            "cache_contagem": notificador.estatisticas_cache(),
+            "hibernacao": hibernacao.estatisticas(),
+            "regras_notificacao": notificador.motor_regras.estatisticas(),
+        }
+
+    def atualizar(self):
+        texto = registro_tempos.formatar_texto()
+        if not registro_tempos.ativo:
+            texto = tr("msg_diagnostico_desligado") + "\n\n" + texto
+        for secao, extras in self._estatisticas_extras().items():
+            texto += f"\n\n[{secao}]\n" + "\n".join(f"{chave}: {valor}" for chave, valor in extras.items())
+        self.texto.setPlainText(texto)
+
+    def limpar(self):
+        registro_tempos.limpar()
+        self.atualizar()
+
+    def alternar_captura(self):
+        if perfilador.ativo:
+            caminho = perfilador.parar()
+            showInfo(tr("msg_captura_salva").format(caminho), parent=self)
+        else:
+            perfilador.iniciar(self.combo_modo.currentData())
+
+    def _ao_alterar_captura(self, ativo):
+        self.botao_captura.setText(tr("btn_parar_captura") if ativo else tr("btn_iniciar_captura"))
+        self.combo_modo.setEnabled(not ativo)
+
+    def done(self, resultado):
+        perfilador.ouvintes_estado.remove(self._ao_alterar_captura)
+        super().done(resultado)
+
+    def exportar(self):
+        caminho, _ = QFileDialog.getSaveFileName(
+            self, tr("btn_exportar_json"), "anki_tray_pro_diagnostico.json", "JSON (*.json)"
+        )
+        if not caminho:
+            return
+        try:
+            registro_tempos.exportar_json(caminho, self._estatisticas_extras())
+        except Exception as e:
+            showWarning(str(e))
+
+config_addon.assinar(
+    ["iniciar_com_sistema", "iniciar_minimizado", "notificador_leve"], StartupManager.ao_alterar_config
+)
+
+def mostrar_diagnostico():
+    dialogo = DialogoDiagnostico()
+    dialogo.exec()
+
 def mostrar_configuracoes():
     dialogo = DialogoConfiguracoes()
     dialogo.exec()
\ No newline at end of file
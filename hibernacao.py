@@ -0,0 +1,143 @@
+# -------------------------------------------------------------------------
+# Copyright © 2025 Caio Graco Purita. Todos os direitos reservados.
+# ARQUIVO: hibernacao.py
+# -------------------------------------------------------------------------
+import gc
+import sys
+import time
+from aqt import mw
+from aqt.qt import *
+from .configuracao import config_addon
+from .diagnostico import registro_tempos, medir_rss_kib, TRECHO_HIBERNAR, TRECHO_DESPERTAR
+
+# Webviews da janela principal que ficam carregadas enquanto o Anki está na bandeja
+WEBVIEWS_PRINCIPAIS = ("web", "toolbarWeb", "bottomWeb")
+
+
+def devolver_memoria_ao_sistema():
+    """Pede ao alocador/sistema que devolva as páginas livres (senão o RSS não cai)."""
+    try:
+        import ctypes
+        if sys.platform.startswith("linux"):
+            ctypes.CDLL("libc.so.6").malloc_trim(0)
+        elif sys.platform.startswith("win"):
+            kernel32 = ctypes.windll.kernel32
+            kernel32.GetCurrentProcess.restype = ctypes.c_void_p
+            kernel32.SetProcessWorkingSetSize.argtypes = [ctypes.c_void_p, ctypes.c_size_t, ctypes.c_size_t]
+            kernel32.SetProcessWorkingSetSize(kernel32.GetCurrentProcess(), ctypes.c_size_t(-1), ctypes.c_size_t(-1))
+    except:
+        pass
+
+
+class GerenciadorHibernacao:
+    """
+    Modo opcional para longas estadias na bandeja: depois de 'minutos_para_hibernar'
+    escondido, descarta as páginas das webviews, solta os caches do SQLite e força a
+    coleta de lixo. Tudo é reconstruído sob demanda quando a janela volta (mostrar_janela).
+    O RSS antes/depois e o tempo de despertar ficam em 'ultimo_ciclo' (ver Diagnóstico).
+    """
+
+    def __init__(self):
+        self.temporizador = None
+        self.hibernado = False
+        self.paginas_descartadas = []
+        self.ultimo_ciclo = {}
+
+    def armar(self):
+        """Chamado ao esconder: agenda a hibernação se a opção estiver ligada."""
+        if not config_addon.obter("hibernar_na_bandeja"):
+            return
+        if self.temporizador is None:
+            self.temporizador = QTimer(mw)
+            self.temporizador.setSingleShot(True)
+            self.temporizador.timeout.connect(self.hibernar)
+        self.temporizador.start(config_addon.obter("minutos_para_hibernar") * 60 * 1000)
+
+    def cancelar(self):
+        if self.temporizador:
+            self.temporizador.stop()
+
+    @registro_tempos.medido(TRECHO_HIBERNAR)
+    def hibernar(self):
+        if self.hibernado or mw.isVisible():
+            return
+        rss_antes = medir_rss_kib()
+
+        self._descartar_webviews()
+
+        # Cache de páginas da conexão do Anki
+        try:
+            if mw.col:
+                mw.col.db.execute("PRAGMA shrink_memory")
+        except:
+            pass
+
+        gc.collect()
+        devolver_memoria_ao_sistema()
+
+        self.hibernado = True
+        rss_depois = medir_rss_kib()
+        self.ultimo_ciclo = {
+            "hibernou_em": int(time.time()),
+            "rss_antes_kib": rss_antes,
+            "rss_depois_kib": rss_depois,
+            "liberado_kib": rss_antes - rss_depois if rss_antes and rss_depois else None,
+            "paginas_descartadas": len(self.paginas_descartadas),
+        }
+
+    def _descartar_webviews(self):
+        """Descarta as páginas (o processo de renderização libera DOM, imagens e JS)."""
+        for nome in WEBVIEWS_PRINCIPAIS:
+            try:
+                pagina = getattr(mw, nome).page()
+                # Só páginas ocultas podem ser descartadas; com a janela escondida, todas estão
+                pagina.setLifecycleState(pagina.LifecycleState.Discarded)
+                self.paginas_descartadas.append(pagina)
+            except:
+                pass
+
+    def despertar(self, redesenhar_tela=True):
+        """
+        Reconstrói o que foi descarregado. Retorna True se a interface foi redesenhada
+        aqui (quem chamou não precisa redesenhar de novo). Sem 'redesenhar_tela', só a
+        barra superior é desenhada (quem chamou vai trocar de tela em seguida).
+        """
+        self.cancelar()
+        if not self.hibernado:
+            return False
+        self.hibernado = False
+        with registro_tempos.medir(TRECHO_DESPERTAR):
+            inicio = time.perf_counter()
+            for pagina in self.paginas_descartadas:
+                try:
+                    pagina.setLifecycleState(pagina.LifecycleState.Active)
+                except:
+                    pass
+            self.paginas_descartadas = []
+            self._redesenhar(redesenhar_tela)
+            self.ultimo_ciclo["despertar_ms"] = round((time.perf_counter() - inicio) * 1000, 1)
+        return True
+
+    def _redesenhar(self, redesenhar_tela=True):
+        try:
+            mw.toolbar.draw()
+        except:
+            pass
+        if not redesenhar_tela:
+            return
+        try:
+            if mw.state == "deckBrowser":
+                mw.deckBrowser.refresh()
+            elif mw.state == "overview":
+                mw.overview.refresh()
+        except:
+            pass
+
+    def estatisticas(self):
+        dados = dict(self.ultimo_ciclo)
+        dados["hibernado"] = self.hibernado
+        dados["rss_atual_kib"] = medir_rss_kib()
+        return dados
+
+
+hibernacao = GerenciadorHibernacao()
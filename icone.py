@@ -0,0 +1,79 @@
+# -------------------------------------------------------------------------
+# Copyright © 2025 Caio Graco Purita. Todos os direitos reservados.
+# ARQUIVO: icone.py
+# -------------------------------------------------------------------------
+from collections import OrderedDict
+from aqt.qt import *
+
+# Tamanho lógico do ícone da bandeja (multiplicado pela escala de DPI)
+TAMANHO_ICONE = 32
+# Acima disso o selo mostra "99+"
+LIMITE_SELO = 99
+
+
+def texto_do_selo(contagem):
+    if contagem <= 0:
+        return ""
+    return str(contagem) if contagem <= LIMITE_SELO else f"{LIMITE_SELO}+"
+
+
+def renderizar_icone_com_selo(icone_base, texto, escuro, escala):
+    """Desenha o ícone do Anki com um selo redondo no canto inferior direito."""
+    lado = int(TAMANHO_ICONE * escala)
+    pixmap = icone_base.pixmap(lado, lado)
+    if not texto:
+        return QIcon(pixmap)
+
+    pixmap = QPixmap(pixmap)
+    pintor = QPainter(pixmap)
+    pintor.setRenderHint(QPainter.RenderHint.Antialiasing)
+
+    altura_selo = int(lado * 0.6)
+    largura_selo = max(altura_selo, int(altura_selo * (0.45 + 0.3 * len(texto))))
+    retangulo = QRect(lado - largura_selo, lado - altura_selo, largura_selo, altura_selo)
+
+    # Contorno na cor do fundo da bandeja para o selo não se misturar ao ícone
+    pintor.setPen(QPen(QColor("#1e1e1e" if escuro else "#ffffff"), max(1, int(escala))))
+    pintor.setBrush(QColor("#e53935"))
+    pintor.drawRoundedRect(retangulo, altura_selo / 2, altura_selo / 2)
+
+    fonte = pintor.font()
+    fonte.setBold(True)
+    fonte.setPixelSize(int(altura_selo * (0.75 if len(texto) == 1 else 0.6)))
+    pintor.setFont(fonte)
+    pintor.setPen(QColor("#ffffff"))
+    pintor.drawText(retangulo, Qt.AlignmentFlag.AlignCenter, texto)
+    pintor.end()
+
+    return QIcon(pixmap)
+
+
+class CacheIcones:
+    """
+    Cache LRU pequeno dos ícones já desenhados, indexado por (texto do selo, tema, escala).
+    Ticks que voltam a uma contagem já vista reaproveitam o QIcon sem repintar.
+    """
+
+    def __init__(self, capacidade=16):
+        self.capacidade = capacidade
+        self.icones = OrderedDict()
+        self.acertos = 0
+        self.falhas = 0
+
+    def obter(self, icone_base, contagem, escuro, escala):
+        chave = (texto_do_selo(contagem), escuro, escala)
+        icone = self.icones.get(chave)
+        if icone is not None:
+            self.acertos += 1
+            self.icones.move_to_end(chave)
+            return icone
+
+        self.falhas += 1
+        icone = renderizar_icone_com_selo(icone_base, chave[0], escuro, escala)
+        self.icones[chave] = icone
+        if len(self.icones) > self.capacidade:
+            self.icones.popitem(last=False)
+        return icone
+
+    def limpar(self):
+        self.icones.clear()
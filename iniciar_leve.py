@@ -0,0 +1,75 @@
+# -------------------------------------------------------------------------
+# Copyright © 2025 Caio Graco Purita. Todos os direitos reservados.
+# ARQUIVO: iniciar_leve.py
+# -------------------------------------------------------------------------
+"""
+Script chamado pelo atalho de inicialização no modo leve:
+    <python do Anki> iniciar_leve.py --anki <executável do Anki>
+
+Não é carregado pelo Anki (ele só importa o __init__.py do add-on). Prepara os
+módulos do add-on sem executar o __init__.py e entrega o controle ao notificador_leve.
+"""
+import importlib.util
+import os
+import sys
+import types
+
+PASTA_ADDON = os.path.dirname(os.path.abspath(__file__))
+NOME_PACOTE = "ankitraypro_leve"
+
+
+def _procurar_icone_anki():
+    """Ícone do Anki instalado (aqt/data/qt/icons/anki.png), localizado sem importar o aqt."""
+    try:
+        spec = importlib.util.find_spec("aqt")
+        caminho = os.path.join(os.path.dirname(spec.origin), "data", "qt", "icons", "anki.png")
+        if os.path.exists(caminho):
+            return caminho
+    except:
+        pass
+    return None
+
+
+def _registrar_modulos():
+    """
+    O pacote do add-on é registrado sem rodar o __init__.py (que depende do Anki aberto).
+    'aqt.qt' no Anki é só um reexport do PyQt6; registramos o mesmo reexport para que
+    icone.py e instancia.py funcionem sem importar o pacote 'aqt' (que carregaria o Anki inteiro).
+    """
+    from PyQt6 import QtCore, QtGui, QtNetwork, QtWidgets
+
+    modulo_qt = types.ModuleType("aqt.qt")
+    for origem in (QtCore, QtGui, QtWidgets, QtNetwork):
+        for nome in dir(origem):
+            if not nome.startswith("_"):
+                setattr(modulo_qt, nome, getattr(origem, nome))
+    modulo_aqt = types.ModuleType("aqt")
+    modulo_aqt.__path__ = []
+    modulo_aqt.qt = modulo_qt
+    sys.modules["aqt"] = modulo_aqt
+    sys.modules["aqt.qt"] = modulo_qt
+
+    pacote = types.ModuleType(NOME_PACOTE)
+    pacote.__path__ = [PASTA_ADDON]
+    sys.modules[NOME_PACOTE] = pacote
+
+
+def _voltar_para_o_anki(argumentos):
+    """Sem PyQt disponível: abre o Anki minimizado, como no modo antigo."""
+    if "--anki" in argumentos:
+        import subprocess
+        executavel = argumentos[argumentos.index("--anki") + 1]
+        comando = [executavel, "-m", "aqt"] if "python" in os.path.basename(executavel).lower() else [executavel]
+        subprocess.Popen(comando, env=dict(os.environ, ANKI_TRAY_STARTUP="1"))
+    return 1
+
+
+if __name__ == "__main__":
+    argumentos = sys.argv[1:]
+    icone = _procurar_icone_anki()
+    try:
+        _registrar_modulos()
+    except ImportError:
+        sys.exit(_voltar_para_o_anki(argumentos))
+    notificador_leve = importlib.import_module(NOME_PACOTE + ".notificador_leve")
+    sys.exit(notificador_leve.main(argumentos, icone))
@@ -0,0 +1,408 @@
+# -------------------------------------------------------------------------
+# Copyright © 2025 Caio Graco Purita. Todos os direitos reservados.
+# ARQUIVO: inicio_sistema.py
+# -------------------------------------------------------------------------
+import json
+import os
+from abc import ABC, abstractmethod
+import shutil
+import sys
+from collections import namedtuple
+from .consts import PASTA_USUARIO
+
+try:
+    import winreg
+except ImportError:
+    # Fora do Windows o registro não existe; o backend XDG não precisa dele
+    winreg = None
+
+# Estado desejado/atual do início automático. 'minimizado' e 'executavel'
+# podem ser None quando o backend não sabe dizer (ex: atalho criado por versão antiga).
+# 'interpretador_leve' é o Python que roda o notificador leve no lugar do Anki (None = Anki inteiro).
+EstadoInicio = namedtuple("EstadoInicio", ["minimizado", "executavel", "interpretador_leve"], defaults=(None,))
+
+SCRIPT_LEVE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "iniciar_leve.py")
+
+
+class BackendInicio(ABC):
+    """
+    Interface dos mecanismos de início automático.
+    'aplicar' compara o estado desejado com o atual e só escreve quando eles diferem.
+    """
+
+    # Cache do executável do Anki: (caminho, mtime) validado a cada consulta
+    _executavel_em_cache = None
+
+    @abstractmethod
+    def ler_estado(self):
+        """Retorna o EstadoInicio instalado, ou None se o início automático estiver desligado."""
+
+    @abstractmethod
+    def instalar(self, estado):
+        """Grava 'estado' no sistema (só chamado quando ele difere do atual)."""
+
+    @abstractmethod
+    def remover(self):
+        """Desliga o início automático."""
+
+    def verificar_integridade(self):
+        """Auto-cura dos arquivos auxiliares do backend (padrão: nada a fazer)."""
+        pass
+
+    def procurar_executavel(self):
+        return os.path.abspath(sys.executable)
+
+    def procurar_interpretador_leve(self):
+        """
+        Python do próprio Anki (o mesmo ambiente, com PyQt) para rodar o notificador leve.
+        Retorna None nas instalações congeladas, onde não há um interpretador separado.
+        """
+        executavel = os.path.abspath(sys.executable)
+        if "python" in os.path.basename(executavel).lower():
+            return executavel
+        return None
+
+    def obter_executavel(self):
+        """Procura o executável do Anki uma vez e reaproveita enquanto o mtime não mudar."""
+        cache = BackendInicio._executavel_em_cache
+        if cache:
+            caminho, mtime = cache
+            try:
+                if os.path.getmtime(caminho) == mtime:
+                    return caminho
+            except OSError:
+                pass
+
+        caminho = self.procurar_executavel()
+        try:
+            BackendInicio._executavel_em_cache = (caminho, os.path.getmtime(caminho))
+        except OSError:
+            BackendInicio._executavel_em_cache = None
+        return caminho
+
+    def esta_ativo(self):
+        return self.ler_estado() is not None
+
+    def aplicar(self, ativar, iniciar_minimizado, leve=False):
+        """
+        Leva o sistema ao estado pedido. Retorna False quando já estava nele.
+        Com 'leve', o boot minimizado abre só o notificador leve (se houver interpretador).
+        """
+        desejado = None
+        if ativar:
+            interpretador = self.procurar_interpretador_leve() if (iniciar_minimizado and leve) else None
+            desejado = EstadoInicio(iniciar_minimizado, self.obter_executavel(), interpretador)
+        if self.ler_estado() == desejado:
+            return False
+        if desejado:
+            self.instalar(desejado)
+        else:
+            self.remover()
+        return True
+
+
+class BackendWindows(BackendInicio):
+    """
+    Atalho na pasta 'Inicializar' do Windows.
+    Usa um Wrapper VBS para garantir a minimização correta no boot.
+    O .lnk só pode ser gerado via WScript, então registramos o estado aplicado num
+    arquivo ao lado; sem mudanças, nenhum script ou processo é disparado.
+    """
+
+    SHORTCUT_NAME = "AnkiTrayPro_AutoStart.lnk"
+    VBS_NAME = "run_minimized.vbs"
+    ARQUIVO_ESTADO = os.path.join(PASTA_USUARIO, "inicio_windows.json")
+
+    def _obter_pasta_startup_real(self):
+        try:
+            chave_shell = r"Software\Microsoft\Windows\CurrentVersion\Explorer\User Shell Folders"
+            with winreg.OpenKey(winreg.HKEY_CURRENT_USER, chave_shell) as key:
+                caminho_bruto, tipo = winreg.QueryValueEx(key, "Startup")
+                return os.path.expandvars(caminho_bruto)
+        except:
+            return os.path.join(os.getenv('APPDATA'), r'Microsoft\Windows\Start Menu\Programs\Startup')
+
+    def obter_caminho_atalho(self):
+        return os.path.join(self._obter_pasta_startup_real(), self.SHORTCUT_NAME)
+
+    def procurar_interpretador_leve(self):
+        # pythonw.exe não abre janela de console; o anki.exe congelado não serve
+        pasta = os.path.dirname(os.path.abspath(sys.executable))
+        for nome in ("pythonw.exe", "python.exe"):
+            caminho = os.path.join(pasta, nome)
+            if os.path.exists(caminho):
+                return caminho
+        return None
+
+    def procurar_executavel(self):
+        caminho_atual = os.path.abspath(sys.executable)
+
+        # 1. Pastas Padrão
+        locais = []
+        if os.getenv('LOCALAPPDATA'):
+            locais.append(os.path.join(os.getenv('LOCALAPPDATA'), r"Programs\Anki\anki.exe"))
+        if os.getenv('ProgramFiles'):
+            locais.append(os.path.join(os.getenv('ProgramFiles'), r"Anki\anki.exe"))
+        if os.getenv('ProgramFiles(x86)'):
+            locais.append(os.path.join(os.getenv('ProgramFiles(x86)'), r"Anki\anki.exe"))
+
+        for path in locais:
+            if os.path.exists(path):
+                return path
+
+        # 2. Registro
+        try:
+            chave = r"Software\Microsoft\Windows\CurrentVersion\Uninstall\Anki"
+            for hkey in [winreg.HKEY_CURRENT_USER, winreg.HKEY_LOCAL_MACHINE]:
+                try:
+                    with winreg.OpenKey(hkey, chave) as key:
+                        pasta, _ = winreg.QueryValueEx(key, "InstallLocation")
+                        exe = os.path.join(pasta, "anki.exe")
+                        if os.path.exists(exe):
+                            return exe
+                except: pass
+        except: pass
+
+        return caminho_atual
+
+    def ler_estado(self):
+        caminho_atalho = self.obter_caminho_atalho()
+        if not os.path.exists(caminho_atalho):
+            return None
+        try:
+            with open(self.ARQUIVO_ESTADO, "r", encoding="utf-8") as f:
+                registro = json.load(f)
+            # Se o atalho foi mexido por fora, não confiamos no registro
+            if registro.get("mtime_atalho") == os.path.getmtime(caminho_atalho):
+                return EstadoInicio(
+                    registro.get("minimizado"), registro.get("executavel"), registro.get("interpretador_leve")
+                )
+        except:
+            pass
+        return EstadoInicio(None, None)
+
+    def _gerar_script_wrapper(self, caminho_anki, interpretador_leve=None):
+        """
+        Cria o script VBS intermediário que injeta a variável de ambiente.
+        Com 'interpretador_leve', ele abre o notificador leve (sem janela) no lugar do Anki.
+        """
+        base_dir = os.path.dirname(__file__)
+        vbs_path = os.path.join(base_dir, self.VBS_NAME)
+
+        if interpretador_leve:
+            # No VBS, aspas dentro de string são dobradas
+            comando = f'"{interpretador_leve}" "{SCRIPT_LEVE}" --anki "{caminho_anki}"'.replace('"', '""')
+            conteudo_vbs = f"""
+        Set oShell = CreateObject("WScript.Shell")
+        oShell.Run "{comando}", 0, False
+        """
+        else:
+            conteudo_vbs = f"""
+        Set oShell = CreateObject("WScript.Shell")
+        oShell.Environment("PROCESS")("ANKI_TRAY_STARTUP") = "1"
+        oShell.Run "{caminho_anki}", 1, False
+        """
+
+        with open(vbs_path, "w", encoding="utf-8") as f:
+            f.write(conteudo_vbs)
+
+        return vbs_path
+
+    def verificar_integridade(self):
+        """
+        Método de Auto-Cura:
+        Verifica se o arquivo run_minimized.vbs existe.
+        Se não existir (foi apagado ou é instalação nova), recria ele imediatamente.
+        """
+        try:
+            base_dir = os.path.dirname(__file__)
+            vbs_path = os.path.join(base_dir, self.VBS_NAME)
+
+            # Se o arquivo sumiu, recria (no mesmo modo do atalho instalado)
+            if not os.path.exists(vbs_path):
+                estado = self.ler_estado()
+                interpretador = estado.interpretador_leve if estado else None
+                self._gerar_script_wrapper(self.obter_executavel(), interpretador)
+        except:
+            pass
+
+    def instalar(self, estado):
+        import subprocess
+
+        caminho_exe = estado.executavel
+        caminho_link = self.obter_caminho_atalho()
+        pasta_link = os.path.dirname(caminho_link)
+        if not os.path.exists(pasta_link):
+            os.makedirs(pasta_link)
+
+        if estado.minimizado:
+            alvo_final = self._gerar_script_wrapper(caminho_exe, estado.interpretador_leve)
+            target = os.path.join(os.getenv('SystemRoot'), "System32", "wscript.exe")
+            args = f'""{alvo_final}""'
+            icon = caminho_exe
+            desc = "Anki Tray Pro (Minimizado)"
+            window_style = 7
+        else:
+            target = caminho_exe
+            args = "" if "python" not in os.path.basename(caminho_exe).lower() else "-m aqt"
+            icon = target
+            desc = "Iniciado automaticamente pelo Anki Tray Pro"
+            window_style = 1
+
+        script_gen = f"""
+        Set oWS = WScript.CreateObject("WScript.Shell")
+        Set oLink = oWS.CreateShortcut("{caminho_link}")
+        oLink.TargetPath = "{target}"
+        oLink.Arguments = "{args}"
+        oLink.IconLocation = "{icon},0"
+        oLink.WindowStyle = {window_style}
+        oLink.Description = "{desc}"
+        oLink.Save
+        """
+
+        gen_path = os.path.join(os.getenv('TEMP'), "anki_shortcut_gen.vbs")
+        with open(gen_path, "w", encoding="utf-8") as file:
+            file.write(script_gen)
+
+        cscript = os.path.join(os.getenv('SystemRoot'), "System32", "cscript.exe")
+        subprocess.run([cscript, '//Nologo', gen_path], check=True, creationflags=0x08000000)
+
+        if os.path.exists(gen_path):
+            os.remove(gen_path)
+
+        os.makedirs(PASTA_USUARIO, exist_ok=True)
+        with open(self.ARQUIVO_ESTADO, "w", encoding="utf-8") as f:
+            json.dump({
+                "minimizado": estado.minimizado,
+                "executavel": estado.executavel,
+                "interpretador_leve": estado.interpretador_leve,
+                "mtime_atalho": os.path.getmtime(caminho_link),
+            }, f)
+
+    def remover(self):
+        caminho_atalho = self.obter_caminho_atalho()
+        if os.path.exists(caminho_atalho):
+            os.remove(caminho_atalho)
+
+
+def citar_argumento_exec(argumento):
+    """
+    Argumento da chave Exec= de um .desktop, como pede a Desktop Entry Specification:
+    entre aspas, com '"', '`', '$' e '\\' escapados por barra. Como o Exec= é um valor
+    string, as barras são escapadas de novo; '%' (códigos de campo) vira '%%'.
+    """
+    escapado = "".join("\\" + c if c in '"`$\\' else c for c in argumento)
+    return '"' + escapado.replace("\\", "\\\\").replace("%", "%%") + '"'
+
+
+class BackendXDG(BackendInicio):
+    """
+    Arquivo .desktop em ~/.config/autostart (Linux e demais sistemas freedesktop).
+    O arquivo é escrito direto pelo Python; o estado atual é lido do próprio arquivo.
+    """
+
+    NOME_ARQUIVO = "ankitraypro.desktop"
+
+    def obter_caminho_arquivo(self):
+        base = os.environ.get("XDG_CONFIG_HOME") or os.path.join(os.path.expanduser("~"), ".config")
+        return os.path.join(base, "autostart", self.NOME_ARQUIVO)
+
+    def procurar_executavel(self):
+        return shutil.which("anki") or os.path.abspath(sys.executable)
+
+    def _montar_comando(self, estado):
+        citar = citar_argumento_exec
+        if estado.interpretador_leve:
+            return f"{citar(estado.interpretador_leve)} {citar(SCRIPT_LEVE)} --anki {citar(estado.executavel)}"
+        comando = citar(estado.executavel)
+        if "python" in os.path.basename(estado.executavel).lower():
+            comando += " -m aqt"
+        if estado.minimizado:
+            comando = "env ANKI_TRAY_STARTUP=1 " + comando
+        return comando
+
+    def _montar_conteudo(self, estado):
+        return (
+            "[Desktop Entry]\n"
+            "Type=Application\n"
+            "Name=Anki Tray Pro\n"
+            "Comment=Iniciado automaticamente pelo Anki Tray Pro\n"
+            f"Exec={self._montar_comando(estado)}\n"
+            "Icon=anki\n"
+            "X-GNOME-Autostart-enabled=true\n"
+            f"X-AnkiTrayPro-Minimizado={'true' if estado.minimizado else 'false'}\n"
+            f"X-AnkiTrayPro-Executavel={estado.executavel}\n"
+            + (f"X-AnkiTrayPro-Leve={estado.interpretador_leve}\n" if estado.interpretador_leve else "")
+        )
+
+    def ler_estado(self):
+        try:
+            with open(self.obter_caminho_arquivo(), "r", encoding="utf-8") as f:
+                linhas = dict(
+                    linha.rstrip("\n").split("=", 1) for linha in f if "=" in linha
+                )
+        except OSError:
+            return None
+        minimizado = linhas.get("X-AnkiTrayPro-Minimizado")
+        return EstadoInicio(
+            None if minimizado is None else minimizado == "true",
+            linhas.get("X-AnkiTrayPro-Executavel"),
+            linhas.get("X-AnkiTrayPro-Leve"),
+        )
+
+    def instalar(self, estado):
+        caminho = self.obter_caminho_arquivo()
+        os.makedirs(os.path.dirname(caminho), exist_ok=True)
+        with open(caminho, "w", encoding="utf-8") as f:
+            f.write(self._montar_conteudo(estado))
+
+    def remover(self):
+        caminho = self.obter_caminho_arquivo()
+        if os.path.exists(caminho):
+            os.remove(caminho)
+
+
+class BackendMemoria(BackendInicio):
+    """Backend de testes: guarda o estado em memória e conta quantas escritas ocorreram."""
+
+    def __init__(self, executavel="/usr/bin/anki"):
+        self.executavel = executavel
+        self.estado = None
+        self.escritas = 0
+
+    def procurar_executavel(self):
+        return self.executavel
+
+    def obter_executavel(self):
+        return self.executavel
+
+    def ler_estado(self):
+        return self.estado
+
+    def instalar(self, estado):
+        self.escritas += 1
+        self.estado = estado
+
+    def remover(self):
+        self.escritas += 1
+        self.estado = None
+
+
+_backend_atual = None
+
+
+def obter_backend():
+    """Escolhe o backend da plataforma atual (None se não houver suporte)."""
+    global _backend_atual
+    if _backend_atual is None:
+        if sys.platform.startswith("win"):
+            _backend_atual = BackendWindows()
+        elif sys.platform != "darwin":
+            _backend_atual = BackendXDG()
+    return _backend_atual
+
+
+def definir_backend(backend):
+    """Substitui o backend em uso (ex: BackendMemoria em testes)."""
+    global _backend_atual
+    _backend_atual = backend
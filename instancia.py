@@ -0,0 +1,91 @@
+# -------------------------------------------------------------------------
+# Copyright © 2025 Caio Graco Purita. Todos os direitos reservados.
+# ARQUIVO: instancia.py
+# -------------------------------------------------------------------------
+"""
+Garantia de instância única entre o Anki com o add-on e o notificador leve.
+Quem está com a bandeja (o 'dono') escuta num QLocalServer com nome derivado da pasta
+de perfis; um processo novo pergunta na inicialização adiada e, se o dono for um
+Anki completo, só pede para ele aparecer e fecha (pelo mw.close, sem matar o processo).
+
+Protocolo: uma linha com o comando; o servidor responde uma linha com a identidade.
+"""
+import os
+import zlib
+from aqt.qt import *
+
+COMANDO_PING = "ping"
+COMANDO_MOSTRAR = "mostrar"
+
+IDENTIDADE_ADDON = "addon"
+IDENTIDADE_LEVE = "leve"
+
+# Tempo máximo esperando o dono responder (sem servidor, a conexão falha na hora)
+ESPERA_RESPOSTA_MS = 1000
+
+
+def nome_servidor(base):
+    """Um nome por pasta de perfis: instâncias com '-b' diferentes não se enxergam."""
+    base = os.path.normcase(os.path.abspath(base))
+    # crc32 basta para separar pastas; o hashlib custaria carregar o OpenSSL na importação
+    return "AnkiTrayPro-{:08x}".format(zlib.crc32(base.encode("utf-8")))
+
+
+def enviar_comando(nome, comando, espera_ms=ESPERA_RESPOSTA_MS):
+    """Envia 'comando' ao dono da bandeja. Retorna a identidade dele, ou None se não houver."""
+    socket = QLocalSocket()
+    socket.connectToServer(nome)
+    if not socket.waitForConnected(espera_ms):
+        return None
+    try:
+        socket.write((comando + "\n").encode("utf-8"))
+        socket.flush()
+        if not socket.waitForReadyRead(espera_ms):
+            return None
+        return bytes(socket.readLine()).decode("utf-8").strip() or None
+    finally:
+        socket.disconnectFromServer()
+
+
+class ServidorInstancia(QObject):
+    """
+    Escuta os comandos de outros processos. 'tratar(comando)' roda na thread principal,
+    depois que a identidade já foi respondida (o outro lado não espera o tratamento).
+    """
+
+    def __init__(self, identidade, tratar, pai=None):
+        super().__init__(pai)
+        self.identidade = identidade
+        self.tratar = tratar
+        self.servidor = QLocalServer(self)
+        self.servidor.newConnection.connect(self._ao_conectar)
+
+    def escutar(self, nome):
+        if self.servidor.isListening():
+            return True
+        if self.servidor.listen(nome):
+            return True
+        # Nome sobrando de um processo que morreu sem fechar o servidor (comum no Linux)
+        QLocalServer.removeServer(nome)
+        return self.servidor.listen(nome)
+
+    def fechar(self):
+        self.servidor.close()
+
+    def _ao_conectar(self):
+        while self.servidor.hasPendingConnections():
+            socket = self.servidor.nextPendingConnection()
+            socket.readyRead.connect(lambda s=socket: self._ao_ler(s))
+            socket.disconnected.connect(socket.deleteLater)
+
+    def _ao_ler(self, socket):
+        if not socket.canReadLine():
+            return
+        comando = bytes(socket.readLine()).decode("utf-8").strip()
+        socket.write((self.identidade + "\n").encode("utf-8"))
+        socket.flush()
+        socket.disconnectFromServer()
+        try:
+            self.tratar(comando)
+        except:
+            pass
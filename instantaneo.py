@@ -0,0 +1,93 @@
+# -------------------------------------------------------------------------
+# Copyright © 2025 Caio Graco Purita. Todos os direitos reservados.
+# ARQUIVO: instantaneo.py
+# -------------------------------------------------------------------------
+"""
+Instantâneo do notificador em disco: o estado do CacheContagem (cartões pendentes, linha
+do tempo e o carimbo da coleção) gravado ao esconder e ao fechar o perfil, para que o
+próximo início mostre as contagens antes de ler o banco.
+
+Os arrays vão comprimidos (zlib + base64) dentro de um JSON pequeno; os ordenados (ids
+e instantes) são guardados como diferenças, que comprimem muito melhor. Não importa nada
+do Anki.
+"""
+import base64
+import json
+import os
+import sys
+import time
+import zlib
+from array import array
+from itertools import accumulate
+from .consts import PASTA_USUARIO
+
+ARQUIVO_INSTANTANEO = os.path.join(PASTA_USUARIO, "instantaneo_notificador.json")
+VERSAO_INSTANTANEO = 1
+# Compressão mais rápida: os arrays de diferenças já encolhem bem nela (é gravado a cada esconder)
+NIVEL_COMPRESSAO = 1
+
+# Arrays do estado exportado; os ordenados são gravados como diferenças
+ARRAYS_ORDENADOS = ("ids", "momentos")
+ARRAYS_SIMPLES = ("baralhos", "filas", "vencimentos", "ids_linha_tempo")
+
+
+def _compactar(valores, ordenado):
+    if ordenado and valores:
+        valores = array("q", [valores[0]] + [b - a for a, b in zip(valores, valores[1:])])
+    return base64.b64encode(zlib.compress(valores.tobytes(), NIVEL_COMPRESSAO)).decode("ascii")
+
+
+def _descompactar(texto, ordenado):
+    valores = array("q")
+    valores.frombytes(zlib.decompress(base64.b64decode(texto)))
+    return array("q", accumulate(valores)) if ordenado else valores
+
+
+def gravar_instantaneo(estado, colecao, criacao, caminho=None):
+    """
+    Grava 'estado' (CacheContagem.exportar) da coleção 'colecao', criada em 'criacao'
+    (col.crt). A troca do arquivo é atômica: um fechamento no meio não deixa lixo.
+    """
+    caminho = caminho or ARQUIVO_INSTANTANEO
+    dados = {
+        "versao": VERSAO_INSTANTANEO,
+        "ordem_bytes": sys.byteorder,
+        "colecao": colecao,
+        "criacao": criacao,
+    }
+    for chave, valor in estado.items():
+        if chave in ARRAYS_ORDENADOS or chave in ARRAYS_SIMPLES:
+            dados[chave] = _compactar(valor, chave in ARRAYS_ORDENADOS)
+        else:
+            dados[chave] = valor
+    try:
+        os.makedirs(os.path.dirname(caminho), exist_ok=True)
+        temporario = caminho + ".tmp"
+        with open(temporario, "w", encoding="utf-8") as f:
+            json.dump(dados, f, ensure_ascii=False)
+        os.replace(temporario, caminho)
+        return True
+    except:
+        return False
+
+
+def ler_instantaneo(colecao, criacao, caminho=None):
+    """
+    Estado gravado para esta coleção, pronto para CacheContagem.restaurar.
+    None se não houver, for de outra coleção ou estiver velho demais para servir
+    (a linha do tempo dele já terminou).
+    """
+    try:
+        with open(caminho or ARQUIVO_INSTANTANEO, encoding="utf-8") as f:
+            dados = json.load(f)
+        if (
+            dados.get("versao") != VERSAO_INSTANTANEO or dados.get("ordem_bytes") != sys.byteorder
+            or dados.get("colecao") != colecao or dados.get("criacao") != criacao
+            or time.time() >= dados["horizonte"]
+        ):
+            return None
+        for chave in ARRAYS_ORDENADOS + ARRAYS_SIMPLES:
+            dados[chave] = _descompactar(dados[chave], chave in ARRAYS_ORDENADOS)
+        return dados
+    except:
+        return None
@@ -4,15 +4,20 @@ traducoes = {
     "nome_menu": "Anki Tray Pro Options",
     "grupo_comportamento": "Window Behavior",
     "lbl_fechar": "On 'X' (Close) click:",
+    "chk_hibernar": "Free memory after a long time in the tray (hibernate)",
+    "lbl_minutos_hibernar": "Hibernate after (minutes):",
     "lbl_minimizar": "On minimize (-):",
     "opcao_bandeja": "Minimize to Tray",
     "opcao_sair": "Quit Anki",
     "opcao_padrao": "Standard (Taskbar)",
     "grupo_sinc": "Synchronization",
     "chk_sincronizar": "Sync before minimizing to tray",
+    "lbl_prazo_saida": "Sync deadline when quitting (seconds):",
     "grupo_inicio": "Startup",
     "chk_iniciar_sistema": "Start Anki with Windows",
     "chk_inicio_min": "Start Anki minimized to tray",
+    "chk_notificador_leve": "At startup, open only the lightweight notifier (Anki loads on click)",
+    "chk_preaquecer": "Prepare Anki in the background after a minimized start",
     "grupo_notificacao": "Notifications",
     "chk_ativar_notif": "Enable due card notifications",
     "lbl_intervalo": "Check every (minutes):",
@@ -22,10 +27,46 @@ traducoes = {
     "menu_abrir": "Open Anki",
     "menu_sincronizar": "Sync",
     "menu_sair_total": "Quit Anki Completely",
+    "menu_sair_agora": "Quit Now (don't wait)",
+    "dica_saindo": "Syncing before quitting... (up to {} s)",
+    "msg_sincronizando_saida": "Syncing before quitting. Anki will close as soon as it finishes.",
+    "msg_reconciliando": "The last sync did not finish. Syncing now.",
+    "menu_estudar": "Study",
+    "menu_baralho": "{} ({})",
+    "menu_sem_baralhos": "Nothing due",
+    "menu_iniciar_captura": "Start Performance Capture",
+    "menu_parar_captura": "Stop Capture and Save",
+    "menu_sair_notificador": "Close Notifier",
+    "tooltip_leve": "Anki Tray Pro: click to open Anki",
 
     # Notifications
     "msg_boot": "Hello! You have {} cards to study today.",
     "msg_novos_um": "Time to review! 1 card is due now.",
     "msg_novos_varios": "Time to review! {} cards are due now.",
-    "tooltip_tray": "Anki is running in the background"
+    "msg_regra_um": "{}: 1 card just became due ({} due).",
+    "msg_regra_varios": "{}: {} cards just became due ({} due).",
+    "tooltip_tray": "Anki is running in the background",
+    "msg_outro_perfil": "Profile {}: {} cards are due.",
+    "dica_previsao": "{} due now, {} in the next hour, next at {}",
+    "dica_previsao_sem_proximo": "{} due now, nothing else in the next 24 hours",
+    "dica_perfil": "{}: {} due",
+    "chk_outros_perfis": "Also watch other profiles on this computer",
+
+    # Diagnostics
+    "grupo_diagnostico": "Diagnostics",
+    "chk_diagnostico": "Record performance timings",
+    "btn_ver_diagnostico": "View timings...",
+    "titulo_diagnostico": "Anki Tray Pro - Diagnostics",
+    "btn_atualizar": "Refresh",
+    "btn_limpar": "Clear",
+    "btn_exportar_json": "Export JSON...",
+    "btn_fechar": "Close",
+    "lbl_modo_captura": "Performance capture:",
+    "opcao_amostragem": "Sampling (low overhead)",
+    "opcao_cprofile": "cProfile (exact)",
+    "btn_iniciar_captura": "Start Capture",
+    "btn_parar_captura": "Stop and Save",
+    "msg_captura_salva": "Capture saved to:\n{}",
+    "msg_diagnostico_desligado": "Timing is disabled. Enable it in the options to collect new samples.",
+    "msg_erro_estudar": "Could not open the deck: {}"
 }
\ No newline at end of file
@@ -5,15 +5,20 @@ traducoes = {
     "nome_menu": "Opções do Anki Tray Pro",
     "grupo_comportamento": "Comportamento da Janela",
     "lbl_fechar": "Ao clicar no 'X' (Fechar):",
+    "chk_hibernar": "Liberar memória após muito tempo na bandeja (hibernar)",
+    "lbl_minutos_hibernar": "Hibernar após (minutos):",
     "lbl_minimizar": "Ao minimizar (-):",
     "opcao_bandeja": "Ir para a Bandeja (Tray)",
     "opcao_sair": "Sair do Anki",
     "opcao_padrao": "Padrão (Barra de Tarefas)",
     "grupo_sinc": "Sincronização",
     "chk_sincronizar": "Sincronizar ao enviar para o Tray",
+    "lbl_prazo_saida": "Prazo da sincronização ao sair (segundos):",
     "grupo_inicio": "Inicialização",
     "chk_iniciar_sistema": "Iniciar Anki junto com o Windows",
     "chk_inicio_min": "Iniciar o Anki minimizado na bandeja",
+    "chk_notificador_leve": "No boot, abrir só o notificador leve (o Anki carrega ao clicar)",
+    "chk_preaquecer": "Preparar o Anki em segundo plano após iniciar minimizado",
     "grupo_notificacao": "Notificações",
     "chk_ativar_notif": "Ativar notificações de revisão",
     "lbl_intervalo": "Verificar a cada (minutos):",
@@ -23,10 +28,46 @@ traducoes = {
     "menu_abrir": "Abrir Anki",
     "menu_sincronizar": "Sincronizar",
     "menu_sair_total": "Sair Totalmente",
+    "menu_sair_agora": "Sair Agora (sem esperar)",
+    "dica_saindo": "Sincronizando antes de sair... (até {} s)",
+    "msg_sincronizando_saida": "Sincronizando antes de sair. O Anki fecha assim que terminar.",
+    "msg_reconciliando": "A última sincronização não terminou. Sincronizando agora.",
+    "menu_estudar": "Estudar",
+    "menu_baralho": "{} ({})",
+    "menu_sem_baralhos": "Nada para revisar",
+    "menu_iniciar_captura": "Iniciar Captura de Desempenho",
+    "menu_parar_captura": "Parar Captura e Salvar",
+    "menu_sair_notificador": "Fechar Notificador",
+    "tooltip_leve": "Anki Tray Pro: clique para abrir o Anki",
 
     # Notificações
     "msg_boot": "Olá! Você tem {} cartões para estudar hoje.",
     "msg_novos_um": "Hora de revisar! 1 cartão venceu agora.",
     "msg_novos_varios": "Hora de revisar! {} cartões venceram agora.",
-    "tooltip_tray": "O Anki está rodando em segundo plano"
+    "msg_regra_um": "{}: 1 cartão venceu agora ({} para revisar).",
+    "msg_regra_varios": "{}: {} cartões venceram agora ({} para revisar).",
+    "tooltip_tray": "O Anki está rodando em segundo plano",
+    "msg_outro_perfil": "Perfil {}: {} cartões para revisar.",
+    "dica_previsao": "{} para revisar agora, {} na próxima hora, próximo às {}",
+    "dica_previsao_sem_proximo": "{} para revisar agora, nada mais nas próximas 24 horas",
+    "dica_perfil": "{}: {} para revisar",
+    "chk_outros_perfis": "Vigiar também os outros perfis deste computador",
+
+    # Diagnóstico
+    "grupo_diagnostico": "Diagnóstico",
+    "chk_diagnostico": "Registrar tempos de desempenho",
+    "btn_ver_diagnostico": "Ver tempos...",
+    "titulo_diagnostico": "Anki Tray Pro - Diagnóstico",
+    "btn_atualizar": "Atualizar",
+    "btn_limpar": "Limpar",
+    "btn_exportar_json": "Exportar JSON...",
+    "btn_fechar": "Fechar",
+    "lbl_modo_captura": "Captura de desempenho:",
+    "opcao_amostragem": "Amostragem (leve)",
+    "opcao_cprofile": "cProfile (exato)",
+    "btn_iniciar_captura": "Iniciar Captura",
+    "btn_parar_captura": "Parar e Salvar",
+    "msg_captura_salva": "Captura salva em:\n{}",
+    "msg_diagnostico_desligado": "A medição está desligada. Ative-a nas opções para coletar novas amostras.",
+    "msg_erro_estudar": "Não foi possível abrir o baralho: {}"
 }
\ No newline at end of file
@@ -0,0 +1,78 @@
+# -------------------------------------------------------------------------
+# Copyright © 2025 Caio Graco Purita. Todos os direitos reservados.
+# ARQUIVO: leitura.py
+# -------------------------------------------------------------------------
+# Leitura direta do collection.anki2, sem depender do Anki: o notificador leve (que roda
+# fora dele) e o vigia dos outros perfis. Só serve para coleções fechadas: a do perfil
+# aberto fica com o rslib, que a segura com locking_mode = exclusive.
+import json
+import sqlite3
+
+# Cache de páginas da conexão de leitura (valor negativo = KiB, convenção do SQLite)
+TAMANHO_CACHE_KIB = 16384
+# O rslib não solta a trava enquanto a coleção está aberta: esperar mais não adianta
+ESPERA_TRAVA_S = 0.1
+
+
+def abrir_somente_leitura(caminho, tamanho_cache_kib=TAMANHO_CACHE_KIB):
+    """
+    Abre uma conexão SQLite somente leitura com um arquivo de coleção do Anki.
+    Se o Anki abrir a coleção no meio, a espera pela trava dele é curta e a leitura falha.
+    """
+    uri = "file:{}?mode=ro".format(caminho.replace("\\", "/"))
+    conexao = sqlite3.connect(uri, uri=True, check_same_thread=False, timeout=ESPERA_TRAVA_S)
+    conexao.execute("PRAGMA query_only = 1")
+    conexao.execute("PRAGMA cache_size = -{}".format(tamanho_cache_kib))
+    conexao.execute("PRAGMA temp_store = MEMORY")
+    return conexao
+
+
+class ColecaoLeitura:
+    """
+    Imita o pedaço da API de mw.col usado pelas contagens (db.all, db.scalar, db.first,
+    mod, crt, get_config), mas lendo por uma conexão SQLite própria e somente leitura.
+    """
+
+    def __init__(self, caminho, conexao):
+        self.caminho = caminho
+        self.conexao = conexao
+        self.db = self
+
+    # --- Interface estilo DBProxy ---
+
+    def all(self, sql, *args):
+        return self.conexao.execute(sql, args).fetchall()
+
+    def first(self, sql, *args):
+        return self.conexao.execute(sql, args).fetchone()
+
+    def scalar(self, sql, *args):
+        linha = self.conexao.execute(sql, args).fetchone()
+        return linha[0] if linha else None
+
+    # --- Interface estilo Collection ---
+
+    @property
+    def mod(self):
+        return self.scalar("SELECT mod FROM col")
+
+    @property
+    def crt(self):
+        return self.scalar("SELECT crt FROM col")
+
+    def get_config(self, chave, padrao=None):
+        try:
+            # Esquema moderno (2.1.28+): uma linha por chave, valor em JSON
+            valor = self.scalar("SELECT val FROM config WHERE KEY = ?", chave)
+            if valor is None:
+                return padrao
+            return json.loads(valor)
+        except sqlite3.OperationalError:
+            # Esquema antigo: todas as chaves num JSON dentro da tabela 'col'
+            return json.loads(self.scalar("SELECT conf FROM col") or "{}").get(chave, padrao)
+
+    def fechar(self):
+        try:
+            self.conexao.close()
+        except:
+            pass
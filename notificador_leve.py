@@ -0,0 +1,309 @@
+# -------------------------------------------------------------------------
+# Copyright © 2025 Caio Graco Purita. Todos os direitos reservados.
+# ARQUIVO: notificador_leve.py
+# -------------------------------------------------------------------------
+"""
+Notificador leve: um processo PyQt mínimo para o boot minimizado.
+Em vez de carregar o Anki inteiro só para escondê-lo, o atalho de inicialização roda
+este notificador (via iniciar_leve.py), que lê a coleção somente leitura, mostra o selo
+e os avisos como o add-on faria e só abre o Anki quando o usuário pede.
+
+Este módulo não importa nada do Anki além de 'aqt.qt' (que iniciar_leve.py aponta direto
+para o PyQt); 'gravar_estado' também é usada pelo add-on.
+"""
+import json
+import os
+import subprocess
+import sys
+import time
+from aqt.qt import *
+from .contagem import CacheContagem, FOTO_VAZIA, comparar_fotos, formatar_previsao
+from .icone import CacheIcones, texto_do_selo
+from .consts import PASTA_USUARIO
+from .instantaneo import ler_instantaneo
+from .instancia import (
+    ServidorInstancia, enviar_comando, nome_servidor, COMANDO_PING, COMANDO_MOSTRAR, IDENTIDADE_LEVE
+)
+from .leitura import ColecaoLeitura, abrir_somente_leitura
+
+# Escrito pelo add-on a cada abertura de perfil: o que o notificador leve deve vigiar
+ARQUIVO_ESTADO = os.path.join(PASTA_USUARIO, "notificador_leve.json")
+PASTA_ADDON = os.path.dirname(os.path.abspath(__file__))
+
+# Variável de ambiente com uma ação para o Anki executar quando o perfil abrir
+VARIAVEL_ACAO = "ANKI_TRAY_ACAO"
+ACAO_SINCRONIZAR = "sincronizar"
+
+
+def gravar_estado(colecao, perfil, idioma, caminho=ARQUIVO_ESTADO):
+    """Registra o perfil aberto. Só grava quando algo mudou (roda a cada troca de perfil)."""
+    estado = {"colecao": colecao, "perfil": perfil, "idioma": idioma}
+    if ler_estado(caminho) == estado:
+        return False
+    os.makedirs(os.path.dirname(caminho), exist_ok=True)
+    with open(caminho, "w", encoding="utf-8") as f:
+        json.dump(estado, f, ensure_ascii=False)
+    return True
+
+
+def ler_estado(caminho=ARQUIVO_ESTADO):
+    try:
+        with open(caminho, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except:
+        return None
+
+
+def ler_config(pasta=PASTA_ADDON):
+    """config.json com as alterações do usuário por cima (o Anki as guarda em meta.json)."""
+    config = {}
+    for arquivo, chave in (("config.json", None), ("meta.json", "config")):
+        try:
+            with open(os.path.join(pasta, arquivo), "r", encoding="utf-8") as f:
+                dados = json.load(f)
+            config.update((dados.get(chave) or {}) if chave else dados)
+        except:
+            pass
+    return config
+
+
+def ler_traducoes(idioma, pasta=PASTA_ADDON):
+    """Carrega lang/<idioma>.py direto do arquivo (lang/__init__.py depende do Anki)."""
+    import importlib.util
+    for nome in ((idioma or "en")[:2].lower(), "en"):
+        caminho = os.path.join(pasta, "lang", nome + ".py")
+        if os.path.exists(caminho):
+            spec = importlib.util.spec_from_file_location("traducoes_leve_" + nome, caminho)
+            modulo = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(modulo)
+            return modulo.traducoes
+    return {}
+
+
+def montar_comando_anki(executavel):
+    if "python" in os.path.basename(executavel).lower():
+        return [executavel, "-m", "aqt"]
+    return [executavel]
+
+
+def abrir_anki(executavel, acao=None, minimizado=False):
+    """Abre o Anki completo num processo independente deste."""
+    ambiente = dict(os.environ)
+    ambiente.pop("ANKI_TRAY_STARTUP", None)
+    ambiente.pop(VARIAVEL_ACAO, None)
+    if minimizado:
+        ambiente["ANKI_TRAY_STARTUP"] = "1"
+    if acao:
+        ambiente[VARIAVEL_ACAO] = acao
+
+    opcoes = {}
+    if sys.platform.startswith("win"):
+        # DETACHED_PROCESS | CREATE_NEW_PROCESS_GROUP: o Anki sobrevive ao fim do notificador
+        opcoes["creationflags"] = 0x00000008 | 0x00000200
+    else:
+        opcoes["start_new_session"] = True
+    subprocess.Popen(montar_comando_anki(executavel), env=ambiente, close_fds=True, **opcoes)
+
+
+class NotificadorLeve:
+    """
+    Bandeja + relógio de verificação, com as mesmas regras do notificador do add-on:
+    contagem pelo CacheContagem, despertar no próximo vencimento (limitado pelo
+    intervalo configurado), aviso de boas-vindas e aviso quando a contagem sobe.
+    """
+
+    def __init__(self, app, estado, config, traducoes, executavel_anki, icone_base, sair_apos_contagem=False):
+
+        self.app = app
+        self.caminho_colecao = estado["colecao"]
+        self.config = config
+        self.traducoes = traducoes
+        self.executavel_anki = executavel_anki
+        self.icone_base = icone_base
+        self.sair_apos_contagem = sair_apos_contagem
+
+        self.cache = CacheContagem()
+        self.foto = FOTO_VAZIA
+        self.colecao = None
+        self.referencia_anterior = None
+        self.cache_icones = CacheIcones()
+        self.chave_icone_atual = None
+
+        minutos = config.get("intervalo_notificacao", 30)
+        self.intervalo_maximo_ms = minutos * 60 * 1000
+        self.temporizador = QTimer()
+        self.temporizador.setSingleShot(True)
+        self.temporizador.timeout.connect(self.ao_bater_relogio)
+
+        self.icone_bandeja = QSystemTrayIcon(icone_base)
+        self.icone_bandeja.setToolTip(self.tr("tooltip_leve"))
+        self.menu = QMenu()
+        self.acao_previsao = QAction(self.tr("tooltip_leve"), self.menu)
+        self.acao_previsao.setEnabled(False)
+        self.menu.addAction(self.acao_previsao)
+        self.menu.addSeparator()
+        self.menu.aboutToShow.connect(self._atualizar_previsao)
+        acao_abrir = QAction(self.tr("menu_abrir"), self.menu)
+        acao_abrir.triggered.connect(lambda: self.abrir_anki())
+        self.menu.addAction(acao_abrir)
+        acao_sinc = QAction(self.tr("menu_sincronizar"), self.menu)
+        acao_sinc.triggered.connect(lambda: self.abrir_anki(ACAO_SINCRONIZAR))
+        self.menu.addAction(acao_sinc)
+        self.menu.addSeparator()
+        acao_sair = QAction(self.tr("menu_sair_notificador"), self.menu)
+        acao_sair.triggered.connect(self.sair)
+        self.menu.addAction(acao_sair)
+        self.icone_bandeja.setContextMenu(self.menu)
+        self.icone_bandeja.activated.connect(self.ao_clicar_icone)
+        self.icone_bandeja.messageClicked.connect(lambda: self.abrir_anki())
+
+    def tr(self, chave):
+        return self.traducoes.get(chave, f"[{chave}]")
+
+    def iniciar(self):
+        self.icone_bandeja.show()
+        # A primeira contagem roda já dentro do laço de eventos
+        QTimer.singleShot(0, self.ao_bater_relogio)
+
+    def contar(self):
+        """Foto da coleção pela conexão somente leitura (reaberta depois de qualquer erro)."""
+        try:
+            if self.colecao is None:
+                self.colecao = ColecaoLeitura(self.caminho_colecao, abrir_somente_leitura(self.caminho_colecao))
+                self._restaurar_instantaneo()
+            return self.cache.obter_foto(self.colecao)
+        except:
+            self.fechar_colecao()
+            self.cache.invalidar()
+            return FOTO_VAZIA
+
+    def _restaurar_instantaneo(self):
+        """
+        O cache parte do instantâneo gravado pelo add-on na última sessão: se o carimbo
+        da coleção não mudou desde então, a primeira contagem não relê os cartões.
+        """
+        if self.cache.carimbo is not None:
+            return
+        estado = ler_instantaneo(self.caminho_colecao, self.colecao.crt)
+        if estado is not None:
+            self.cache.restaurar(estado)
+
+    def fechar_colecao(self):
+        if self.colecao:
+            self.colecao.fechar()
+            self.colecao = None
+
+    def ao_bater_relogio(self):
+        self.foto = self.contar()
+        self.atualizar_selo(self.foto.total)
+        self._atualizar_previsao()
+        self._comparar_pendencias(self.foto)
+        if self.sair_apos_contagem:
+            self.sair()
+            return
+        self.agendar_proximo_despertar()
+
+    def agendar_proximo_despertar(self):
+        ms = self.intervalo_maximo_ms
+        if self.foto.carimbo is not None:
+            # Um segundo de folga garante que o cartão já esteja vencido quando acordarmos
+            restante_ms = int((self.foto.proximo_despertar() - time.time() + 1) * 1000)
+            ms = max(1000, min(ms, restante_ms))
+        self.temporizador.start(ms)
+
+    def _comparar_pendencias(self, foto):
+        if foto.carimbo is None:
+            # A leitura falhou: a referência fica para a próxima contagem
+            return
+        if self.referencia_anterior is None:
+            # Primeira contagem: é o boot minimizado, então vale o resumo do dia
+            self.referencia_anterior = foto
+            if foto.total > 0:
+                self.mostrar_notificacao(self.tr("msg_boot").format(foto.total))
+            return
+
+        novos, resolvidos = comparar_fotos(self.referencia_anterior, foto)
+        if novos > 0:
+            msg = self.tr("msg_novos_um") if novos == 1 else self.tr("msg_novos_varios").format(novos)
+            self.mostrar_notificacao(msg)
+        self.referencia_anterior = foto
+
+    def _atualizar_previsao(self):
+        """Tooltip e primeira linha do menu, pela linha do tempo da última foto (sem consulta)."""
+        previsao = formatar_previsao(self.foto, self.tr)
+        self.acao_previsao.setText(previsao or self.tr("tooltip_leve"))
+        linhas = [self.tr("tooltip_leve")] + ([previsao] if previsao else [])
+        self.icone_bandeja.setToolTip("\n".join(linhas))
+
+    def atualizar_selo(self, contagem):
+        escuro = QApplication.palette().color(QPalette.ColorRole.Window).lightness() < 128
+        escala = self.app.devicePixelRatio()
+        chave = (texto_do_selo(contagem), escuro, escala)
+        if chave == self.chave_icone_atual:
+            return
+        self.chave_icone_atual = chave
+        self.icone_bandeja.setIcon(self.cache_icones.obter(self.icone_base, contagem, escuro, escala))
+
+    def mostrar_notificacao(self, mensagem):
+        if not self.config.get("notificacoes_ativadas", True):
+            return
+        self.icone_bandeja.showMessage("Anki Tray Pro", mensagem, QSystemTrayIcon.MessageIcon.Information, 5000)
+
+    def ao_clicar_icone(self, razao):
+        if razao == QSystemTrayIcon.ActivationReason.Trigger:
+            self.abrir_anki()
+
+    def abrir_anki(self, acao=None):
+        """Troca o notificador pelo Anki completo (que assume a bandeja pelo add-on)."""
+        self.fechar_colecao()
+        abrir_anki(self.executavel_anki, acao)
+        self.sair()
+
+    def sair(self):
+        self.temporizador.stop()
+        self.fechar_colecao()
+        self.icone_bandeja.hide()
+        self.app.quit()
+
+
+def main(argumentos, icone_base_caminho=None):
+    """Ponto de entrada chamado por iniciar_leve.py (depois de preparar o pacote)."""
+    import argparse
+
+    parser = argparse.ArgumentParser(prog="iniciar_leve.py")
+    parser.add_argument("--anki", required=True, help="executável do Anki a abrir sob demanda")
+    parser.add_argument("--estado", default=ARQUIVO_ESTADO)
+    parser.add_argument("--sair-apos-contagem", action="store_true", help="encerra após a primeira contagem (benchmarks)")
+    args = parser.parse_args(argumentos)
+
+    estado = ler_estado(args.estado)
+    if not estado or not os.path.exists(estado.get("colecao") or ""):
+        # Ainda não sabemos qual coleção vigiar: volta ao caminho antigo (Anki minimizado)
+        abrir_anki(args.anki, minimizado=True)
+        return 0
+
+    app = QApplication(sys.argv[:1])
+    app.setQuitOnLastWindowClosed(False)
+
+    # Se o Anki (ou outro notificador) já está na bandeja desta pasta de perfis, não duplicamos
+    nome = nome_servidor(os.path.dirname(os.path.dirname(estado["colecao"])))
+    if enviar_comando(nome, COMANDO_PING):
+        return 0
+
+    icone_base = QIcon(icone_base_caminho) if icone_base_caminho else QIcon.fromTheme("anki")
+    if icone_base.isNull():
+        pixmap = QPixmap(32, 32)
+        pixmap.fill(QColor("#2a7ae2"))
+        icone_base = QIcon(pixmap)
+
+    notificador = NotificadorLeve(
+        app, estado, ler_config(), ler_traducoes(estado.get("idioma")),
+        args.anki, icone_base, args.sair_apos_contagem
+    )
+    # Um Anki aberto à mão assume a bandeja: o notificador sai para não haver dois ícones
+    servidor = ServidorInstancia(
+        IDENTIDADE_LEVE, lambda comando: notificador.sair() if comando == COMANDO_MOSTRAR else None
+    )
+    servidor.escutar(nome)
+    notificador.iniciar()
+    return app.exec()
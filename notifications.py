@@ -2,85 +2,311 @@
 # Copyright © 2025 Caio Graco Purita. Todos os direitos reservados.
 # ARQUIVO: notifications.py
 # -------------------------------------------------------------------------
-import datetime
-from aqt import mw
+import time
+from aqt import mw, gui_hooks
 from aqt.qt import *
 from .lang import tr
+from .contagem import CacheContagem, ContagemDescartada, FOTO_VAZIA, comparar_fotos
+from .executor import executor, TAREFA_CONTAGEM, TAREFA_INSTANTANEO
+from .sincronizacao import agendador_sinc
+from .configuracao import config_addon
+from .diagnostico import registro_tempos, TRECHO_CONTAGEM, TRECHO_RELOGIO
+from .perfis import vigia_perfis
+from .regras import MotorRegras
+from .instantaneo import gravar_instantaneo, ler_instantaneo
+
+# Avisos gerados dentro desta janela saem juntos, num balão só
+JANELA_AGRUPAMENTO_MS = 500
 
 class GerenciadorNotificacao:
     def __init__(self):
+        # Temporizadores criados em inicializar(): nada do Qt é montado na importação
+        self.temporizador = None
+        self.temporizador_avisos = None
+        self.intervalo_maximo_ms = 0
+        self.referencia_anterior = FOTO_VAZIA  # Foto com os cartões já avisados
+        self.cache = CacheContagem()
+        self.foto = FOTO_VAZIA
+        self.foto_provisoria = None   # Restaurada do instantâneo, até a primeira contagem do boot
+        self.chave_instantaneo = None # (carimbo, ls, dia) do último instantâneo gravado ou lido
+        self.referencias_perfis = {}  # nome de outro perfil -> última foto avisada
+        self.motor_regras = MotorRegras()
+        self.avisos_pendentes = []    # (mensagem, som) esperando o agrupamento
+        self.inicializado = False
+
+    def inicializar(self):
+        """Liga o relógio de notificações. Adiado até o perfil abrir (ver __init__.py)."""
+        if self.inicializado: return
+        self.inicializado = True
+        # Temporizador de disparo único, rearmado para o próximo vencimento após cada checagem
         self.temporizador = QTimer(mw)
+        self.temporizador.setSingleShot(True)
         self.temporizador.timeout.connect(self.ao_bater_relogio)
-        self.referencia_anterior = 0
+        self.temporizador_avisos = QTimer(mw)
+        self.temporizador_avisos.setSingleShot(True)
+        self.temporizador_avisos.timeout.connect(self._mostrar_avisos_agrupados)
         self.iniciar_temporizador()
+        # Reconfigura o relógio sozinho quando o usuário muda essas opções
+        config_addon.assinar(
+            ["notificacoes_ativadas", "intervalo_notificacao"],
+            lambda alteradas: self.iniciar_temporizador()
+        )
+        vigia_perfis.ouvintes_atualizacao.append(self._ao_atualizar_outro_perfil)
+        self.compilar_regras()
+        config_addon.assinar(["regras_notificacao"], lambda alteradas: self.compilar_regras())
+        # Outro perfil tem outros baralhos: os nomes já resolvidos deixam de valer
+        gui_hooks.profile_did_open.append(self.compilar_regras)
+        gui_hooks.profile_will_close.append(self._ao_fechar_perfil)
+        # Desfazer/refazer devolvem o mod e o usn antigos aos cartões, e restaurar um backup
+        # recarrega a coleção: a varredura incremental não enxerga nenhum dos dois
+        for gancho in ("state_did_undo", "state_did_redo", "collection_did_load"):
+            lista = getattr(gui_hooks, gancho, None)
+            if lista is not None:
+                lista.append(lambda *args: self.cache.pedir_recontagem())
+        gui_hooks.operation_did_execute.append(self._ao_executar_operacao)
+
+    def _ao_executar_operacao(self, changes, handler):
+        # Renomear ou mover um baralho muda o nome que as regras comparam
+        if getattr(changes, "deck", False):
+            self.motor_regras.esquecer_baralhos()
+
+    def compilar_regras(self):
+        """As regras viram predicados uma vez; cada tick só as avalia contra a foto em memória."""
+        self.motor_regras.compilar(
+            config_addon.obter("regras_notificacao"), lambda did: mw.col.decks.name(did)
+        )
+        self.motor_regras.referenciar(self.referencia_anterior)
 
     def iniciar_temporizador(self):
-        config = mw.addonManager.getConfig(__name__)
-        if config.get("notificacoes_ativadas"):
-            minutos = config.get("intervalo_notificacao", 30)
-            ms = minutos * 60 * 1000
-            self.temporizador.start(ms)
+        if config_addon.obter("notificacoes_ativadas"):
+            minutos = config_addon.obter("intervalo_notificacao", 30)
+            # O intervalo configurado passa a ser apenas o limite máximo entre checagens
+            self.intervalo_maximo_ms = minutos * 60 * 1000
+            self.agendar_proximo_despertar()
         else:
+            self.intervalo_maximo_ms = 0
             self.temporizador.stop()
 
-    def obter_contagem_relevante(self):
+    def agendar_proximo_despertar(self):
+        """
+        Arma o temporizador para o primeiro momento em que algo pode vencer
+        (próximo passo de aprendizado ou virada do dia), limitado pelo intervalo configurado.
+        """
+        if not self.intervalo_maximo_ms:
+            return
+
+        instantes = []
+        if self.foto.carimbo is not None:
+            instantes.append(self.foto.proximo_despertar())
+        if config_addon.obter("vigiar_outros_perfis"):
+            instante_perfis = vigia_perfis.proximo_despertar()
+            if instante_perfis is not None:
+                instantes.append(instante_perfis)
+
+        ms = self.intervalo_maximo_ms
+        if instantes:
+            # Um segundo de folga garante que o cartão já esteja vencido quando acordarmos
+            restante_ms = int((min(instantes) - time.time() + 1) * 1000)
+            ms = max(1000, min(ms, restante_ms))
+        self.temporizador.start(ms)
+
+    @registro_tempos.medido(TRECHO_CONTAGEM)
+    def obter_foto(self, geracao=None):
+        """
+        Calcula a foto de contagens (por baralho e por fila).
+        Roda no taskman do Anki (ver executor); não deve tocar em widgets.
+        'geracao' é a do cache quando a contagem foi pedida (ver CacheContagem.obter_foto).
+        """
         try:
-            if not mw.col: return 0
-            
-            # Resetamos o scheduler para processar vencimentos de tempo
-            mw.col.reset()
-            
-            agora_timestamp = int(datetime.datetime.now().timestamp())
-            # SQL para contar Learn/Due ignorando duplicatas da interface
-            query = "SELECT count(id) FROM cards WHERE queue IN (1, 2, 3) AND due <= ?"
-            return mw.col.db.scalar(query, agora_timestamp) or 0
+            if not mw.col: return FOTO_VAZIA
+
+            # A contagem sai do cache; só relemos o banco se a coleção mudou
+            return self.cache.obter_foto(mw.col, geracao)
+        except ContagemDescartada:
+            # O perfil fechou depois do pedido: o executor trata como erro e não entrega nada
+            raise
         except:
-            return 0
-    
-    def resetar_contagem(self):
-        self.referencia_anterior = self.obter_contagem_relevante()
+            self.cache.invalidar()
+            return FOTO_VAZIA
+
+    def obter_contagem_relevante(self):
+        return self.obter_foto().total
+
+    def estatisticas_cache(self):
+        return self.cache.estatisticas()
+
+    def solicitar_contagem(self, ao_concluir=None):
+        """Pede uma contagem em segundo plano; 'ao_concluir(foto)' roda na thread principal."""
+        def ao_receber_foto(foto):
+            self.foto = foto
+            if ao_concluir: ao_concluir(foto)
+            self.agendar_proximo_despertar()
+
+        geracao = self.cache.geracao
+        executor.enviar(TAREFA_CONTAGEM, lambda: self.obter_foto(geracao), ao_receber_foto)
+
+    def resetar_contagem(self, ao_concluir=None):
+        """Toma a contagem atual como referência; 'ao_concluir(foto)' reaproveita a mesma foto."""
+        def ao_receber_foto(foto):
+            self._referenciar(foto)
+            if ao_concluir: ao_concluir(foto)
+
+        self.solicitar_contagem(ao_receber_foto)
 
     def verificar_inicializacao(self, iniciado_minimizado):
-        self.resetar_contagem()
-        if iniciado_minimizado and self.referencia_anterior > 0:
-            msg = tr("msg_boot").format(self.referencia_anterior)
-            self.mostrar_notificacao(msg)
+        """
+        Resumo do dia no boot minimizado. Com um instantâneo restaurado, o aviso sai na hora
+        (contagens da última sessão mais o que venceu desde então pela linha do tempo) e a
+        contagem de verdade só volta a avisar, sem som, se discordar dele.
+        """
+        provisoria, self.foto_provisoria = self.foto_provisoria, None
+        provisorio = None
+        if provisoria is not None:
+            provisorio = provisoria.vencidos_em(int(time.time()))
+            if iniciado_minimizado and provisorio > 0:
+                self.mostrar_notificacao(tr("msg_boot").format(provisorio))
+
+        def ao_receber_foto(foto):
+            self._referenciar(foto)
+            if iniciado_minimizado and foto.total > 0 and foto.total != provisorio:
+                msg = tr("msg_boot").format(foto.total)
+                self.mostrar_notificacao(msg, som=provisorio is None)
+
+        self.solicitar_contagem(ao_receber_foto)
+
+    def _identidade_colecao(self):
+        return mw.col.path, mw.col.crt
+
+    def restaurar_instantaneo(self):
+        """
+        Chamado ao abrir o perfil: volta o cache ao estado gravado na última sessão, antes
+        de qualquer leitura do banco. Se o carimbo da coleção não mudou, a primeira contagem
+        é um acerto de cache (nada é recontado); se mudou, ela reconcilia em segundo plano.
+        """
+        try:
+            estado = ler_instantaneo(*self._identidade_colecao())
+            if estado is None:
+                return None
+            foto = self.cache.restaurar(estado)
+            self.chave_instantaneo = (estado["carimbo"], estado["ultima_sinc"], estado["dia"])
+        except:
+            self.cache.invalidar()
+            return None
+        self.foto = self.foto_provisoria = foto
+        self._referenciar(foto)
+        from .tray import gerenciador_bandeja
+        gerenciador_bandeja.atualizar_selo(foto.vencidos_em(int(time.time())))
+        gerenciador_bandeja.atualizar_dica()
+        return foto
+
+    def salvar_instantaneo(self, em_segundo_plano=True):
+        """
+        Grava o estado do cache (ao esconder, no taskman depois da contagem; ao fechar o
+        perfil, aqui). A chave do último instantâneo só é lida e escrita na thread principal.
+        """
+        try:
+            colecao, criacao = self._identidade_colecao()
+        except:
+            return
+        chave_gravada = self.chave_instantaneo
+
+        def gravar():
+            # O cache não mudou desde o último instantâneo: o arquivo em disco continua valendo
+            estado = self.cache.exportar(chave_gravada)
+            if estado is not None and gravar_instantaneo(estado, colecao, criacao):
+                return estado["carimbo"], estado["ultima_sinc"], estado["dia"]
+            return None
+
+        def ao_gravar(chave):
+            if chave is not None:
+                self.chave_instantaneo = chave
+
+        if em_segundo_plano:
+            executor.enviar(TAREFA_INSTANTANEO, gravar, ao_gravar)
+        else:
+            ao_gravar(gravar())
 
+    def _ao_fechar_perfil(self):
+        # O executor já parou (o gancho dele vem antes); a exportação lê o cache sob a trava
+        self.salvar_instantaneo(em_segundo_plano=False)
+        # O próximo perfil é outra coleção: nada do cache vale para ela. Uma contagem que
+        # o executor desistiu de esperar termina antes (trava) ou é descartada (geração)
+        self.cache.invalidar()
+        self.chave_instantaneo = None
+
+    @registro_tempos.medido(TRECHO_RELOGIO)
     def ao_bater_relogio(self):
-        # Só executa se o Anki estiver escondido
-        if not mw.isVisible():
-            try:
-                if mw.col:
-                    # Sincronização direta no DB para evitar pop-ups de interface
-                    mw.col.sync()
-            except:
-                pass
-            
-            # Aguarda um pouco para o banco estabilizar e checa notificações
-            QTimer.singleShot(2000, self.verificar_novas_pendencias)
+        # Rede de segurança: se a checagem falhar, voltamos a acordar no intervalo máximo
+        if self.intervalo_maximo_ms:
+            self.temporizador.start(self.intervalo_maximo_ms)
+
+        if config_addon.obter("vigiar_outros_perfis"):
+            vigia_perfis.verificar()
+
+        # Só sincroniza se o Anki estiver escondido e o usuário quiser sincronizar na bandeja
+        if not mw.isVisible() and mw.col and config_addon.obter("sincronizar_na_bandeja"):
+            # A sincronização roda em segundo plano (e é pulada se nada mudou);
+            # a checagem acontece quando ela terminar
+            agendador_sinc.solicitar(lambda sincronizou: self.verificar_novas_pendencias(), atraso_ms=0)
         else:
             self.verificar_novas_pendencias()
 
     def verificar_novas_pendencias(self):
+        self.solicitar_contagem(self._comparar_pendencias)
+
+    def _comparar_pendencias(self, foto):
+        if foto.carimbo is None:
+            # A contagem falhou: a referência fica (senão tudo pareceria novo na próxima)
+            return
         if mw.isVisible():
-            self.resetar_contagem()
+            self._referenciar(foto)
             return
 
         try:
-            atual = self.obter_contagem_relevante()
-            delta = atual - self.referencia_anterior
-            
-            if delta > 0:
-                msg = tr("msg_novos_um") if delta == 1 else tr("msg_novos_varios").format(delta)
-                self.mostrar_notificacao(msg)
-                self.referencia_anterior = atual
-            elif delta < 0:
-                self.referencia_anterior = atual
+            if self.motor_regras.ativo:
+                for regra, novos, total in self.motor_regras.avaliar(foto, self.cache.descrever):
+                    self.avisar(self._mensagem_novos(novos, total, regra.baralho), regra.som)
+            else:
+                # Compara os cartões, não os totais: cinco respondidos em outro aparelho
+                # e cinco recém-vencidos deixam o total igual, mas ainda são cinco novos
+                novos, resolvidos = comparar_fotos(self.referencia_anterior, foto)
+                if novos > 0:
+                    self.avisar(self._mensagem_novos(novos, foto.total))
+            self.referencia_anterior = foto
         except:
             pass
 
-    def mostrar_notificacao(self, mensagem):
-        QApplication.beep()
+    def _referenciar(self, foto):
+        self.referencia_anterior = foto
+        self.motor_regras.referenciar(foto)
+
+    def _mensagem_novos(self, novos, total, baralho=None):
+        if baralho:
+            chave = "msg_regra_um" if novos == 1 else "msg_regra_varios"
+            return tr(chave).format(baralho, novos, total)
+        return tr("msg_novos_um") if novos == 1 else tr("msg_novos_varios").format(novos)
+
+    def _ao_atualizar_outro_perfil(self, nome, foto):
+        anterior = self.referencias_perfis.get(nome)
+        self.referencias_perfis[nome] = foto
+        # Avisa só quando algum cartão venceu (a primeira contagem de cada perfil vira a referência)
+        if anterior is not None and comparar_fotos(anterior, foto)[0] > 0 and not mw.isVisible():
+            self.avisar(tr("msg_outro_perfil").format(nome, foto.total))
+
+    def avisar(self, mensagem, som=True):
+        """Enfileira um aviso; os que chegam juntos (regras, outros perfis) viram um balão só."""
+        self.avisos_pendentes.append((mensagem, som))
+        if self.temporizador_avisos and not self.temporizador_avisos.isActive():
+            self.temporizador_avisos.start(JANELA_AGRUPAMENTO_MS)
+
+    def _mostrar_avisos_agrupados(self):
+        avisos, self.avisos_pendentes = self.avisos_pendentes, []
+        if avisos:
+            self.mostrar_notificacao("\n".join(m for m, _ in avisos), any(som for _, som in avisos))
+
+    def mostrar_notificacao(self, mensagem, som=True):
+        if som:
+            QApplication.beep()
         from .tray import gerenciador_bandeja
         if gerenciador_bandeja.icone_bandeja:
             gerenciador_bandeja.icone_bandeja.showMessage(
@@ -0,0 +1,156 @@
+# -------------------------------------------------------------------------
+# Copyright © 2025 Caio Graco Purita. Todos os direitos reservados.
+# ARQUIVO: perfilador.py
+# -------------------------------------------------------------------------
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from aqt import mw
+from aqt.qt import *
+from .consts import MODO_DETERMINISTICO, PASTA_USUARIO
+
+# Uma captura esquecida ligada pesaria para sempre; ela para sozinha depois disso
+DURACAO_MAXIMA_MS = 10 * 60 * 1000
+# Intervalo entre amostras no modo de amostragem (~200 Hz)
+INTERVALO_AMOSTRA_S = 0.005
+# A partir do 3.12 o cProfile usa sys.monitoring: um único perfil ligado já vê todas as
+# threads, e ligar um segundo levanta ValueError ("Another profiling tool is already active")
+PERFIL_UNICO = sys.version_info >= (3, 12)
+
+
+class Perfilador:
+    """
+    Captura de desempenho sob demanda (menu da bandeja ou diálogo de Diagnóstico).
+
+    - MODO_DETERMINISTICO: cProfile na thread principal (relógio, sincronização,
+      esconder/mostrar) e em cada tarefa de segundo plano do add-on (executor e vigia de perfis).
+      No Python 3.12+ o perfil da thread principal já cobre as tarefas. Gera um arquivo .pstats.
+    - MODO_AMOSTRAGEM: uma thread lê as pilhas de todas as threads a cada 5 ms, inclusive
+      as do próprio Anki. Custo baixo; gera pilhas colapsadas (.collapsed.txt, formato
+      aceito por flamegraph.pl e speedscope).
+
+    Os arquivos ficam em user_files, com data e hora no nome, para o usuário nos enviar.
+    """
+
+    def __init__(self):
+        # Funções chamadas na thread principal: ouvintes_estado(ativo), ouvintes_captura(caminho)
+        self.ouvintes_estado = []
+        self.ouvintes_captura = []
+        self.modo = None
+        self.perfil_principal = None
+        self.perfis_threads = []
+        self.pilhas = Counter()
+        self.amostrador = None
+        self.parar_amostragem = threading.Event()
+        self.trava = threading.Lock()
+        self.temporizador = None
+
+    @property
+    def ativo(self):
+        return self.modo is not None
+
+    def iniciar(self, modo):
+        if self.ativo:
+            return
+        self.modo = modo
+        self.perfis_threads = []
+        self.pilhas = Counter()
+        if modo == MODO_DETERMINISTICO:
+            import cProfile
+            self.perfil_principal = cProfile.Profile()
+            self.perfil_principal.enable()
+        else:
+            self.parar_amostragem.clear()
+            self.amostrador = threading.Thread(target=self._amostrar, name="AnkiTrayPro-amostrador", daemon=True)
+            self.amostrador.start()
+
+        if self.temporizador is None:
+            self.temporizador = QTimer(mw)
+            self.temporizador.setSingleShot(True)
+            self.temporizador.timeout.connect(self.parar)
+        self.temporizador.start(DURACAO_MAXIMA_MS)
+        self._avisar(self.ouvintes_estado, True)
+
+    def parar(self):
+        """Encerra a captura e grava o arquivo. Retorna o caminho (None se não havia captura)."""
+        if not self.ativo:
+            return None
+        self.temporizador.stop()
+        modo, self.modo = self.modo, None
+        carimbo = time.strftime("%Y%m%d-%H%M%S")
+        os.makedirs(PASTA_USUARIO, exist_ok=True)
+
+        if modo == MODO_DETERMINISTICO:
+            self.perfil_principal.disable()
+            caminho = os.path.join(PASTA_USUARIO, f"perfil_{carimbo}.pstats")
+            self._gravar_pstats(caminho)
+            self.perfil_principal = None
+        else:
+            self.parar_amostragem.set()
+            self.amostrador.join(1.0)
+            self.amostrador = None
+            caminho = os.path.join(PASTA_USUARIO, f"perfil_{carimbo}.collapsed.txt")
+            self._gravar_pilhas(caminho)
+
+        self._avisar(self.ouvintes_estado, False)
+        self._avisar(self.ouvintes_captura, caminho)
+        return caminho
+
+    def _avisar(self, ouvintes, valor):
+        for ouvinte in list(ouvintes):
+            try:
+                ouvinte(valor)
+            except:
+                pass
+
+    def executar(self, funcao):
+        """Roda 'funcao' numa thread de segundo plano, perfilando-a se a captura determinística estiver ligada."""
+        if self.modo != MODO_DETERMINISTICO or PERFIL_UNICO:
+            return funcao()
+        import cProfile
+        perfil = cProfile.Profile()
+        try:
+            perfil.enable()
+        except ValueError:
+            # Outra ferramenta de perfil já está ligada: a tarefa roda sem perfil próprio
+            return funcao()
+        try:
+            return funcao()
+        finally:
+            perfil.disable()
+            with self.trava:
+                self.perfis_threads.append(perfil)
+
+    def _gravar_pstats(self, caminho):
+        import pstats
+        estatisticas = pstats.Stats(self.perfil_principal)
+        with self.trava:
+            perfis, self.perfis_threads = self.perfis_threads, []
+        for perfil in perfis:
+            estatisticas.add(perfil)
+        estatisticas.dump_stats(caminho)
+
+    def _amostrar(self):
+        proprio = threading.get_ident()
+        while not self.parar_amostragem.wait(INTERVALO_AMOSTRA_S):
+            nomes = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, quadro in sys._current_frames().items():
+                if ident == proprio:
+                    continue
+                funcoes = []
+                while quadro is not None:
+                    codigo = quadro.f_code
+                    funcoes.append(f"{os.path.basename(codigo.co_filename)}:{codigo.co_name}")
+                    quadro = quadro.f_back
+                funcoes.append(nomes.get(ident, f"thread-{ident}"))
+                self.pilhas[";".join(reversed(funcoes))] += 1
+
+    def _gravar_pilhas(self, caminho):
+        with open(caminho, "w", encoding="utf-8") as f:
+            for pilha, quantidade in self.pilhas.most_common():
+                f.write(f"{pilha} {quantidade}\n")
+
+
+perfilador = Perfilador()
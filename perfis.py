@@ -0,0 +1,163 @@
+# -------------------------------------------------------------------------
+# Copyright © 2025 Caio Graco Purita. Todos os direitos reservados.
+# ARQUIVO: perfis.py
+# -------------------------------------------------------------------------
+import os
+import time
+from aqt import mw
+from aqt.qt import *
+from .contagem import CacheContagem
+from .leitura import ColecaoLeitura, abrir_somente_leitura
+from .perfilador import perfilador
+
+# Cache de páginas menor que o da conexão principal: essas leituras são esporádicas
+TAMANHO_CACHE_PERFIL_KIB = 2048
+
+
+def assinatura_arquivo(caminho):
+    """mtime e tamanho do arquivo e do -wal: mudam sempre que o Anki grava algo."""
+    assinatura = []
+    for arquivo in (caminho, caminho + "-wal"):
+        try:
+            info = os.stat(arquivo)
+            assinatura.append((info.st_mtime_ns, info.st_size))
+        except OSError:
+            assinatura.append(None)
+    return tuple(assinatura)
+
+
+class _PontePerfis(QObject):
+    """Traz de volta à thread principal o resultado das contagens (o sinal vai em fila)."""
+
+    terminou = pyqtSignal(str, object, object)
+
+
+class _ContagemPerfil(QRunnable):
+    """Conta um perfil numa thread do pool do vigia e devolve o resultado pela ponte dele."""
+
+    def __init__(self, ponte, nome, funcao):
+        super().__init__()
+        self.ponte = ponte
+        self.nome = nome
+        self.funcao = funcao
+
+    def run(self):
+        try:
+            resultado, erro = perfilador.executar(self.funcao), None
+        except Exception as e:
+            resultado, erro = None, e
+        try:
+            self.ponte.terminou.emit(self.nome, resultado, erro)
+        except RuntimeError:
+            pass  # O Anki já fechou e levou a ponte junto
+
+
+class _EstadoPerfil:
+    def __init__(self):
+        self.cache = CacheContagem()
+        self.assinatura = None
+        self.foto = None
+
+
+class VigiaPerfis:
+    """
+    Conta os vencidos dos outros perfis sem carregá-los no Anki.
+    Cada coleção é aberta somente leitura num pool pequeno de threads, lida e fechada logo
+    em seguida (para não segurar o arquivo). Se o arquivo não mudou e nada venceu
+    desde a última foto, o resultado anterior é reaproveitado sem abrir o banco.
+    O pool e a ponte de volta à thread principal só são criados na primeira verificação.
+    """
+
+    def __init__(self, max_threads=2):
+        self.max_threads = max_threads
+        self.pool = None
+        self.ponte = None
+        self.ouvintes_atualizacao = []  # ouvinte(nome, foto), na thread principal
+        self.estados = {}       # nome do perfil -> _EstadoPerfil
+        self.em_andamento = set()
+        self.nomes_vigiados = set()  # Perfis fechados na última verificação
+
+    def _preparar_pool(self):
+        if self.pool is None:
+            self.pool = QThreadPool(mw)
+            self.pool.setMaxThreadCount(self.max_threads)
+            self.ponte = _PontePerfis(mw)
+            self.ponte.terminou.connect(self._ao_terminar)
+
+    def _listar_outros_perfis(self):
+        """Retorna [(nome, caminho_da_colecao)] dos perfis que não estão abertos agora."""
+        try:
+            atual = mw.pm.name
+            base = mw.pm.base
+            nomes = mw.pm.profiles()
+        except:
+            return []
+        perfis = []
+        for nome in nomes:
+            if nome == atual:
+                continue
+            caminho = os.path.join(base, nome, "collection.anki2")
+            if os.path.exists(caminho):
+                perfis.append((nome, caminho))
+        return perfis
+
+    def verificar(self):
+        """Agenda a contagem de cada outro perfil (os que ainda estão em andamento são pulados)."""
+        perfis = self._listar_outros_perfis()
+        self.nomes_vigiados = {nome for nome, caminho in perfis}
+        for nome, caminho in perfis:
+            if nome in self.em_andamento:
+                continue
+            estado = self.estados.setdefault(nome, _EstadoPerfil())
+            assinatura = assinatura_arquivo(caminho)
+            foto = estado.foto
+            if (foto is not None and assinatura == estado.assinatura
+                    and time.time() < foto.proximo_despertar()):
+                continue
+            self.em_andamento.add(nome)
+            self._preparar_pool()
+            self.pool.start(_ContagemPerfil(self.ponte, nome, lambda e=estado, c=caminho: self._contar(e, c)))
+
+    def _contar(self, estado, caminho):
+        """Roda numa thread do pool."""
+        colecao = ColecaoLeitura(caminho, abrir_somente_leitura(caminho, TAMANHO_CACHE_PERFIL_KIB))
+        try:
+            foto = estado.cache.obter_foto(colecao)
+        except:
+            estado.cache.invalidar()
+            raise
+        finally:
+            colecao.fechar()
+        # Lida depois de fechar: o fechamento da última conexão pode mexer no -wal
+        estado.assinatura = assinatura_arquivo(caminho)
+        estado.foto = foto
+        return foto
+
+    def _ao_terminar(self, nome, foto, erro):
+        self.em_andamento.discard(nome)
+        if erro is None and foto is not None:
+            for ouvinte in list(self.ouvintes_atualizacao):
+                try:
+                    ouvinte(nome, foto)
+                except:
+                    pass
+
+    def resumo(self):
+        """[(nome, total vencido)] dos outros perfis já contados, em ordem alfabética."""
+        return sorted(
+            (nome, estado.foto.total)
+            for nome, estado in self.estados.items()
+            if estado.foto is not None and nome in self.nomes_vigiados
+        )
+
+    def proximo_despertar(self):
+        """Primeiro instante em que a contagem de algum outro perfil pode mudar sozinha."""
+        instantes = [
+            estado.foto.proximo_despertar()
+            for nome, estado in self.estados.items()
+            if estado.foto is not None and nome in self.nomes_vigiados
+        ]
+        return min(instantes) if instantes else None
+
+
+vigia_perfis = VigiaPerfis()
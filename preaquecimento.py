@@ -0,0 +1,189 @@
+# -------------------------------------------------------------------------
+# Copyright © 2025 Caio Graco Purita. Todos os direitos reservados.
+# ARQUIVO: preaquecimento.py
+# -------------------------------------------------------------------------
+import time
+from aqt import mw
+from aqt.qt import *
+from .configuracao import config_addon
+from .diagnostico import (
+    registro_tempos, TRECHO_PREAQUECER_TABELAS, TRECHO_PREAQUECER_ARVORE, TRECHO_PREAQUECER_TELA
+)
+
+# Espera depois do boot antes de começar (o login ainda disputa disco e CPU)
+ATRASO_INICIAL_MS = 20 * 1000
+# Quanto o sistema precisa estar sem entrada do usuário para uma etapa começar
+OCIOSO_MINIMO_MS = 5 * 1000
+# Nova tentativa quando o sistema não está ocioso (ou o usuário acabou de mexer)
+ESPERA_OCIOSO_MS = 5 * 1000
+# Folga entre etapas, para o aquecimento nunca virar uma rajada
+INTERVALO_ETAPAS_MS = 250
+
+# Tabelas lidas pelo revisor e pela tela inicial (consultas baratas que trazem as páginas para o cache)
+CONSULTAS_AQUECIMENTO = (
+    ("SELECT count() FROM cards WHERE queue IN (1, 2, 3)",),
+    ("SELECT count() FROM decks",),
+    ("SELECT count() FROM deck_config",),
+    ("SELECT count() FROM config",),
+    ("SELECT count() FROM revlog WHERE id > ?", lambda: int((time.time() - 86400) * 1000)),
+)
+
+EVENTOS_ENTRADA = {
+    QEvent.Type.KeyPress, QEvent.Type.MouseButtonPress, QEvent.Type.MouseMove,
+    QEvent.Type.Wheel, QEvent.Type.TouchBegin,
+}
+
+
+def milissegundos_sem_entrada():
+    """Tempo desde a última entrada do usuário no sistema todo (None se a plataforma não informar)."""
+    try:
+        import sys
+        if sys.platform.startswith("win"):
+            import ctypes
+            from ctypes import wintypes
+
+            class _UltimaEntrada(ctypes.Structure):
+                _fields_ = [("cbSize", wintypes.UINT), ("dwTime", wintypes.DWORD)]
+
+            info = _UltimaEntrada()
+            info.cbSize = ctypes.sizeof(info)
+            if ctypes.windll.user32.GetLastInputInfo(ctypes.byref(info)):
+                return (ctypes.windll.kernel32.GetTickCount() - info.dwTime) & 0xFFFFFFFF
+    except:
+        pass
+    return None
+
+
+class _FiltroEntrada(QObject):
+    """Avisa o preaquecedor de qualquer entrada do usuário no aplicativo."""
+
+    def __init__(self, ao_receber_entrada):
+        super().__init__(mw)
+        self.ao_receber_entrada = ao_receber_entrada
+
+    def eventFilter(self, objeto, evento):
+        if evento.type() in EVENTOS_ENTRADA:
+            self.ao_receber_entrada()
+        return False
+
+
+class Preaquecedor:
+    """
+    Depois de um boot minimizado, adianta em momentos ociosos o trabalho que a primeira
+    restauração pagaria a frio, em etapas curtas e separadas:
+      1. tabelas quentes da coleção (páginas do SQLite e do disco);
+      2. árvore de baralhos com os vencidos e a contagem do notificador;
+      3. tela inicial renderizada com a janela ainda escondida.
+    Qualquer entrada do usuário adia a próxima etapa; se a janela for aberta, o resto é cancelado.
+    """
+
+    def __init__(self):
+        # Criados no primeiro agendamento (só há preaquecimento depois de um boot minimizado)
+        self.temporizador = None
+        self.filtro = None
+        self.etapas_pendentes = []
+        self.concluido = False
+
+    def agendar(self, atraso_ms=ATRASO_INICIAL_MS):
+        if not config_addon.obter("preaquecer_apos_boot"):
+            return
+        if self.temporizador is None:
+            self.temporizador = QTimer(mw)
+            self.temporizador.setSingleShot(True)
+            self.temporizador.timeout.connect(self._proxima_etapa)
+            self.filtro = _FiltroEntrada(self._ao_receber_entrada)
+        self.concluido = False
+        self.etapas_pendentes = [self._aquecer_tabelas, self._montar_arvore, self._preparar_tela_inicial]
+        QApplication.instance().installEventFilter(self.filtro)
+        self.temporizador.start(atraso_ms)
+
+    def cancelar(self):
+        if not self.etapas_pendentes:
+            return
+        self.etapas_pendentes = []
+        self.temporizador.stop()
+        QApplication.instance().removeEventFilter(self.filtro)
+
+    def _ao_receber_entrada(self):
+        # O usuário mexeu: a etapa seguinte espera o sistema ficar quieto de novo
+        if self.etapas_pendentes:
+            self.temporizador.start(ESPERA_OCIOSO_MS)
+
+    def _sistema_ocioso(self):
+        ocioso_ms = milissegundos_sem_entrada()
+        return ocioso_ms is None or ocioso_ms >= OCIOSO_MINIMO_MS
+
+    def _proxima_etapa(self):
+        if not self.etapas_pendentes:
+            return
+        if mw.isVisible() or not mw.col:
+            # A janela já foi aberta (ou o perfil fechou): não há mais o que adiantar
+            self.cancelar()
+            return
+        if not self._sistema_ocioso():
+            self.temporizador.start(ESPERA_OCIOSO_MS)
+            return
+        etapa = self.etapas_pendentes.pop(0)
+        etapa()
+
+    def _continuar(self, *args):
+        if self.etapas_pendentes:
+            self.temporizador.start(INTERVALO_ETAPAS_MS)
+        elif not self.concluido:
+            self.concluido = True
+            QApplication.instance().removeEventFilter(self.filtro)
+
+    # --- Etapas ---
+
+    def _aquecer_tabelas(self):
+        mw.taskman.run_in_background(self._ler_tabelas_quentes, self._continuar)
+
+    @registro_tempos.medido(TRECHO_PREAQUECER_TABELAS)
+    def _ler_tabelas_quentes(self):
+        """Roda no taskman do Anki, sobre mw.col (é o cache da conexão dele que importa)."""
+        for consulta in CONSULTAS_AQUECIMENTO:
+            try:
+                sql, *parametros = consulta
+                mw.col.db.scalar(sql, *[parametro() for parametro in parametros])
+            except:
+                pass
+
+    def _montar_arvore(self):
+        from .notifications import notificador
+
+        def ao_montar(futuro):
+            # Com a árvore pronta, a contagem do notificador. A etapa seguinte não depende
+            # dela: se a contagem falhar, o executor não chama ninguém de volta
+            notificador.solicitar_contagem()
+            self._continuar()
+
+        mw.taskman.run_in_background(self._calcular_arvore, ao_montar)
+
+    @registro_tempos.medido(TRECHO_PREAQUECER_ARVORE)
+    def _calcular_arvore(self):
+        try:
+            mw.col.sched.deck_due_tree()
+        except:
+            pass
+
+    @registro_tempos.medido(TRECHO_PREAQUECER_TELA)
+    def _preparar_tela_inicial(self):
+        from .executor import executor, TAREFA_CONTAGEM
+        from .notifications import notificador
+        from .tray import gerenciador_bandeja
+        if executor.ocupado(TAREFA_CONTAGEM):
+            # A contagem da etapa anterior ainda não voltou (com ou sem erro, a chave é liberada)
+            self.etapas_pendentes.insert(0, self._preparar_tela_inicial)
+            self._continuar()
+            return
+        try:
+            if mw.state == "deckBrowser":
+                mw.deckBrowser.refresh()
+            # A tela acabou de ser desenhada com esta foto: a primeira restauração não a redesenha
+            gerenciador_bandeja._registrar_impressao(notificador.foto)
+        except:
+            pass
+        self._continuar()
+
+
+preaquecedor = Preaquecedor()
@@ -0,0 +1,180 @@
+# -------------------------------------------------------------------------
+# Copyright © 2025 Caio Graco Purita. Todos os direitos reservados.
+# ARQUIVO: regras.py
+# -------------------------------------------------------------------------
+"""
+Regras de notificação definidas pelo usuário ("regras_notificacao" no config.json):
+
+    {"baralho": "Japonês", "fila": "revisao", "minimo": 20,
+     "silencio": "22:00-07:00", "espacamento_minutos": 60, "som": false}
+
+Todos os campos são opcionais. Cada regra é compilada uma vez em predicados e avaliada
+contra as fotos em memória do notificador e o cache de contagem: avaliar uma regra nunca
+faz consulta ao banco.
+Uma regra dispara quando venceram cartões que ela aceita desde a última vez e o total
+aceito chegou ao 'minimo', fora do 'silencio' e respeitando o 'espacamento_minutos'.
+Cartões segurados pelo silêncio ou pelo espaçamento são avisados assim que ela puder disparar.
+"""
+import time
+from .contagem import FILA_APRENDIZADO, FILA_REVISAO, FILA_APRENDIZADO_DIA, INDICE_FILA, diferenca_ordenada
+
+FILAS_REGRA = {
+    "todas": (FILA_APRENDIZADO, FILA_REVISAO, FILA_APRENDIZADO_DIA),
+    "aprendizado": (FILA_APRENDIZADO, FILA_APRENDIZADO_DIA),
+    "revisao": (FILA_REVISAO,),
+}
+
+SEPARADOR_BARALHO = "::"
+
+
+def ler_horario(texto):
+    """'HH:MM' -> minutos desde a meia-noite."""
+    horas, minutos = texto.strip().split(":")
+    horas, minutos = int(horas), int(minutos)
+    if not (0 <= horas < 24 and 0 <= minutos < 60):
+        raise ValueError(texto)
+    return horas * 60 + minutos
+
+
+def compilar_silencio(texto):
+    """'22:00-07:00' -> predicado(minuto_do_dia). Intervalos podem atravessar a meia-noite."""
+    inicio, fim = (ler_horario(parte) for parte in texto.split("-"))
+    if inicio <= fim:
+        return lambda minuto: inicio <= minuto < fim
+    return lambda minuto: minuto >= inicio or minuto < fim
+
+
+class RegraCompilada:
+    """Uma regra já transformada em predicados; guarda a própria referência e o último disparo."""
+
+    def __init__(self, bruta, nome_baralho):
+        if not isinstance(bruta, dict):
+            raise ValueError(bruta)
+        self.baralho = bruta.get("baralho") or None
+        self.filas = FILAS_REGRA[bruta.get("fila", "todas")]
+        self.indices_filas = tuple(INDICE_FILA[fila] for fila in self.filas)
+        self.minimo = int(bruta.get("minimo", 1))
+        self.espacamento = int(bruta.get("espacamento_minutos", 0)) * 60
+        self.som = bool(bruta.get("som", True))
+        silencio = bruta.get("silencio")
+        self.em_silencio = compilar_silencio(silencio) if silencio else (lambda minuto: False)
+        if self.minimo < 1 or self.espacamento < 0:
+            raise ValueError(bruta)
+
+        self.nome_baralho = nome_baralho  # Compartilhado por todas as regras (ver MotorRegras)
+        self.referencia = None
+        self.ultimo_disparo = 0
+
+    def aceita_baralho(self, did):
+        if self.baralho is None:
+            return True
+        nome = self.nome_baralho(did)
+        return nome == self.baralho or nome.startswith(self.baralho + SEPARADOR_BARALHO)
+
+    def total(self, foto):
+        """Cartões vencidos que a regra aceita, somados a partir das contagens por baralho."""
+        return sum(
+            contagens[i]
+            for did, contagens in foto.por_baralho.items() if self.aceita_baralho(did)
+            for i in self.indices_filas
+        )
+
+    def novos(self, foto, diferencas, descrever):
+        """
+        Cartões aceitos que venceram desde a referência (pela diferença dos ids).
+        'diferencas' guarda o (did, fila) dos cartões novos por referência: regras que
+        partem da mesma foto fazem a intercalação e a consulta ao cache uma vez só.
+        """
+        anterior = self.referencia
+        if anterior.vencidos_ids is None or foto.vencidos_ids is None:
+            return max(self.total(foto) - self.total(anterior), 0)
+        novos = diferencas.get(id(anterior))
+        if novos is None:
+            ids = diferenca_ordenada(anterior.vencidos_ids, foto.vencidos_ids)[0]
+            novos = diferencas[id(anterior)] = descrever(ids)
+        return sum(1 for did, fila in novos if fila in self.filas and self.aceita_baralho(did))
+
+    def avaliar(self, foto, agora, diferencas, descrever):
+        """Retorna (novos, total) se a regra disparar, senão None."""
+        if self.referencia is None:
+            self.referencia = foto
+            return None
+        novos = self.novos(foto, diferencas, descrever)
+        if not novos:
+            # Nada novo: os cartões que saíram da contagem também saem da referência
+            self.referencia = foto
+            return None
+        total = self.total(foto)
+        if total < self.minimo:
+            return None
+        local = time.localtime(agora)
+        if self.em_silencio(local.tm_hour * 60 + local.tm_min):
+            return None
+        if agora - self.ultimo_disparo < self.espacamento:
+            return None
+        self.referencia = foto
+        self.ultimo_disparo = agora
+        return novos, total
+
+
+class MotorRegras:
+    """Lista de regras compiladas; sem regras, o notificador usa o aviso padrão."""
+
+    def __init__(self):
+        self.regras = []
+        self.invalidas = 0
+        self.resolver_nome = None
+        self.nomes_baralhos = {}  # did -> nome, resolvido uma vez para todas as regras
+
+    @property
+    def ativo(self):
+        return bool(self.regras)
+
+    def compilar(self, brutas, nome_baralho):
+        """Compila as regras do config. Regras inválidas são ignoradas (e contadas)."""
+        self.regras = []
+        self.invalidas = 0
+        self.resolver_nome = nome_baralho
+        self.nomes_baralhos = {}
+        for bruta in brutas or []:
+            try:
+                self.regras.append(RegraCompilada(bruta, self.nome_baralho))
+            except:
+                self.invalidas += 1
+
+    def nome_baralho(self, did):
+        """Nome do baralho, consultado uma vez por baralho por mais regras que existam."""
+        nome = self.nomes_baralhos.get(did)
+        if nome is None:
+            try:
+                nome = self.resolver_nome(did) or ""
+            except:
+                nome = ""
+            self.nomes_baralhos[did] = nome
+        return nome
+
+    def esquecer_baralhos(self):
+        """Baralhos renomeados, movidos ou apagados: os nomes já resolvidos deixam de valer."""
+        self.nomes_baralhos.clear()
+
+    def referenciar(self, foto):
+        """Toma 'foto' como já vista por todas as regras (janela aberta, esconder)."""
+        for regra in self.regras:
+            regra.referencia = foto
+
+    def avaliar(self, foto, descrever, agora=None):
+        """
+        Retorna [(regra, novos, total)] das regras que dispararam nesta foto.
+        'descrever(ids)' dá o [(did, fila)] dos cartões novos (CacheContagem.descrever).
+        """
+        agora = int(time.time()) if agora is None else agora
+        disparos = []
+        diferencas = {}
+        for regra in self.regras:
+            resultado = regra.avaliar(foto, agora, diferencas, descrever)
+            if resultado:
+                disparos.append((regra,) + resultado)
+        return disparos
+
+    def estatisticas(self):
+        return {"regras": len(self.regras), "invalidas": self.invalidas}
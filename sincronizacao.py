@@ -0,0 +1,128 @@
+# -------------------------------------------------------------------------
+# Copyright © 2025 Caio Graco Purita. Todos os direitos reservados.
+# ARQUIVO: sincronizacao.py
+# -------------------------------------------------------------------------
+import time
+from aqt import mw
+from aqt.qt import *
+from .executor import executor
+from .configuracao import config_addon
+
+
+class AgendadorSincronizacao:
+    """
+    Decide quando as sincronizações automáticas (bandeja e relógio) realmente acontecem.
+    - Pula a ida à rede se a coleção não mudou desde a última sincronização bem-sucedida
+      (col.mod <= col.ls), a menos que a última tenha sido há mais de 'intervalo_sinc_remota'
+      minutos (para trazer revisões feitas em outros aparelhos).
+    - Agrupa alternâncias rápidas de esconder/mostrar (debounce).
+    - Após falhas, espera de forma exponencial antes de tentar de novo.
+    """
+
+    ATRASO_DEBOUNCE_MS = 5000
+    ESPERA_BASE_S = 60
+    ESPERA_MAXIMA_S = 3600
+
+    def __init__(self):
+        self.temporizador = None  # Criado no primeiro pedido
+        self.callbacks_pendentes = []
+        self.falhas_seguidas = 0
+        self.bloqueado_ate = 0
+        self.ultimo_sucesso = 0
+
+    def _obter_intervalo_remoto(self):
+        minutos = config_addon.obter("intervalo_sinc_remota", 60)
+        return minutos * 60
+
+    def precisa_sincronizar(self):
+        """
+        Verdadeiro se há alterações locais ou se faz tempo que não buscamos as remotas.
+        Sem login no AnkiWeb é sempre falso: o Anki abriria a janela de login a partir da bandeja.
+        """
+        try:
+            if not mw.col or not mw.pm.sync_auth(): return False
+            modificado, ultima_sinc = mw.col.db.first("SELECT mod, ls FROM col")
+            if modificado > ultima_sinc:
+                return True
+            return time.time() - self.ultimo_sucesso >= self._obter_intervalo_remoto()
+        except:
+            return False
+
+    def em_espera(self):
+        return time.time() < self.bloqueado_ate
+
+    def solicitar(self, ao_concluir=None, atraso_ms=None):
+        """
+        Pede uma sincronização. Pedidos dentro da janela de debounce se fundem num só.
+        'ao_concluir(sincronizou)' é sempre chamado, mesmo quando a sincronização é pulada.
+        """
+        if self.em_espera():
+            # Durante o recuo exponencial, quem espera resposta é liberado na hora
+            if ao_concluir:
+                ao_concluir(False)
+                return
+            atraso_ms = max(atraso_ms or 0, int((self.bloqueado_ate - time.time()) * 1000))
+
+        if ao_concluir: self.callbacks_pendentes.append(ao_concluir)
+        if atraso_ms is None:
+            atraso_ms = self.ATRASO_DEBOUNCE_MS
+        if self.temporizador is None:
+            self.temporizador = QTimer(mw)
+            self.temporizador.setSingleShot(True)
+            self.temporizador.timeout.connect(self._executar)
+        self.temporizador.start(atraso_ms)
+
+    def cancelar_pendente(self):
+        """Descarta o pedido ainda em debounce (ex: a janela voltou antes do prazo)."""
+        if not self.temporizador or not self.temporizador.isActive():
+            return
+        self.temporizador.stop()
+        self._entregar(False)
+
+    def _entregar(self, sincronizou):
+        callbacks, self.callbacks_pendentes = self.callbacks_pendentes, []
+        for callback in callbacks:
+            try:
+                callback(sincronizou)
+            except:
+                pass
+
+    def _executar(self):
+        # Quem pedir a partir daqui aguarda a próxima rodada, não a atual
+        callbacks, self.callbacks_pendentes = self.callbacks_pendentes, []
+
+        def entregar(sincronizou):
+            for callback in callbacks:
+                try:
+                    callback(sincronizou)
+                except:
+                    pass
+
+        if not self.precisa_sincronizar():
+            entregar(False)
+            return
+
+        def ao_terminar(iniciou):
+            try:
+                modificado, ultima_sinc = mw.col.db.first("SELECT mod, ls FROM col")
+                # O Anki só alcança 'ls' >= 'mod' quando as alterações locais subiram
+                sucesso = iniciou and modificado <= ultima_sinc
+            except:
+                sucesso = False
+            self._registrar_resultado(sucesso)
+            entregar(sucesso)
+
+        executor.sincronizar(ao_terminar)
+
+    def _registrar_resultado(self, sucesso):
+        if sucesso:
+            self.falhas_seguidas = 0
+            self.bloqueado_ate = 0
+            self.ultimo_sucesso = time.time()
+            return
+        self.falhas_seguidas += 1
+        espera = min(self.ESPERA_MAXIMA_S, self.ESPERA_BASE_S * 2 ** (self.falhas_seguidas - 1))
+        self.bloqueado_ate = time.time() + espera
+
+
+agendador_sinc = AgendadorSincronizacao()
@@ -0,0 +1,260 @@
+# -------------------------------------------------------------------------
+# Copyright © 2025 Caio Graco Purita. Todos os direitos reservados.
+# ARQUIVO: templates/tools/benchmark/aqt_falso.py
+# -------------------------------------------------------------------------
+"""
+Substituto mínimo do pacote 'aqt' do Anki para rodar o add-on fora do Anki
+(Linux sem tela, Qt em modo 'offscreen'). Só existe para os benchmarks.
+"""
+import copy
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import types
+from concurrent.futures import ThreadPoolExecutor
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt6 import QtCore, QtGui, QtNetwork, QtWidgets
+from PyQt6.QtCore import QTimer
+from PyQt6.QtGui import QColor, QIcon, QPixmap
+from PyQt6.QtWidgets import QApplication, QMainWindow, QMenu
+
+
+class Gancho(list):
+    """Imita os ganchos do aqt: lista de funções com append/remove e chamada."""
+
+    def __call__(self, *args):
+        for funcao in list(self):
+            funcao(*args)
+
+
+class GanchosFalsos:
+    """Qualquer gancho pedido é criado na hora (gui_hooks.qualquer_nome)."""
+
+    def __getattr__(self, nome):
+        gancho = Gancho()
+        setattr(self, nome, gancho)
+        return gancho
+
+
+class BancoFalso:
+    def __init__(self, conexao):
+        self.conexao = conexao
+
+    def all(self, sql, *args):
+        return self.conexao.execute(sql, args).fetchall()
+
+    def first(self, sql, *args):
+        return self.conexao.execute(sql, args).fetchone()
+
+    def scalar(self, sql, *args):
+        linha = self.conexao.execute(sql, args).fetchone()
+        return linha[0] if linha else None
+
+    def execute(self, sql, *args):
+        self.conexao.execute(sql, args)
+        self.conexao.commit()
+
+
+class BaralhosFalsos:
+    """Nomes resolvidos pelo backend do Anki (aqui, sem consulta)."""
+
+    def __init__(self):
+        self.selecionado = None
+
+    def name(self, did):
+        return f"Baralho {did}"
+
+    def select(self, did):
+        self.selecionado = did
+
+
+class ColecaoFalsa:
+    """
+    Coleção aberta sobre um collection.anki2 sintético (ver colecao_sintetica.py).
+    Segura o arquivo como o rslib: WAL com locking_mode = exclusive, então nenhuma outra
+    conexão consegue ler o banco enquanto ela estiver aberta.
+    """
+
+    def __init__(self, caminho):
+        self.path = caminho
+        self.conexao = sqlite3.connect(caminho, check_same_thread=False)
+        self.conexao.execute("PRAGMA locking_mode = exclusive")
+        self.conexao.execute("PRAGMA journal_mode = wal")
+        # A primeira leitura toma a trava, e ela só é solta no close()
+        self.conexao.execute("SELECT 1 FROM col").fetchone()
+        self.db = BancoFalso(self.conexao)
+        self.decks = BaralhosFalsos()
+        self.sessoes_iniciadas = 0
+
+    def startTimebox(self):
+        self.sessoes_iniciadas += 1
+
+    @property
+    def mod(self):
+        return self.db.scalar("SELECT mod FROM col")
+
+    @property
+    def crt(self):
+        return self.db.scalar("SELECT crt FROM col")
+
+    def get_config(self, chave, padrao=None):
+        valor = self.db.scalar("SELECT val FROM config WHERE KEY = ?", chave)
+        return padrao if valor is None else json.loads(valor)
+
+    def close(self):
+        self.conexao.close()
+
+
+class GerenciadorTarefasFalso(QtCore.QObject):
+    """Imita mw.taskman: tarefas num pool de threads, on_done entregue na thread principal."""
+
+    _pendente = QtCore.pyqtSignal(object)
+
+    def __init__(self, pai):
+        super().__init__(pai)
+        self.pool = ThreadPoolExecutor()
+        self._pendente.connect(self._rodar)
+
+    def run_in_background(self, task, on_done=None, args=None, uses_collection=True):
+        futuro = self.pool.submit(task, **(args or {}))
+        if on_done is not None:
+            futuro.add_done_callback(lambda f: self.run_on_main(lambda: on_done(f)))
+        return futuro
+
+    def run_on_main(self, funcao):
+        self._pendente.emit(funcao)
+
+    def _rodar(self, funcao):
+        funcao()
+
+
+class AddonManagerFalso:
+    def __init__(self, pasta_addon):
+        with open(os.path.join(pasta_addon, "config.json"), encoding="utf-8") as f:
+            self.config = json.load(f)
+        self.acoes = {}
+        self.escritas = 0
+
+    def addonFromModule(self, modulo):
+        return modulo.split(".")[0]
+
+    def getConfig(self, modulo):
+        return copy.deepcopy(self.config)
+
+    def writeConfig(self, modulo, config):
+        self.escritas += 1
+        self.config = copy.deepcopy(config)
+
+    def setConfigUpdatedAction(self, modulo, acao):
+        self.acoes[self.addonFromModule(modulo)] = acao
+
+
+class NavegadorBaralhosFalso:
+    """Conta quantas vezes a tela inicial seria redesenhada."""
+
+    def __init__(self, janela):
+        self.janela = janela
+        self.redesenhos = 0
+
+    def refresh(self):
+        self.redesenhos += 1
+
+    def show(self):
+        self.janela.state = "deckBrowser"
+        self.refresh()
+
+
+class JanelaPrincipalFalsa(QMainWindow):
+    def __init__(self, pasta_addon):
+        super().__init__()
+        self.col = None
+        self.state = "deckBrowser"
+        self.lang = "en"
+        self.addonManager = AddonManagerFalso(pasta_addon)
+        self.taskman = GerenciadorTarefasFalso(self)
+        self.deckBrowser = NavegadorBaralhosFalso(self)
+        self.form = types.SimpleNamespace(menuTools=QMenu(self))
+        # Pasta de perfis temporária: dá nome ao servidor de instância única
+        self.pm = types.SimpleNamespace(
+            name="bench", base=tempfile.mkdtemp(prefix="ankitraypro_pm_"), profiles=lambda: ["bench"],
+            sync_auth=lambda: types.SimpleNamespace(hkey="bench")
+        )
+        self.sincronizacoes = 0
+        self.revisoes_abertas = 0
+        # Quanto tempo a sincronização falsa "demora" antes de disparar sync_did_finish
+        self.atraso_sinc_ms = 0
+
+        pixmap = QPixmap(32, 32)
+        pixmap.fill(QColor("#2a7ae2"))
+        self.setWindowIcon(QIcon(pixmap))
+
+    def moveToState(self, estado):
+        self.state = estado
+        if estado == "review":
+            self.revisoes_abertas += 1
+
+    def onSync(self):
+        self.sincronizacoes += 1
+        gui_hooks.sync_will_start()
+
+        def terminar():
+            if self.col:
+                self.col.db.execute("UPDATE col SET ls = mod")
+            gui_hooks.sync_did_finish()
+
+        QTimer.singleShot(self.atraso_sinc_ms, terminar)
+
+
+def _filtrar_mensagens_qt(tipo, contexto, mensagem):
+    # A plataforma 'offscreen' reclama de raise()/bandeja a cada chamada; só interessa o resto
+    if "does not support" in mensagem or "QSystemTrayIcon" in mensagem:
+        return
+    sys.stderr.write(mensagem + "\n")
+
+
+QtCore.qInstallMessageHandler(_filtrar_mensagens_qt)
+app = QApplication.instance() or QApplication(sys.argv[:1])
+gui_hooks = GanchosFalsos()
+mw = None
+
+
+def instalar(pasta_addon):
+    """Registra os módulos falsos em sys.modules. Deve rodar antes de importar o add-on."""
+    global mw
+    mw = JanelaPrincipalFalsa(pasta_addon)
+
+    modulo_qt = types.ModuleType("aqt.qt")
+    for origem in (QtCore, QtGui, QtWidgets, QtNetwork):
+        for nome in dir(origem):
+            if not nome.startswith("_"):
+                setattr(modulo_qt, nome, getattr(origem, nome))
+
+    modulo_utils = types.ModuleType("aqt.utils")
+    modulo_utils.showWarning = lambda texto, *args, **kwargs: print("[aviso]", texto)
+    modulo_utils.showInfo = lambda texto, *args, **kwargs: print("[info]", texto)
+    modulo_utils.tooltip = lambda texto, *args, **kwargs: None
+
+    modulo_aqt = types.ModuleType("aqt")
+    modulo_aqt.mw = mw
+    modulo_aqt.gui_hooks = gui_hooks
+    modulo_aqt.qt = modulo_qt
+    modulo_aqt.utils = modulo_utils
+
+    sys.modules["aqt"] = modulo_aqt
+    sys.modules["aqt.qt"] = modulo_qt
+    sys.modules["aqt.utils"] = modulo_utils
+    return mw
+
+
+def processar_eventos_ate(condicao, limite_s=30.0):
+    """Roda o laço de eventos do Qt até 'condicao()' ser verdadeira (ou estourar o limite)."""
+    temporizador = QtCore.QElapsedTimer()
+    temporizador.start()
+    while not condicao():
+        app.processEvents(QtCore.QEventLoop.ProcessEventsFlag.AllEvents, 10)
+        if temporizador.elapsed() > limite_s * 1000:
+            raise TimeoutError("condição não satisfeita em {} s".format(limite_s))
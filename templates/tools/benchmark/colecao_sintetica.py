@@ -0,0 +1,130 @@
+# -------------------------------------------------------------------------
+# Copyright © 2025 Caio Graco Purita. Todos os direitos reservados.
+# ARQUIVO: templates/tools/benchmark/colecao_sintetica.py
+# -------------------------------------------------------------------------
+"""
+Gera arquivos collection.anki2 sintéticos (apenas as tabelas que o add-on lê),
+com distribuição de filas e vencimentos parecida com a de coleções reais.
+"""
+import json
+import os
+import random
+import sqlite3
+import time
+
+ESQUEMA = """
+CREATE TABLE col (
+    id integer PRIMARY KEY, crt integer NOT NULL, mod integer NOT NULL, scm integer NOT NULL,
+    ver integer NOT NULL, dty integer NOT NULL, usn integer NOT NULL, ls integer NOT NULL,
+    conf text NOT NULL, models text NOT NULL, decks text NOT NULL, dconf text NOT NULL, tags text NOT NULL
+);
+CREATE TABLE cards (
+    id integer PRIMARY KEY, nid integer NOT NULL, did integer NOT NULL, ord integer NOT NULL,
+    mod integer NOT NULL, usn integer NOT NULL, type integer NOT NULL, queue integer NOT NULL,
+    due integer NOT NULL, ivl integer NOT NULL, factor integer NOT NULL, reps integer NOT NULL,
+    lapses integer NOT NULL, left integer NOT NULL, odue integer NOT NULL, odid integer NOT NULL,
+    flags integer NOT NULL, data text NOT NULL
+);
+CREATE TABLE config (
+    KEY text NOT NULL PRIMARY KEY, usn integer NOT NULL, mtime_secs integer NOT NULL, val blob NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE graves (
+    oid integer NOT NULL, type integer NOT NULL, usn integer NOT NULL, PRIMARY KEY (oid, type)
+) WITHOUT ROWID;
+CREATE INDEX ix_cards_usn ON cards (usn);
+CREATE INDEX ix_cards_nid ON cards (nid);
+CREATE INDEX ix_cards_sched ON cards (did, queue, due);
+"""
+
+# (fila, tipo, peso) — proporções típicas de uma coleção madura
+DISTRIBUICAO_FILAS = [
+    (0, 0, 0.25),    # novos
+    (1, 1, 0.01),    # aprendizado (due em segundos)
+    (2, 2, 0.63),    # revisão (due em dias)
+    (3, 3, 0.01),    # aprendizado com passos de dias
+    (-1, 2, 0.06),   # suspensos
+    (-2, 2, 0.02),   # enterrados
+    (-3, 2, 0.02),   # enterrados manualmente
+]
+
+DIAS_DE_USO = 1500
+
+
+def _sortear_fila(aleatorio):
+    alvo = aleatorio.random()
+    acumulado = 0.0
+    for fila, tipo, peso in DISTRIBUICAO_FILAS:
+        acumulado += peso
+        if alvo <= acumulado:
+            return fila, tipo
+    return DISTRIBUICAO_FILAS[-1][:2]
+
+
+def gerar_colecao(caminho, total_cartoes, baralhos=40, semente=42, fracao_modificada=0.002):
+    """
+    Cria (ou recria) 'caminho' com 'total_cartoes' cartões em 'baralhos' baralhos.
+    'fracao_modificada' dos cartões fica com usn = -1 (alterados desde a última sincronização).
+    Retorna o número do dia de estudo atual da coleção.
+    """
+    if os.path.exists(caminho):
+        os.remove(caminho)
+    for sufixo in ("-wal", "-shm"):
+        if os.path.exists(caminho + sufixo):
+            os.remove(caminho + sufixo)
+
+    aleatorio = random.Random(semente)
+    agora = int(time.time())
+    criacao = agora - DIAS_DE_USO * 86400
+    hoje = DIAS_DE_USO
+
+    conexao = sqlite3.connect(caminho)
+    conexao.execute("PRAGMA journal_mode = WAL")
+    conexao.executescript(ESQUEMA)
+    conexao.execute(
+        "INSERT INTO col VALUES (1, ?, ?, ?, 18, 0, 0, ?, '', '', '', '', '')",
+        (criacao, agora * 1000, agora * 1000, (agora - 3600) * 1000)
+    )
+    for chave, valor in (("rollover", 4), ("collapseTime", 1200)):
+        conexao.execute("INSERT INTO config VALUES (?, 0, ?, ?)", (chave, agora, json.dumps(valor).encode()))
+
+    def linhas():
+        for indice in range(total_cartoes):
+            fila, tipo = _sortear_fila(aleatorio)
+            if fila == 1:
+                due = agora + aleatorio.randint(-1800, 86400)
+            elif fila in (2, 3, -1, -2, -3):
+                # Vencimentos concentrados nos próximos dias, com cauda longa no futuro
+                due = hoje + int(aleatorio.expovariate(1 / 30.0)) - aleatorio.randint(0, 3)
+            else:
+                due = indice
+            modificado = aleatorio.random() < fracao_modificada
+            yield (
+                1_500_000_000_000 + indice, indice, 1 + indice % baralhos, 0,
+                agora - (0 if modificado else aleatorio.randint(3600, 86400 * 90)),
+                -1 if modificado else 100, tipo, fila, due, 10, 2500, 5, 0, 0, 0, 0, 0, ""
+            )
+
+    conexao.executemany("INSERT INTO cards VALUES (" + ",".join("?" * 18) + ")", linhas())
+    conexao.commit()
+    conexao.close()
+    return hoje
+
+
+def simular_revisoes(conexao, quantidade, semente=7):
+    """
+    Simula 'quantidade' respostas locais: empurra cartões vencidos para o futuro.
+    Grava pela 'conexao' da coleção aberta (a coleção segura o arquivo só para ela).
+    """
+    aleatorio = random.Random(semente)
+    agora = int(time.time())
+    ids = [linha[0] for linha in conexao.execute(
+        "SELECT id FROM cards WHERE queue = 2 ORDER BY due LIMIT ?", (quantidade * 4,)
+    )]
+    for cid in aleatorio.sample(ids, min(quantidade, len(ids))):
+        conexao.execute(
+            "UPDATE cards SET due = due + ?, mod = ?, usn = -1 WHERE id = ?",
+            (aleatorio.randint(2, 40), agora, cid)
+        )
+    # Cada rodada precisa de um carimbo novo, mesmo dentro do mesmo segundo
+    conexao.execute("UPDATE col SET mod = max(mod + 1, ?)", (agora * 1000,))
+    conexao.commit()
@@ -0,0 +1,363 @@
+# -------------------------------------------------------------------------
+# Copyright © 2025 Caio Graco Purita. Todos os direitos reservados.
+# ARQUIVO: templates/tools/benchmark/executar.py
+# -------------------------------------------------------------------------
+"""
+Benchmarks do Anki Tray Pro fora do Anki (Linux sem tela, Qt 'offscreen').
+
+Uso:
+    python templates/tools/benchmark/executar.py                       # compara com a linha de base
+    python templates/tools/benchmark/executar.py --gravar-linha-base   # atualiza a linha de base
+    python templates/tools/benchmark/executar.py --tamanhos 10000,1000000,5000000
+
+Sai com código 1 se alguma métrica piorar além da tolerância em relação a linha_base.json.
+"""
+import argparse
+import importlib.util
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+PASTA_BENCHMARK = Path(__file__).resolve().parent
+PASTA_ADDON = PASTA_BENCHMARK.parent.parent.parent
+ARQUIVO_LINHA_BASE = PASTA_BENCHMARK / "linha_base.json"
+NOME_PACOTE = "AnkiTrayPro"
+# Consultado antes de aqt_falso.instalar() ocupar o nome 'aqt'
+AQT_REAL_INSTALADO = importlib.util.find_spec("aqt") is not None
+
+sys.path.insert(0, str(PASTA_BENCHMARK))
+import aqt_falso
+from colecao_sintetica import gerar_colecao, simular_revisoes
+
+
+def importar_addon():
+    """Importa o add-on como o Anki faria e mede o tempo gasto."""
+    spec = importlib.util.spec_from_file_location(
+        NOME_PACOTE, PASTA_ADDON / "__init__.py", submodule_search_locations=[str(PASTA_ADDON)]
+    )
+    modulo = importlib.util.module_from_spec(spec)
+    sys.modules[NOME_PACOTE] = modulo
+    inicio = time.perf_counter()
+    spec.loader.exec_module(modulo)
+    return modulo, (time.perf_counter() - inicio) * 1000
+
+
+def cronometrar(funcao, repeticoes, preparar=None):
+    """Mediana (ms) de 'repeticoes' execuções; 'preparar' roda antes de cada uma, fora do tempo."""
+    amostras = []
+    for _ in range(repeticoes):
+        if preparar:
+            preparar()
+        inicio = time.perf_counter()
+        funcao()
+        amostras.append((time.perf_counter() - inicio) * 1000)
+    return round(statistics.median(amostras), 3)
+
+
+def medir_processo(comando):
+    """Tempo de parede (ms) e pico de memória (KiB) de um processo filho, do início ao fim."""
+    inicio = time.perf_counter()
+    processo = subprocess.Popen(comando, env=dict(os.environ, QT_QPA_PLATFORM="offscreen"))
+    _, status, uso = os.wait4(processo.pid, 0)
+    processo.returncode = os.waitstatus_to_exitcode(status)
+    if processo.returncode:
+        raise RuntimeError("processo falhou: " + " ".join(comando))
+    return round((time.perf_counter() - inicio) * 1000, 1), uso.ru_maxrss
+
+
+def medir_inicio_minimizado(caminho, pasta_dados, repeticoes):
+    """
+    Boot minimizado até a primeira contagem, em processos novos:
+    - leve: iniciar_leve.py (o caminho do atalho no modo leve);
+    - completo: o add-on inteiro num host falso (limite inferior: o Anki de verdade ainda
+      carrega o próprio aqt, a coleção e o webview; ver 'aqt_real' quando ele estiver instalado).
+    """
+    arquivo_estado = os.path.join(pasta_dados, "notificador_leve.json")
+    with open(arquivo_estado, "w", encoding="utf-8") as f:
+        json.dump({"colecao": caminho, "perfil": "bench", "idioma": "en"}, f)
+
+    comandos = {
+        "leve": [sys.executable, str(PASTA_ADDON / "iniciar_leve.py"), "--anki", sys.executable,
+                 "--estado", arquivo_estado, "--sair-apos-contagem"],
+        "completo": [sys.executable, __file__, "--processo-completo", caminho],
+    }
+    if AQT_REAL_INSTALADO:
+        comandos["aqt_real"] = [sys.executable, "-c", "import aqt"]
+
+    resultados = {}
+    for nome, comando in comandos.items():
+        amostras = [medir_processo(comando) for _ in range(max(1, repeticoes // 3))]
+        resultados[f"inicio_{nome}_ms"] = statistics.median(ms for ms, _ in amostras)
+        resultados[f"inicio_{nome}_rss_kib"] = max(rss for _, rss in amostras)
+    return resultados
+
+
+def redirecionar_instantaneo(pasta_dados):
+    """O instantâneo do notificador vai para a pasta dos dados do benchmark, não para user_files."""
+    instantaneo = sys.modules[NOME_PACOTE + ".instantaneo"]
+    instantaneo.ARQUIVO_INSTANTANEO = os.path.join(pasta_dados, "instantaneo_notificador.json")
+
+
+def processo_completo(caminho):
+    """Filho de medir_inicio_minimizado: boot minimizado com o add-on completo."""
+    aqt_falso.instalar(str(PASTA_ADDON))
+    addon, _ = importar_addon()
+    redirecionar_instantaneo(os.path.dirname(caminho))
+    addon.inicializar_addon()
+    aqt_falso.mw.col = aqt_falso.ColecaoFalsa(caminho)
+    aqt_falso.mw.show()
+    tray = sys.modules[NOME_PACOTE + ".tray"]
+    notificacoes = sys.modules[NOME_PACOTE + ".notifications"]
+    executor_mod = sys.modules[NOME_PACOTE + ".executor"]
+    tray.gerenciador_bandeja.esconder_para_bandeja()
+    notificacoes.notificador.verificar_inicializacao(True)
+    aqt_falso.processar_eventos_ate(lambda: not executor_mod.executor.ocupado(executor_mod.TAREFA_CONTAGEM))
+    return 0
+
+
+def medir_tamanho(addon, caminho, repeticoes):
+    mw = aqt_falso.mw
+    notificacoes = sys.modules[NOME_PACOTE + ".notifications"]
+    tray = sys.modules[NOME_PACOTE + ".tray"]
+    executor_mod = sys.modules[NOME_PACOTE + ".executor"]
+    notificador = notificacoes.notificador
+    bandeja = tray.gerenciador_bandeja
+    executor = executor_mod.executor
+
+    if mw.col:
+        mw.col.close()
+    mw.col = aqt_falso.ColecaoFalsa(caminho)
+
+    def esperar_executor():
+        aqt_falso.processar_eventos_ate(lambda: not executor.ocupado(executor_mod.TAREFA_CONTAGEM))
+
+    resultados = {}
+
+    # Contagem fria: cache descartado, recontagem completa
+    resultados["contagem_fria_ms"] = cronometrar(
+        notificador.obter_contagem_relevante, repeticoes, preparar=notificador.cache.invalidar
+    )
+
+    # Contagem quente: nada mudou, a resposta sai da memória
+    notificador.obter_contagem_relevante()
+    resultados["contagem_quente_ms"] = cronometrar(notificador.obter_contagem_relevante, repeticoes)
+
+    # Contagem incremental: algumas revisões locais desde a última foto
+    resultados["contagem_incremental_ms"] = cronometrar(
+        notificador.obter_contagem_relevante, repeticoes,
+        preparar=lambda: simular_revisoes(mw.col.conexao, 50)
+    )
+
+    # Comparação de duas fotos pelos ids vencidos (o que decide o aviso de "novos")
+    comparar_fotos = sys.modules[NOME_PACOTE + ".contagem"].comparar_fotos
+    foto_anterior = notificador.obter_foto()
+    simular_revisoes(mw.col.conexao, 50)
+    foto_atual = notificador.obter_foto()
+    resultados["comparacao_fotos_ms"] = cronometrar(lambda: comparar_fotos(foto_anterior, foto_atual), repeticoes)
+
+    # Avaliação de regras de notificação contra as mesmas fotos (nenhuma consulta ao banco)
+    motor = sys.modules[NOME_PACOTE + ".regras"].MotorRegras()
+    motor.compilar([
+        {"baralho": "1", "fila": "revisao", "minimo": 5},
+        {"fila": "aprendizado", "espacamento_minutos": 30},
+        {"silencio": "23:00-06:00"},
+    ], str)
+
+    def avaliar_regras():
+        motor.referenciar(foto_anterior)
+        motor.avaliar(foto_atual, notificador.cache.descrever)
+    resultados["avaliacao_regras_ms"] = cronometrar(avaliar_regras, repeticoes)
+
+    # Instantâneo do notificador: gravar o cache, restaurá-lo e o boot que parte dele
+    # (aviso provisório na hora; a primeira contagem é um acerto se a coleção não mudou)
+    def preparar_gravacao():
+        notificador.chave_instantaneo = None
+    resultados["instantaneo_gravar_ms"] = cronometrar(
+        lambda: notificador.salvar_instantaneo(em_segundo_plano=False), repeticoes, preparar=preparar_gravacao
+    )
+    resultados["instantaneo_kib"] = round(os.path.getsize(
+        sys.modules[NOME_PACOTE + ".instantaneo"].ARQUIVO_INSTANTANEO
+    ) / 1024, 1)
+    resultados["instantaneo_restaurar_ms"] = cronometrar(
+        notificador.restaurar_instantaneo, repeticoes, preparar=notificador.cache.invalidar
+    )
+
+    def boot_quente():
+        notificador.restaurar_instantaneo()
+        notificador.obter_contagem_relevante()
+    completas_antes = notificador.cache.recontagens_completas
+    resultados["contagem_boot_quente_ms"] = cronometrar(boot_quente, repeticoes, preparar=notificador.cache.invalidar)
+    resultados["recontagens_boot_quente"] = notificador.cache.recontagens_completas - completas_antes
+
+    # Esconder/mostrar: custo na thread principal (o que o usuário sente)...
+    mw.show()
+    resultados["esconder_ms"] = cronometrar(
+        bandeja.esconder_para_bandeja, repeticoes, preparar=lambda: (mw.show(), esperar_executor())
+    )
+    resultados["mostrar_ms"] = cronometrar(
+        bandeja.mostrar_janela, repeticoes, preparar=lambda: (mw.hide(), esperar_executor())
+    )
+
+    # ...e o ciclo completo, incluindo o trabalho em segundo plano
+    def ciclo():
+        bandeja.esconder_para_bandeja()
+        esperar_executor()
+        bandeja.mostrar_janela()
+        esperar_executor()
+    resultados["ciclo_completo_ms"] = cronometrar(ciclo, repeticoes)
+
+    # Tick do relógio com a janela visível (sem sincronização) até a contagem chegar
+    def tick():
+        notificador.ao_bater_relogio()
+        esperar_executor()
+    resultados["tick_ms"] = cronometrar(tick, repeticoes)
+
+    # Previsão da bandeja (tooltip/menu): bisect na linha do tempo da última foto, sem SQL
+    resultados["previsao_bandeja_ms"] = cronometrar(bandeja.texto_previsao, repeticoes)
+
+    # Submenu de baralhos da bandeja: montagem a partir da foto (ações reaproveitadas)...
+    notificador.solicitar_contagem()
+    esperar_executor()
+
+    def preparar_menu():
+        bandeja.por_baralho_menu = None
+    resultados["menu_baralhos_ms"] = cronometrar(bandeja._preencher_menu_baralhos, repeticoes, preparar=preparar_menu)
+
+    # ...e a escolha de um baralho: revisor aberto direto, sem redesenhar a lista de baralhos
+    redesenhos_ao_estudar = []
+
+    def escolher_baralho():
+        antes = mw.deckBrowser.redesenhos
+        bandeja.estudar_baralho(bandeja.acoes_baralhos[0].data())
+        esperar_executor()
+        redesenhos_ao_estudar.append(mw.deckBrowser.redesenhos - antes)
+
+    def voltar_para_bandeja():
+        bandeja.esconder_para_bandeja()
+        esperar_executor()
+    resultados["estudar_baralho_ms"] = cronometrar(escolher_baralho, repeticoes, preparar=voltar_para_bandeja)
+    resultados["redesenhos_ao_estudar"] = sum(redesenhos_ao_estudar)
+    # De volta à lista de baralhos, com a janela visível, como antes
+    voltar_para_bandeja()
+    bandeja.mostrar_janela()
+    esperar_executor()
+
+    # Primeira restauração depois do boot minimizado: a frio e depois do preaquecimento
+    preaquecedor = sys.modules[NOME_PACOTE + ".preaquecimento"].preaquecedor
+
+    def restaurar():
+        bandeja.mostrar_janela()
+        esperar_executor()
+
+    def boot_frio():
+        mw.hide()
+        esperar_executor()
+        notificador.cache.invalidar()
+
+    def boot_preaquecido():
+        boot_frio()
+        preaquecedor.agendar(0)
+        aqt_falso.processar_eventos_ate(lambda: preaquecedor.concluido)
+
+    resultados["primeira_restauracao_fria_ms"] = cronometrar(restaurar, repeticoes, preparar=boot_frio)
+    resultados["primeira_restauracao_preaquecida_ms"] = cronometrar(restaurar, repeticoes, preparar=boot_preaquecido)
+
+    # Hibernação na bandeja: custo de descarregar, de reconstruir e memória devolvida
+    hibernacao = sys.modules[NOME_PACOTE + ".hibernacao"].hibernacao
+    notificador.cache.invalidar()
+    notificador.obter_contagem_relevante()  # caches cheios, como depois de horas de uso
+    mw.hide()
+    hibernacao.hibernar()
+    resultados["rss_liberado_kib"] = hibernacao.ultimo_ciclo.get("liberado_kib")
+    resultados["hibernar_ms"] = cronometrar(
+        hibernacao.hibernar, repeticoes, preparar=lambda: (hibernacao.despertar(), mw.hide())
+    )
+    resultados["despertar_ms"] = cronometrar(
+        hibernacao.despertar, repeticoes, preparar=lambda: (mw.hide(), hibernacao.hibernar())
+    )
+
+    resultados["redesenhos_tela_inicial"] = mw.deckBrowser.redesenhos
+    resultados["cache"] = notificador.estatisticas_cache()
+    return resultados
+
+
+def comparar(resultados, linha_base, tolerancia, folga_ms):
+    """Lista as métricas que pioraram além de 'tolerancia' vezes a linha de base (+ folga fixa)."""
+    regressoes = []
+    for chave, valor in resultados.items():
+        if not chave.endswith("_ms"):
+            continue
+        base = linha_base.get(chave)
+        if isinstance(valor, dict):
+            regressoes += comparar(valor, base or {}, tolerancia, folga_ms) if base else []
+            continue
+        if base is not None and valor > base * tolerancia + folga_ms:
+            regressoes.append((chave, base, valor))
+    return regressoes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tamanhos", default="10000,100000", help="tamanhos das coleções, separados por vírgula")
+    parser.add_argument("--repeticoes", type=int, default=15)
+    parser.add_argument("--pasta-dados", default=os.path.join(tempfile.gettempdir(), "ankitraypro_bench"))
+    parser.add_argument("--linha-base", default=str(ARQUIVO_LINHA_BASE))
+    parser.add_argument("--gravar-linha-base", action="store_true")
+    parser.add_argument("--tolerancia", type=float, default=1.5)
+    parser.add_argument("--folga-ms", type=float, default=2.0)
+    parser.add_argument("--processo-completo", metavar="COLECAO", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.processo_completo:
+        return processo_completo(args.processo_completo)
+
+    aqt_falso.instalar(str(PASTA_ADDON))
+    addon, tempo_importacao = importar_addon()
+    addon.inicializar_addon()
+
+    os.makedirs(args.pasta_dados, exist_ok=True)
+    redirecionar_instantaneo(args.pasta_dados)
+    resultados = {"importacao_ms": round(tempo_importacao, 3), "tamanhos": {}}
+
+    for tamanho in [int(t) for t in args.tamanhos.split(",") if t]:
+        caminho = os.path.join(args.pasta_dados, f"colecao_{tamanho}.anki2")
+        inicio = time.perf_counter()
+        gerar_colecao(caminho, tamanho)
+        print(f"[{tamanho}] coleção gerada em {time.perf_counter() - inicio:.1f} s")
+        resultados["tamanhos"][str(tamanho)] = medir_tamanho(addon, caminho, args.repeticoes)
+        # Os processos filhos abrem a mesma coleção: a daqui precisa soltar o arquivo antes
+        aqt_falso.mw.col.close()
+        aqt_falso.mw.col = None
+        resultados["tamanhos"][str(tamanho)].update(medir_inicio_minimizado(caminho, args.pasta_dados, args.repeticoes))
+        print(f"[{tamanho}] " + json.dumps(resultados["tamanhos"][str(tamanho)], ensure_ascii=False))
+
+    print(f"importação: {resultados['importacao_ms']} ms (orçamento {addon.ORCAMENTO_IMPORTACAO_MS} ms)")
+    falhou = resultados["importacao_ms"] > addon.ORCAMENTO_IMPORTACAO_MS
+    if falhou:
+        print("REGRESSÃO: importação acima do orçamento")
+
+    if args.gravar_linha_base:
+        with open(args.linha_base, "w", encoding="utf-8") as f:
+            json.dump(resultados, f, ensure_ascii=False, indent=2)
+        print(f"linha de base gravada em {args.linha_base}")
+    elif os.path.exists(args.linha_base):
+        with open(args.linha_base, encoding="utf-8") as f:
+            linha_base = json.load(f)
+        for tamanho, medidas in resultados["tamanhos"].items():
+            base = linha_base.get("tamanhos", {}).get(tamanho)
+            if not base:
+                continue
+            for chave, antes, depois in comparar(medidas, base, args.tolerancia, args.folga_ms):
+                falhou = True
+                print(f"REGRESSÃO [{tamanho}] {chave}: {antes} ms -> {depois} ms")
+
+    return 1 if falhou else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,46 @@
+# -------------------------------------------------------------------------
+# Copyright © 2025 Caio Graco Purita. Todos os direitos reservados.
+# ARQUIVO: templates/tools/testes/conftest.py
+# -------------------------------------------------------------------------
+"""
+Testes do Anki Tray Pro fora do Anki, sobre o mesmo 'aqt' falso dos benchmarks.
+
+Uso:
+    python -m pytest templates/tools/testes
+
+O add-on é importado como o Anki faria (pacote AnkiTrayPro), sem inicializar_addon():
+os testes usam as classes diretamente.
+"""
+import importlib.util
+import sys
+from pathlib import Path
+
+import pytest
+
+PASTA_TESTES = Path(__file__).resolve().parent
+PASTA_BENCHMARK = PASTA_TESTES.parent / "benchmark"
+PASTA_ADDON = PASTA_TESTES.parent.parent.parent
+NOME_PACOTE = "AnkiTrayPro"
+
+sys.path.insert(0, str(PASTA_BENCHMARK))
+import aqt_falso  # noqa: E402
+from colecao_sintetica import gerar_colecao  # noqa: E402
+
+if NOME_PACOTE not in sys.modules:
+    aqt_falso.instalar(str(PASTA_ADDON))
+    _spec = importlib.util.spec_from_file_location(
+        NOME_PACOTE, PASTA_ADDON / "__init__.py", submodule_search_locations=[str(PASTA_ADDON)]
+    )
+    _modulo = importlib.util.module_from_spec(_spec)
+    sys.modules[NOME_PACOTE] = _modulo
+    _spec.loader.exec_module(_modulo)
+
+
+@pytest.fixture
+def colecao(tmp_path):
+    """Coleção sintética pequena, aberta e travada como o Anki a abre (ver aqt_falso.ColecaoFalsa)."""
+    caminho = str(tmp_path / "collection.anki2")
+    gerar_colecao(caminho, 3000, baralhos=8)
+    col = aqt_falso.ColecaoFalsa(caminho)
+    yield col
+    col.close()
@@ -0,0 +1,29 @@
+# -------------------------------------------------------------------------
+# Copyright © 2025 Caio Graco Purita. Todos os direitos reservados.
+# ARQUIVO: templates/tools/testes/test_bandeja.py
+# -------------------------------------------------------------------------
+from aqt import mw
+
+from AnkiTrayPro import tray
+from AnkiTrayPro.tray import gerenciador_bandeja
+
+
+def test_estudar_baralho_inicia_a_sessao_antes_do_revisor(colecao, monkeypatch):
+    estados = []
+    monkeypatch.setattr(mw, "col", colecao)
+    monkeypatch.setattr(mw, "moveToState", lambda estado: estados.append((estado, colecao.sessoes_iniciadas)))
+    gerenciador_bandeja.estudar_baralho(1)
+    assert estados == [("review", 1)]
+    mw.hide()
+
+
+def test_estudar_baralho_avisa_quando_falha(colecao, monkeypatch):
+    def falhar(did):
+        raise RuntimeError("baralho apagado")
+    avisos = []
+    monkeypatch.setattr(mw, "col", colecao)
+    monkeypatch.setattr(colecao.decks, "select", falhar)
+    monkeypatch.setattr(tray, "tooltip", avisos.append)
+    gerenciador_bandeja.estudar_baralho(1)
+    assert len(avisos) == 1 and "baralho apagado" in avisos[0]
+    mw.hide()
@@ -0,0 +1,47 @@
+# -------------------------------------------------------------------------
+# Copyright © 2025 Caio Graco Purita. Todos os direitos reservados.
+# ARQUIVO: templates/tools/testes/test_configuracao.py
+# -------------------------------------------------------------------------
+from aqt import mw
+
+from AnkiTrayPro.configuracao import ArmazemConfig
+
+
+def _armazem():
+    armazem = ArmazemConfig()
+    armazem.obter("iniciar_com_sistema")  # Carrega antes de contar as escritas
+    mw.addonManager.escritas = 0
+    return armazem
+
+
+def test_ajustar_em_memoria_nao_grava_nem_avisa():
+    armazem = _armazem()
+    avisos = []
+    armazem.assinar(["iniciar_com_sistema"], avisos.append)
+    atual = armazem.obter("iniciar_com_sistema")
+
+    armazem.ajustar_em_memoria({"iniciar_com_sistema": not atual})
+    assert armazem.obter("iniciar_com_sistema") is (not atual)
+    assert mw.addonManager.escritas == 0
+    assert avisos == []
+
+
+def test_definir_grava_o_ajuste_pendente_mesmo_sem_alteracoes():
+    armazem = _armazem()
+    atual = armazem.obter("iniciar_com_sistema")
+    armazem.ajustar_em_memoria({"iniciar_com_sistema": not atual})
+
+    # O usuário só confirmou o diálogo: nada mudou em relação à memória
+    armazem.definir(armazem.copia())
+    assert mw.addonManager.escritas == 1
+    assert mw.addonManager.config["iniciar_com_sistema"] is (not atual)
+
+    armazem.definir(armazem.copia())
+    assert mw.addonManager.escritas == 1
+
+
+def test_definir_sem_mudancas_nao_grava():
+    armazem = _armazem()
+    armazem.ajustar_em_memoria({"iniciar_com_sistema": armazem.obter("iniciar_com_sistema")})
+    armazem.definir(armazem.copia())
+    assert mw.addonManager.escritas == 0
@@ -0,0 +1,218 @@
+# -------------------------------------------------------------------------
+# Copyright © 2025 Caio Graco Purita. Todos os direitos reservados.
+# ARQUIVO: templates/tools/testes/test_contagem.py
+# -------------------------------------------------------------------------
+import datetime
+import time
+from array import array
+
+import pytest
+
+from AnkiTrayPro.contagem import (
+    CacheContagem, ContagemDescartada, FotoContagem, calcular_dia_estudo, comparar_fotos, diferenca_ordenada,
+)
+
+
+# --- Recontagem incremental x completa ---
+
+def _recontar(col):
+    """Foto de referência: cache novo, recontagem completa."""
+    return CacheContagem().obter_foto(col)
+
+
+def _assert_mesma_contagem(foto, referencia):
+    assert foto.total == referencia.total
+    assert foto.por_baralho == referencia.por_baralho
+    assert list(foto.vencidos_ids) == list(referencia.vencidos_ids)
+
+
+def _tocar_colecao(conexao, carimbo=None):
+    """Anda o col.mod como o Anki faz a cada operação (ou o põe em 'carimbo')."""
+    if carimbo is None:
+        conexao.execute("UPDATE col SET mod = max(mod + 1, ?)", (int(time.time() * 1000),))
+    else:
+        conexao.execute("UPDATE col SET mod = ?", (carimbo,))
+    conexao.commit()
+
+
+def _revisao_vencida_sincronizada(conexao, dia, pular=0):
+    return conexao.execute(
+        "SELECT id, due, mod, usn FROM cards WHERE queue = 2 AND due <= ? AND usn != -1 "
+        "ORDER BY id LIMIT 1 OFFSET ?", (dia, pular)
+    ).fetchone()
+
+
+def _responder(conexao, cid, novo_vencimento):
+    conexao.execute(
+        "UPDATE cards SET due = ?, mod = ?, usn = -1 WHERE id = ?", (novo_vencimento, int(time.time()), cid)
+    )
+    _tocar_colecao(conexao)
+
+
+def test_respostas_seguem_pelo_caminho_incremental(colecao):
+    cache = CacheContagem()
+    cache.obter_foto(colecao)
+    completas = cache.recontagens_completas
+
+    for pular in range(3):
+        cid, *_ = _revisao_vencida_sincronizada(colecao.conexao, cache.dia, pular)
+        _responder(colecao.conexao, cid, cache.dia + 5)
+        _assert_mesma_contagem(cache.obter_foto(colecao), _recontar(colecao))
+
+    assert cache.recontagens_completas == completas
+    assert cache.recontagens_incrementais == 3
+
+
+def test_novo_cartao_de_aprendizado_entra_na_contagem(colecao):
+    cache = CacheContagem()
+    antes = cache.obter_foto(colecao)
+    cid, *_ = _revisao_vencida_sincronizada(colecao.conexao, cache.dia)
+    # Esquecido: volta para o aprendizado, vencendo agora
+    colecao.conexao.execute(
+        "UPDATE cards SET queue = 1, type = 3, due = ?, mod = ?, usn = -1 WHERE id = ?",
+        (int(time.time()) - 60, int(time.time()), cid)
+    )
+    _tocar_colecao(colecao.conexao)
+
+    foto = cache.obter_foto(colecao)
+    _assert_mesma_contagem(foto, _recontar(colecao))
+    assert foto.total == antes.total
+    assert foto.aprendizado == antes.aprendizado + 1
+
+
+def test_cartao_apagado_sai_da_contagem(colecao):
+    cache = CacheContagem()
+    antes = cache.obter_foto(colecao)
+    cid, *_ = _revisao_vencida_sincronizada(colecao.conexao, cache.dia)
+    colecao.conexao.execute("DELETE FROM cards WHERE id = ?", (cid,))
+    colecao.conexao.execute("INSERT INTO graves VALUES (?, 0, -1)", (cid,))
+    _tocar_colecao(colecao.conexao)
+
+    foto = cache.obter_foto(colecao)
+    _assert_mesma_contagem(foto, _recontar(colecao))
+    assert foto.total == antes.total - 1
+
+
+def test_desfazer_sem_aviso_volta_a_contar_o_cartao(colecao):
+    """Desfazer devolve o mod e o usn antigos: a varredura incremental não vê o cartão."""
+    cache = CacheContagem()
+    antes = cache.obter_foto(colecao)
+    cid, vencimento, mod, usn = _revisao_vencida_sincronizada(colecao.conexao, cache.dia)
+    _responder(colecao.conexao, cid, cache.dia + 5)
+    assert cache.obter_foto(colecao).total == antes.total - 1
+
+    colecao.conexao.execute("UPDATE cards SET due = ?, mod = ?, usn = ? WHERE id = ?", (vencimento, mod, usn, cid))
+    _tocar_colecao(colecao.conexao)
+
+    foto = cache.obter_foto(colecao)
+    _assert_mesma_contagem(foto, _recontar(colecao))
+    assert foto.total == antes.total
+
+
+def test_desfazer_com_aviso_pede_recontagem_completa(colecao):
+    cache = CacheContagem()
+    cache.obter_foto(colecao)
+    cid, vencimento, mod, usn = _revisao_vencida_sincronizada(colecao.conexao, cache.dia)
+    _responder(colecao.conexao, cid, cache.dia + 5)
+    cache.obter_foto(colecao)
+    # Outro cartão alterado junto com o desfazer: a varredura incremental acharia algo
+    outro, *_ = _revisao_vencida_sincronizada(colecao.conexao, cache.dia)
+    colecao.conexao.execute("UPDATE cards SET due = ?, mod = ?, usn = ? WHERE id = ?", (vencimento, mod, usn, cid))
+    _responder(colecao.conexao, outro, cache.dia + 3)
+
+    completas = cache.recontagens_completas
+    cache.pedir_recontagem()
+    _assert_mesma_contagem(cache.obter_foto(colecao), _recontar(colecao))
+    assert cache.recontagens_completas == completas + 1
+    # O pedido é consumido pela recontagem
+    cache.obter_foto(colecao)
+    assert cache.recontagens_completas == completas + 1
+
+
+def test_carimbo_que_volta_indica_backup_restaurado(colecao):
+    cache = CacheContagem()
+    cache.obter_foto(colecao)
+    carimbo = colecao.mod
+    cid, *_ = _revisao_vencida_sincronizada(colecao.conexao, cache.dia)
+    colecao.conexao.execute("UPDATE cards SET due = ?, usn = 0 WHERE id = ?", (cache.dia + 30, cid))
+    _tocar_colecao(colecao.conexao, carimbo - 60_000)
+
+    completas = cache.recontagens_completas
+    _assert_mesma_contagem(cache.obter_foto(colecao), _recontar(colecao))
+    assert cache.recontagens_completas == completas + 1
+
+
+def test_carimbo_igual_reaproveita_a_foto(colecao):
+    cache = CacheContagem()
+    primeira = cache.obter_foto(colecao)
+    segunda = cache.obter_foto(colecao)
+    assert cache.acertos == 1
+    assert segunda.por_baralho is primeira.por_baralho
+
+
+def test_contagem_pedida_antes_de_invalidar_e_descartada(colecao):
+    cache = CacheContagem()
+    geracao = cache.geracao
+    cache.obter_foto(colecao, geracao)
+    cache.invalidar()
+    with pytest.raises(ContagemDescartada):
+        cache.obter_foto(colecao, geracao)
+    assert cache.carimbo is None
+    assert cache.obter_foto(colecao, cache.geracao).total == _recontar(colecao).total
+
+
+# --- Dia de estudo ---
+
+def _instante(ano, mes, dia, hora, minuto=0):
+    return int(datetime.datetime(ano, mes, dia, hora, minuto).timestamp())
+
+
+def test_dia_de_estudo_conta_a_partir_da_criacao():
+    criacao = _instante(2024, 1, 1, 12)
+    dia, proxima_virada = calcular_dia_estudo(criacao, 4, _instante(2024, 1, 11, 12))
+    assert dia == 10
+    assert proxima_virada == _instante(2024, 1, 12, 4)
+
+
+def test_dia_de_estudo_so_vira_na_hora_da_virada():
+    criacao = _instante(2024, 1, 1, 12)
+    antes, virada_antes = calcular_dia_estudo(criacao, 4, _instante(2024, 1, 11, 3, 59))
+    depois, virada_depois = calcular_dia_estudo(criacao, 4, _instante(2024, 1, 11, 4, 0))
+    assert (antes, depois) == (9, 10)
+    assert virada_antes == _instante(2024, 1, 11, 4)
+    assert virada_depois == _instante(2024, 1, 12, 4)
+
+
+# --- Diferença entre fotos ---
+
+def test_diferenca_ordenada():
+    novos, resolvidos = diferenca_ordenada(array("q", [1, 3, 5, 7]), array("q", [2, 3, 7, 8, 9]))
+    assert list(novos) == [2, 8, 9]
+    assert list(resolvidos) == [1, 5]
+
+
+def test_diferenca_ordenada_nos_extremos():
+    vazio = array("q")
+    assert [list(a) for a in diferenca_ordenada(vazio, vazio)] == [[], []]
+    assert [list(a) for a in diferenca_ordenada(vazio, array("q", [4]))] == [[4], []]
+    assert [list(a) for a in diferenca_ordenada(array("q", [4]), vazio)] == [[], [4]]
+    iguais = array("q", [1, 2, 3])
+    assert [list(a) for a in diferenca_ordenada(iguais, array("q", iguais))] == [[], []]
+
+
+def _foto(por_baralho, ids=None, sem_ids=False):
+    return FotoContagem(por_baralho, 0, 1, 1, 86400, (), None if ids is None else array("q", ids), sem_ids)
+
+
+def test_comparar_fotos_pelos_ids():
+    # Um cartão revisado e outro que venceu: o total não muda, mas há um novo
+    anterior = _foto({1: [0, 2, 0]}, [10, 20])
+    atual = _foto({1: [0, 2, 0]}, [20, 30])
+    assert comparar_fotos(anterior, atual) == (1, 1)
+
+
+def test_comparar_fotos_sem_ids_usa_os_totais():
+    anterior = _foto({1: [0, 2, 0]}, sem_ids=True)
+    atual = _foto({1: [1, 3, 0]}, [1, 2, 3, 4])
+    assert comparar_fotos(anterior, atual) == (2, 0)
+    assert comparar_fotos(atual, anterior) == (0, 2)
@@ -0,0 +1,89 @@
+# -------------------------------------------------------------------------
+# Copyright © 2025 Caio Graco Purita. Todos os direitos reservados.
+# ARQUIVO: templates/tools/testes/test_inicio_sistema.py
+# -------------------------------------------------------------------------
+import pytest
+
+from AnkiTrayPro.inicio_sistema import (
+    BackendInicio, BackendMemoria, BackendXDG, EstadoInicio, citar_argumento_exec,
+)
+
+
+def test_interface_nao_pode_ser_instanciada():
+    with pytest.raises(TypeError):
+        BackendInicio()
+
+
+def test_backend_incompleto_nao_pode_ser_instanciado():
+    class SemRemover(BackendInicio):
+        def ler_estado(self):
+            return None
+
+        def instalar(self, estado):
+            pass
+
+    with pytest.raises(TypeError):
+        SemRemover()
+
+
+def test_aplicar_instala_uma_vez():
+    backend = BackendMemoria()
+    assert backend.aplicar(True, True)
+    assert backend.estado == EstadoInicio(True, "/usr/bin/anki", None)
+    assert not backend.aplicar(True, True)
+    assert backend.escritas == 1
+    assert backend.esta_ativo()
+
+
+def test_aplicar_reescreve_so_o_que_mudou():
+    backend = BackendMemoria()
+    backend.aplicar(True, True)
+    assert backend.aplicar(True, False)
+    assert backend.estado.minimizado is False
+    assert backend.escritas == 2
+
+    backend.executavel = "/opt/anki/anki"
+    assert backend.aplicar(True, False)
+    assert backend.estado.executavel == "/opt/anki/anki"
+    assert backend.escritas == 3
+
+
+def test_desligar_remove_uma_vez():
+    backend = BackendMemoria()
+    assert not backend.aplicar(False, True)
+    assert backend.escritas == 0
+
+    backend.aplicar(True, True)
+    assert backend.aplicar(False, True)
+    assert backend.estado is None
+    assert not backend.aplicar(False, False)
+    assert backend.escritas == 2
+    assert not backend.esta_ativo()
+
+
+def test_modo_leve_so_no_boot_minimizado(monkeypatch):
+    backend = BackendMemoria()
+    monkeypatch.setattr(backend, "procurar_interpretador_leve", lambda: "/usr/bin/python3")
+
+    backend.aplicar(True, False, leve=True)
+    assert backend.estado.interpretador_leve is None
+
+    assert backend.aplicar(True, True, leve=True)
+    assert backend.estado.interpretador_leve == "/usr/bin/python3"
+    assert not backend.aplicar(True, True, leve=True)
+    assert backend.escritas == 2
+
+
+def test_exec_do_desktop_cita_os_caminhos():
+    backend = BackendXDG()
+    estado = EstadoInicio(True, "/opt/Meus Apps/anki", None)
+    assert backend._montar_comando(estado) == 'env ANKI_TRAY_STARTUP=1 "/opt/Meus Apps/anki"'
+    leve = EstadoInicio(True, "/opt/anki", "/usr/bin/python3")
+    assert backend._montar_comando(leve).endswith(' --anki "/opt/anki"')
+
+
+def test_exec_do_desktop_escapa_os_caracteres_reservados():
+    # "a\"b" vira \" na citação e \\" no valor string; '$' e '%' idem
+    assert citar_argumento_exec('/x/a"b') == '"/x/a\\\\"b"'
+    assert citar_argumento_exec("/x/$HOME/100%") == '"/x/\\\\$HOME/100%%"'
+    assert citar_argumento_exec("C:\\anki") == '"C:\\\\\\\\anki"'
@@ -0,0 +1,61 @@
+# -------------------------------------------------------------------------
+# Copyright © 2025 Caio Graco Purita. Todos os direitos reservados.
+# ARQUIVO: templates/tools/testes/test_instantaneo.py
+# -------------------------------------------------------------------------
+import json
+
+from AnkiTrayPro.contagem import CacheContagem
+from AnkiTrayPro.instantaneo import gravar_instantaneo, ler_instantaneo
+
+
+def _gravar(colecao, caminho):
+    cache = CacheContagem()
+    foto = cache.obter_foto(colecao)
+    assert gravar_instantaneo(cache.exportar(), colecao.path, colecao.crt, caminho=caminho)
+    return foto
+
+
+def test_instantaneo_volta_ao_mesmo_estado(colecao, tmp_path):
+    caminho = str(tmp_path / "instantaneo.json")
+    gravada = _gravar(colecao, caminho)
+
+    cache = CacheContagem()
+    restaurada = cache.restaurar(ler_instantaneo(colecao.path, colecao.crt, caminho=caminho))
+    assert restaurada.por_baralho == gravada.por_baralho
+    assert list(restaurada.vencidos_ids) == list(gravada.vencidos_ids)
+
+    # Coleção sem alterações: a primeira contagem da sessão nova é um acerto
+    foto = cache.obter_foto(colecao)
+    assert cache.recontagens_completas == 0 and cache.recontagens_incrementais == 0
+    assert list(foto.vencidos_ids) == list(gravada.vencidos_ids)
+
+
+def test_instantaneo_de_outra_colecao_e_ignorado(colecao, tmp_path):
+    caminho = str(tmp_path / "instantaneo.json")
+    _gravar(colecao, caminho)
+    assert ler_instantaneo(colecao.path + ".outra", colecao.crt, caminho=caminho) is None
+    assert ler_instantaneo(colecao.path, colecao.crt + 1, caminho=caminho) is None
+
+
+def test_instantaneo_vencido_ou_corrompido_e_ignorado(colecao, tmp_path):
+    caminho = str(tmp_path / "instantaneo.json")
+    _gravar(colecao, caminho)
+    with open(caminho, encoding="utf-8") as f:
+        dados = json.load(f)
+    dados["horizonte"] = 0
+    with open(caminho, "w", encoding="utf-8") as f:
+        json.dump(dados, f)
+    assert ler_instantaneo(colecao.path, colecao.crt, caminho=caminho) is None
+
+    with open(caminho, "w", encoding="utf-8") as f:
+        f.write("{corrompido")
+    assert ler_instantaneo(colecao.path, colecao.crt, caminho=caminho) is None
+
+
+def test_exportar_pula_o_estado_ja_gravado(colecao):
+    cache = CacheContagem()
+    cache.obter_foto(colecao)
+    estado = cache.exportar()
+    chave = (estado["carimbo"], estado["ultima_sinc"], estado["dia"])
+    assert cache.exportar(chave) is None
+    assert cache.exportar((chave[0] - 1,) + chave[1:]) is not None
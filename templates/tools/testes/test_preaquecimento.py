@@ -0,0 +1,22 @@
+# -------------------------------------------------------------------------
+# Copyright © 2025 Caio Graco Purita. Todos os direitos reservados.
+# ARQUIVO: templates/tools/testes/test_preaquecimento.py
+# -------------------------------------------------------------------------
+import aqt_falso
+from aqt import mw
+
+from AnkiTrayPro.notifications import notificador
+from AnkiTrayPro.preaquecimento import Preaquecedor
+
+
+def test_contagem_com_erro_nao_trava_o_preaquecimento(colecao, monkeypatch):
+    def falhar():
+        raise RuntimeError("contagem falhou")
+    monkeypatch.setattr(mw, "col", colecao)
+    monkeypatch.setattr(notificador, "obter_foto", falhar)
+    mw.hide()
+
+    preaquecedor = Preaquecedor()
+    preaquecedor.agendar(0)
+    aqt_falso.processar_eventos_ate(lambda: preaquecedor.concluido, limite_s=5.0)
+    assert not preaquecedor.etapas_pendentes
@@ -0,0 +1,137 @@
+# -------------------------------------------------------------------------
+# Copyright © 2025 Caio Graco Purita. Todos os direitos reservados.
+# ARQUIVO: templates/tools/testes/test_regras.py
+# -------------------------------------------------------------------------
+import time
+from array import array
+
+from AnkiTrayPro.contagem import FotoContagem, FILA_APRENDIZADO, FILA_REVISAO
+from AnkiTrayPro.regras import MotorRegras, compilar_silencio
+
+BARALHOS = {1: "Japonês", 2: "Japonês::Kanji", 3: "Japonês antigo", 4: "Inglês"}
+
+
+def _motor(*brutas):
+    motor = MotorRegras()
+    motor.compilar(list(brutas), BARALHOS.get)
+    return motor
+
+
+class _Cartoes:
+    """Faz o papel do cache: fotos montadas a partir de {cid: (did, fila)}."""
+
+    def __init__(self):
+        self.vencidos = {}
+
+    def foto(self):
+        por_baralho = {}
+        for did, fila in self.vencidos.values():
+            contagens = por_baralho.setdefault(did, [0, 0, 0])
+            contagens[0 if fila == FILA_APRENDIZADO else 1] += 1
+        return FotoContagem(por_baralho, int(time.time()), 1, 1, 0, (), array("q", sorted(self.vencidos)))
+
+    def descrever(self, ids):
+        return [self.vencidos[cid] for cid in ids if cid in self.vencidos]
+
+
+def test_compilar_conta_as_regras_invalidas():
+    motor = _motor(
+        {"baralho": "Japonês"},
+        "não é um dicionário",
+        {"fila": "nenhuma"},
+        {"minimo": 0},
+        {"silencio": "25:00-07:00"},
+        {"espacamento_minutos": -1},
+    )
+    assert motor.estatisticas() == {"regras": 1, "invalidas": 5}
+    assert motor.ativo
+
+
+def test_baralho_aceita_os_filhos_mas_nao_os_homonimos():
+    regra = _motor({"baralho": "Japonês"}).regras[0]
+    assert [regra.aceita_baralho(did) for did in (1, 2, 3, 4)] == [True, True, False, False]
+
+
+def test_regras_compartilham_os_nomes_resolvidos():
+    consultas = []
+
+    def nome_baralho(did):
+        consultas.append(did)
+        return BARALHOS.get(did)
+
+    motor = MotorRegras()
+    motor.compilar([{"baralho": "Japonês"}, {"baralho": "Inglês"}, {"baralho": "Japonês::Kanji"}], nome_baralho)
+    foto = FotoContagem({did: [0, 1, 0] for did in BARALHOS}, 0, 1, 1, 0)
+    assert [regra.total(foto) for regra in motor.regras] == [2, 1, 1]
+    assert sorted(consultas) == sorted(BARALHOS)
+
+
+def test_esquecer_baralhos_resolve_os_nomes_de_novo():
+    motor = _motor({"baralho": "Japonês"})
+    regra = motor.regras[0]
+    assert not regra.aceita_baralho(4)
+    BARALHOS[4] = "Japonês::Leitura"
+    try:
+        assert not regra.aceita_baralho(4)
+        motor.esquecer_baralhos()
+        assert regra.aceita_baralho(4)
+    finally:
+        BARALHOS[4] = "Inglês"
+
+
+def test_silencio_atravessa_a_meia_noite():
+    em_silencio = compilar_silencio("22:00-07:00")
+    assert em_silencio(23 * 60) and em_silencio(0) and em_silencio(6 * 60 + 59)
+    assert not em_silencio(7 * 60) and not em_silencio(12 * 60) and not em_silencio(21 * 60 + 59)
+    diurno = compilar_silencio("12:00-13:30")
+    assert diurno(12 * 60 + 45) and not diurno(13 * 60 + 30)
+
+
+def test_regra_dispara_com_os_cartoes_novos_que_aceita():
+    cartoes = _Cartoes()
+    cartoes.vencidos = {10: (1, FILA_REVISAO), 11: (4, FILA_REVISAO)}
+    motor = _motor({"baralho": "Japonês", "fila": "revisao", "minimo": 2})
+    regra = motor.regras[0]
+    assert motor.avaliar(cartoes.foto(), cartoes.descrever) == []  # primeira foto vira a referência
+
+    # Um cartão de outro baralho e um de aprendizado: nada para esta regra
+    cartoes.vencidos.update({12: (4, FILA_REVISAO), 13: (2, FILA_APRENDIZADO)})
+    assert motor.avaliar(cartoes.foto(), cartoes.descrever) == []
+
+    cartoes.vencidos[14] = (2, FILA_REVISAO)
+    assert motor.avaliar(cartoes.foto(), cartoes.descrever) == [(regra, 1, 2)]
+
+
+def test_minimo_segura_os_novos_ate_ser_atingido():
+    cartoes = _Cartoes()
+    motor = _motor({"minimo": 3})
+    motor.avaliar(cartoes.foto(), cartoes.descrever)
+    cartoes.vencidos = {1: (1, FILA_REVISAO), 2: (1, FILA_REVISAO)}
+    assert motor.avaliar(cartoes.foto(), cartoes.descrever) == []
+    cartoes.vencidos[3] = (4, FILA_REVISAO)
+    assert motor.avaliar(cartoes.foto(), cartoes.descrever) == [(motor.regras[0], 3, 3)]
+
+
+def test_espacamento_e_silencio_adiam_o_disparo():
+    cartoes = _Cartoes()
+    motor = _motor({"espacamento_minutos": 60})
+    agora = int(time.time())
+    motor.avaliar(cartoes.foto(), cartoes.descrever, agora)
+    cartoes.vencidos[1] = (1, FILA_REVISAO)
+    assert len(motor.avaliar(cartoes.foto(), cartoes.descrever, agora)) == 1
+    cartoes.vencidos[2] = (1, FILA_REVISAO)
+    assert motor.avaliar(cartoes.foto(), cartoes.descrever, agora + 30 * 60) == []
+    # O cartão segurado é avisado quando o espaçamento acaba
+    assert motor.avaliar(cartoes.foto(), cartoes.descrever, agora + 60 * 60)[0][1:] == (1, 2)
+
+    silenciosa = _motor({"silencio": "00:00-23:59"})
+    silenciosa.avaliar(_Cartoes().foto(), cartoes.descrever)
+    meio_dia = int(time.mktime(time.strptime("2024-06-01 12:00", "%Y-%m-%d %H:%M")))
+    assert silenciosa.avaliar(cartoes.foto(), cartoes.descrever, meio_dia) == []
+
+
+def test_sem_ids_compara_os_totais():
+    motor = _motor({})
+    motor.avaliar(FotoContagem({1: [0, 2, 0]}, 0, 1, 1, 0, sem_ids=True), lambda ids: [])
+    disparos = motor.avaliar(FotoContagem({1: [1, 3, 0]}, 0, 2, 1, 0, sem_ids=True), lambda ids: [])
+    assert disparos[0][1:] == (2, 4)
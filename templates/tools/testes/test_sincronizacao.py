@@ -0,0 +1,35 @@
+# -------------------------------------------------------------------------
+# Copyright © 2025 Caio Graco Purita. Todos os direitos reservados.
+# ARQUIVO: templates/tools/testes/test_sincronizacao.py
+# -------------------------------------------------------------------------
+import types
+
+import pytest
+from aqt import mw
+
+from AnkiTrayPro.sincronizacao import AgendadorSincronizacao
+
+
+@pytest.fixture
+def agendador(colecao, monkeypatch):
+    monkeypatch.setattr(mw, "col", colecao)
+    # Coleção alterada desde a última sincronização
+    colecao.conexao.execute("UPDATE col SET mod = ls + 1000")
+    colecao.conexao.commit()
+    return AgendadorSincronizacao()
+
+
+def test_alteracao_local_pede_sincronizacao(agendador):
+    assert agendador.precisa_sincronizar()
+
+
+def test_sem_login_nunca_sincroniza(agendador, monkeypatch):
+    monkeypatch.setattr(mw.pm, "sync_auth", lambda: None)
+    assert not agendador.precisa_sincronizar()
+
+
+def test_erro_no_banco_nao_vira_sincronizacao(agendador, monkeypatch):
+    def falhar(*args):
+        raise RuntimeError("coleção fechada")
+    monkeypatch.setattr(mw.col, "db", types.SimpleNamespace(first=falhar))
+    assert not agendador.precisa_sincronizar()
@@ -2,20 +2,63 @@
 # Copyright © 2025 Caio Graco Purita. Todos os direitos reservados.
 # ARQUIVO: tray.py
 # -------------------------------------------------------------------------
+import heapq
+import time
 from aqt import mw
 from aqt.qt import *
+from aqt.utils import tooltip
 from .consts import *
 from .lang import tr
+from .executor import executor, TAREFA_CONTAGEM
+from .sincronizacao import agendador_sinc
+from .configuracao import config_addon
+from .diagnostico import registro_tempos, TRECHO_ESCONDER, TRECHO_MOSTRAR, TRECHO_TELA_INICIAL
+from .icone import CacheIcones, texto_do_selo
+from .contagem import formatar_previsao
+from .perfis import vigia_perfis
+from .hibernacao import hibernacao
+from .perfilador import perfilador
+from .preaquecimento import preaquecedor
+from .encerramento import encerramento
+
+# Por quanto tempo a foto e os nomes dos baralhos servem ao menu sem serem refeitos
+VALIDADE_MENU_BARALHOS_S = 30
+# Baralhos listados no submenu (os de mais vencidos)
+MAXIMO_BARALHOS_MENU = 15
 
 class GerenciadorBandeja:
     def __init__(self):
         self.icone_bandeja = None
         self.fechamento_real = False
+        self.inicializado = False
+        # Impressão da coleção no momento em que a janela foi escondida
+        self.impressao_ao_esconder = None
+        # Ícones com o selo de contagem já desenhados, e a chave do que está na bandeja agora
+        self.cache_icones = CacheIcones()
+        self.chave_icone_atual = None
+        # Submenu de baralhos: ações reaproveitadas e nomes resolvidos com validade curta
+        self.menu_baralhos = None
+        self.acoes_baralhos = []
+        self.por_baralho_menu = None
+        self.nomes_baralhos = {}
+        self.validade_nomes = 0
+
+    def inicializar(self):
+        """Cria o ícone e intercepta o fechamento. Adiado até o perfil abrir (ver __init__.py)."""
+        if self.inicializado: return
+        self.inicializado = True
         self.configurar_ganchos()
         self.configurar_icone_bandeja()
+        # Toda contagem feita pelo executor atualiza o selo do ícone
+        executor.ouvintes_conclusao.append(self._ao_concluir_tarefa)
+        vigia_perfis.ouvintes_atualizacao.append(lambda nome, foto: self.atualizar_dica())
+        perfilador.ouvintes_estado.append(self._ao_alterar_captura)
+        perfilador.ouvintes_captura.append(
+            lambda caminho: self.mostrar_mensagem(tr("msg_captura_salva").format(caminho))
+        )
 
     def obter_config(self, chave):
-        return mw.addonManager.getConfig(__name__).get(chave)
+        return config_addon.obter(chave)
 
     def configurar_icone_bandeja(self):
         if self.icone_bandeja: return
@@ -27,30 +70,188 @@ class GerenciadorBandeja:
         self.icone_bandeja.setToolTip(tr("tooltip_tray"))
         
         menu = QMenu()
+        # Previsão informativa; o texto é refeito a cada abertura do menu
+        self.acao_previsao = QAction(tr("tooltip_tray"), menu)
+        self.acao_previsao.setEnabled(False)
+        menu.addAction(self.acao_previsao)
+        menu.addSeparator()
+        menu.aboutToShow.connect(self._atualizar_previsao_menu)
+
+        # Atalho para estudar um baralho; montado só quando o submenu vai aparecer
+        self.menu_baralhos = menu.addMenu(tr("menu_estudar"))
+        self.menu_baralhos.aboutToShow.connect(self._preencher_menu_baralhos)
+        self.acao_sem_baralhos = self.menu_baralhos.addAction(tr("menu_sem_baralhos"))
+        self.acao_sem_baralhos.setEnabled(False)
+        menu.addSeparator()
+
         acao_mostrar = QAction(tr("menu_abrir"), menu)
         acao_mostrar.triggered.connect(self.mostrar_janela)
         menu.addAction(acao_mostrar)
         
         acao_sinc = QAction(tr("menu_sincronizar"), menu)
-        acao_sinc.triggered.connect(lambda: mw.onSync())
+        acao_sinc.triggered.connect(lambda: executor.sincronizar())
         menu.addAction(acao_sinc)
 
+        self.acao_captura = QAction(tr("menu_iniciar_captura"), menu)
+        self.acao_captura.triggered.connect(self.alternar_captura)
+        menu.addAction(self.acao_captura)
+
         menu.addSeparator()
 
-        acao_sair = QAction(tr("menu_sair_total"), menu)
-        acao_sair.triggered.connect(self.forcar_saida)
-        menu.addAction(acao_sair)
+        self.acao_sair = QAction(tr("menu_sair_total"), menu)
+        self.acao_sair.triggered.connect(self.forcar_saida)
+        menu.addAction(self.acao_sair)
 
         self.icone_bandeja.setContextMenu(menu)
         self.icone_bandeja.activated.connect(self.ao_clicar_icone)
         self.icone_bandeja.messageClicked.connect(self.mostrar_janela)
 
+    def alternar_captura(self):
+        """Liga/desliga a captura de desempenho (o arquivo é avisado pelos ouvintes_captura)."""
+        if perfilador.ativo:
+            perfilador.parar()
+        else:
+            perfilador.iniciar(self.obter_config("modo_perfilador"))
+
+    def _ao_alterar_captura(self, ativo):
+        self.acao_captura.setText(tr("menu_parar_captura") if ativo else tr("menu_iniciar_captura"))
+
+    def mostrar_mensagem(self, mensagem):
+        if self.icone_bandeja and self.icone_bandeja.isVisible():
+            self.icone_bandeja.showMessage("Anki Tray Pro", mensagem, QSystemTrayIcon.MessageIcon.Information, 5000)
+
+    def _ao_concluir_tarefa(self, chave, resultado):
+        if chave == TAREFA_CONTAGEM:
+            self.atualizar_selo(resultado.total)
+            self.atualizar_dica()
+
+    def texto_previsao(self):
+        """
+        "N agora, M na próxima hora, próximo às HH:MM", respondido pela linha do tempo
+        da última foto (bisect): nenhuma consulta nova, mesmo se o relógio andou desde ela.
+        """
+        from .notifications import notificador
+        return formatar_previsao(notificador.foto, tr)
+
+    def _atualizar_previsao_menu(self):
+        self.acao_previsao.setText(self.texto_previsao() or tr("tooltip_tray"))
+
+    def _preencher_menu_baralhos(self):
+        """
+        Lista os baralhos com vencidos a partir das contagens por baralho da foto do
+        notificador (nenhuma consulta). Foto velha: o menu abre com ela mesmo e é
+        refeito quando a contagem pedida aqui chegar.
+        """
+        from .notifications import notificador
+        foto = notificador.foto
+        if foto.carimbo is None or time.time() - foto.instante > VALIDADE_MENU_BARALHOS_S:
+            notificador.solicitar_contagem(
+                lambda nova: self.menu_baralhos.isVisible() and self._montar_menu_baralhos(nova)
+            )
+        self._montar_menu_baralhos(foto)
+
+    def _montar_menu_baralhos(self, foto):
+        agora = time.time()
+        if agora > self.validade_nomes:
+            # Nomes podem mudar (renomear, mover): só valem por pouco tempo
+            self.nomes_baralhos = {}
+            self.validade_nomes = agora + VALIDADE_MENU_BARALHOS_S
+            self.por_baralho_menu = None
+        if foto.por_baralho is self.por_baralho_menu:
+            return  # Mesmas contagens de antes: as ações já estão certas
+        self.por_baralho_menu = foto.por_baralho
+
+        maiores = heapq.nlargest(
+            MAXIMO_BARALHOS_MENU,
+            ((sum(contagens), did) for did, contagens in foto.por_baralho.items() if sum(contagens))
+        )
+        entradas = sorted((self._nome_baralho(did), did, total) for total, did in maiores)
+
+        # Reaproveita as ações existentes; só cria as que faltam
+        while len(self.acoes_baralhos) < len(entradas):
+            acao = QAction(self.menu_baralhos)
+            acao.triggered.connect(lambda marcado=False, a=acao: self.estudar_baralho(a.data()))
+            self.menu_baralhos.addAction(acao)
+            self.acoes_baralhos.append(acao)
+        for i, acao in enumerate(self.acoes_baralhos):
+            if i < len(entradas):
+                nome, did, total = entradas[i]
+                acao.setText(tr("menu_baralho").format(nome.replace("&", "&&"), total))
+                acao.setData(did)
+                acao.setVisible(True)
+            else:
+                acao.setVisible(False)
+        self.acao_sem_baralhos.setVisible(not entradas)
+
+    def _nome_baralho(self, did):
+        nome = self.nomes_baralhos.get(did)
+        if nome is None:
+            try:
+                nome = mw.col.decks.name(did)
+            except:
+                nome = str(did)
+            self.nomes_baralhos[did] = nome
+        return nome
+
+    def estudar_baralho(self, did):
+        """Abre o revisor direto no baralho escolhido, sem desenhar a lista de baralhos antes."""
+        if not mw.col or did is None:
+            return
+        preaquecedor.cancelar()
+        # As páginas precisam voltar antes de o revisor escrever nelas
+        if hibernacao.despertar(redesenhar_tela=False):
+            self.impressao_ao_esconder = None
+        erro = None
+        try:
+            mw.col.decks.select(did)
+            # Como o "Estudar" da visão geral do Anki: o limite de tempo da sessão começa agora
+            mw.col.startTimebox()
+            mw.moveToState("review")
+        except Exception as e:
+            erro = e
+        self.mostrar_janela()
+        if erro is not None:
+            tooltip(tr("msg_erro_estudar").format(erro))
+
+    def atualizar_dica(self):
+        """Tooltip do ícone: texto padrão, previsão de vencimentos e os outros perfis vigiados."""
+        if not self.icone_bandeja: return
+        linhas = [tr("tooltip_tray")]
+        previsao = self.texto_previsao()
+        if previsao:
+            linhas.append(previsao)
+        if self.obter_config("vigiar_outros_perfis"):
+            for nome, total in vigia_perfis.resumo():
+                linhas.append(tr("dica_perfil").format(nome, total))
+        self.icone_bandeja.setToolTip("\n".join(linhas))
+
+    def atualizar_selo(self, contagem):
+        """Mostra a contagem no ícone; se o número exibido não mudou, o ícone nem é tocado."""
+        if not self.icone_bandeja: return
+
+        escuro = QApplication.palette().color(QPalette.ColorRole.Window).lightness() < 128
+        escala = mw.devicePixelRatioF()
+        chave = (texto_do_selo(contagem), escuro, escala)
+        if chave == self.chave_icone_atual:
+            return
+
+        self.chave_icone_atual = chave
+        self.icone_bandeja.setIcon(self.cache_icones.obter(mw.windowIcon(), contagem, escuro, escala))
+
     def ao_clicar_icone(self, razao):
         if razao == QSystemTrayIcon.ActivationReason.Trigger:
             self.mostrar_janela()
 
+    @registro_tempos.medido(TRECHO_MOSTRAR)
     def mostrar_janela(self):
-        """Restaura a janela e força a atualização dos números na tela inicial."""
+        """Restaura a janela na hora; a tela inicial só é redesenhada se algo mudou."""
+        # O que não deu tempo de adiantar agora é feito normalmente
+        preaquecedor.cancelar()
+        # Se a interface foi descarregada na bandeja, ela é reconstruída antes de aparecer
+        despertou = hibernacao.despertar()
+        if despertou:
+            self.impressao_ao_esconder = None
+
         mw.show()
         estado_atual = mw.windowState()
         mw.setWindowState(estado_atual & ~Qt.WindowState.WindowMinimized | Qt.WindowState.WindowActive)
@@ -59,29 +260,60 @@ class GerenciadorBandeja:
         
         if self.icone_bandeja: self.icone_bandeja.hide()
 
-        # --- AQUI ESTÁ A CORREÇÃO DA TELA INICIAL ---
-        # Força o Anki a redesenhar a lista de baralhos agora que a janela está visível.
-        # Isso garante que os números (2 vs 5) sejam corrigidos instantaneamente.
-        mw.deckBrowser.refresh()
+        # A janela voltou antes do debounce: a sincronização do 'esconder' não é mais necessária
+        agendador_sinc.cancelar_pendente()
 
+        # A contagem roda em segundo plano; a mesma foto decide o redesenho
+        # e vira a nova referência do notificador (uma consulta só)
         from .notifications import notificador
-        notificador.resetar_contagem()
+        notificador.resetar_contagem(None if despertou else self._atualizar_tela_inicial)
 
+    def _atualizar_tela_inicial(self, foto):
+        # --- AQUI ESTÁ A CORREÇÃO DA TELA INICIAL ---
+        # Redesenha a lista de baralhos apenas se a coleção ou os vencimentos mudaram
+        # enquanto a janela estava escondida. Isso mantém os números (2 vs 5) corretos
+        # sem pagar o custo do webview a cada restauração.
+        if foto.impressao() == self.impressao_ao_esconder:
+            return
+        self.impressao_ao_esconder = None
+        if mw.isVisible() and mw.state == "deckBrowser":
+            with registro_tempos.medir(TRECHO_TELA_INICIAL):
+                mw.deckBrowser.refresh()
+
+    def _registrar_impressao(self, foto):
+        self.impressao_ao_esconder = foto.impressao()
+
+    @registro_tempos.medido(TRECHO_ESCONDER)
     def esconder_para_bandeja(self):
         if mw.state == "review":
             mw.deckBrowser.show()
             
-        if self.obter_config("sincronizar_na_bandeja"):
-            mw.onSync()
-            
         if self.icone_bandeja: self.icone_bandeja.show()
         mw.hide()
 
+        # A sincronização segue em segundo plano depois que a janela já sumiu,
+        # com debounce para alternâncias rápidas e pulada se nada mudou
+        if self.obter_config("sincronizar_na_bandeja"):
+            agendador_sinc.solicitar()
+
+        # Longas estadias na bandeja: libera a memória depois do tempo configurado
+        hibernacao.armar()
+
         from .notifications import notificador
-        notificador.resetar_contagem()
+
+        def ao_contar(foto):
+            self._registrar_impressao(foto)
+            # Só com a contagem do esconder pronta (o taskman roda tarefas em paralelo):
+            # o próximo início já parte dela
+            notificador.salvar_instantaneo()
+
+        notificador.resetar_contagem(ao_contar)
 
     def forcar_saida(self):
-        mw.onSync()
+        # Sincroniza só se preciso, com prazo; o processo termina em tempo limitado
+        encerramento.iniciar()
+
+    def fechar_de_verdade(self):
         self.fechamento_real = True
         mw.close()
 